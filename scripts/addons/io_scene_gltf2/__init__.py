@@ -18,12 +18,17 @@
 
 import bpy
 import os
+import tempfile
 
 
 if 'bpy' in locals():
     import imp
     if 'gltf2_animate' in locals():
         imp.reload(gltf2_animate)
+    if 'gltf2_buffer' in locals():
+        imp.reload(gltf2_buffer)
+    if 'gltf2_cache' in locals():
+        imp.reload(gltf2_cache)
     if 'gltf2_create' in locals():
         imp.reload(gltf2_create)
     if 'gltf2_debug' in locals():
@@ -38,13 +43,16 @@ if 'bpy' in locals():
         imp.reload(gltf2_generate)
     if 'gltf2_get' in locals():
         imp.reload(gltf2_get)
+    if 'gltf2_optimize' in locals():
+        imp.reload(gltf2_optimize)
 
         
 from bpy.props import (CollectionProperty,
                        StringProperty,
                        BoolProperty,
                        EnumProperty,
-                       FloatProperty)
+                       FloatProperty,
+                       IntProperty)
 
 
 from bpy_extras.io_utils import (ExportHelper)
@@ -94,6 +102,70 @@ class ExportGLTF2_Base():
             default=False
     )
 
+    export_stream_buffers = BoolProperty(
+            name='Stream buffers to disk',
+            description='',
+            default=False
+    )
+
+    export_parallel_images = BoolProperty(
+            name='Encode images in parallel',
+            description='',
+            default=False
+    )
+
+    export_png_preset = EnumProperty(
+        name='PNG compression',
+        items=(('FAST', 'Fast', ''),
+        ('SHIP', 'Ship', ''),
+        ('CUSTOM', 'Custom', '')),
+        default='CUSTOM'
+    )
+
+    export_png_level = IntProperty(
+            name='PNG compression level',
+            description='',
+            default=9,
+            min=0,
+            max=9
+    )
+
+    export_png_filter = EnumProperty(
+        name='PNG filter',
+        items=(('NONE', 'None', ''),
+        ('SUB', 'Sub', ''),
+        ('UP', 'Up', ''),
+        ('PAETH', 'Paeth', ''),
+        ('ADAPTIVE', 'Adaptive', '')),
+        default='NONE'
+    )
+
+    export_image_passthrough = BoolProperty(
+            name='Keep original PNG and JPEG files',
+            description='',
+            default=True
+    )
+
+    export_image_cache = BoolProperty(
+            name='Cache images',
+            description='',
+            default=False
+    )
+
+    export_image_cache_directory = StringProperty(
+            name='Image cache directory',
+            description='',
+            default='',
+            subtype='DIR_PATH'
+    )
+
+    export_image_cache_size = IntProperty(
+            name='Image cache size (MB)',
+            description='',
+            default=1024,
+            min=1
+    )
+
     export_indices = EnumProperty(
         name='Maximum indices',
         items=(('UNSIGNED_BYTE', 'Unsigned Byte', ''),
@@ -108,6 +180,12 @@ class ExportGLTF2_Base():
             default=False
     )
 
+    export_optimize_cache = BoolProperty(
+            name='Optimize vertex cache',
+            description='',
+            default=False
+    )
+
     export_texcoords = BoolProperty(
             name='Export texture coordinates',
             description='',
@@ -198,6 +276,54 @@ class ExportGLTF2_Base():
             default=False
     )
 
+    export_frame_samples = IntProperty(
+            name='Samples per frame',
+            description='',
+            default=1,
+            min=1,
+            max=100
+    )
+
+    export_reduce_keys = BoolProperty(
+            name='Reduce keyframes',
+            description='',
+            default=False
+    )
+
+    export_reduce_tolerance_translation = FloatProperty(
+            name='Translation tolerance',
+            description='Maximum distance in scene units, which a removed translation key may deviate',
+            default=0.001,
+            min=0.0
+    )
+
+    export_reduce_tolerance_rotation = FloatProperty(
+            name='Rotation tolerance',
+            description='Maximum angle in radians, which a removed rotation key may deviate',
+            default=0.001,
+            min=0.0
+    )
+
+    export_reduce_tolerance_scale = FloatProperty(
+            name='Scale tolerance',
+            description='Maximum difference of the unitless scale factors, which a removed scale key may deviate',
+            default=0.001,
+            min=0.0
+    )
+
+    export_reduce_tolerance_weights = FloatProperty(
+            name='Weights tolerance',
+            description='Maximum difference of the unitless morph target weights, which a removed weights key may deviate',
+            default=0.001,
+            min=0.0
+    )
+
+    export_drop_constant = BoolProperty(
+            name='Drop constant channels',
+            description='',
+            default=False
+    )
+
     export_current_frame = BoolProperty(
             name='Export current frame',
             description='',
@@ -216,6 +342,12 @@ class ExportGLTF2_Base():
             default=False
     )
 
+    export_share_skins = BoolProperty(
+            name='Share skins',
+            description='',
+            default=False
+    )
+
     export_morph = BoolProperty(
             name='Export morphing',
             description='',
@@ -261,6 +393,8 @@ class ExportGLTF2_Base():
     #
 
     def execute(self, context):
+        from . import gltf2_buffer
+        from . import gltf2_create
         from . import gltf2_export
         
         # All custom export settings are stored in this container.
@@ -274,8 +408,23 @@ class ExportGLTF2_Base():
         export_settings['gltf_embed_buffers'] = self.export_embed_buffers
         export_settings['gltf_embed_images'] = self.export_embed_images
         export_settings['gltf_strip'] = self.export_strip
+        export_settings['gltf_stream_buffers'] = self.export_stream_buffers
+        export_settings['gltf_parallel_images'] = self.export_parallel_images
+        if self.export_png_preset == 'CUSTOM':
+            export_settings['gltf_png_level'] = self.export_png_level
+            export_settings['gltf_png_filter'] = self.export_png_filter
+        else:
+            export_settings['gltf_png_level'], export_settings['gltf_png_filter'] = gltf2_create.GLTF_PNG_PRESETS[self.export_png_preset]
+        export_settings['gltf_image_passthrough'] = self.export_image_passthrough
+        export_settings['gltf_image_cache'] = self.export_image_cache
+        if self.export_image_cache_directory != '':
+            export_settings['gltf_image_cache_directory'] = bpy.path.abspath(self.export_image_cache_directory)
+        else:
+            export_settings['gltf_image_cache_directory'] = os.path.join(tempfile.gettempdir(), 'glTF_image_cache')
+        export_settings['gltf_image_cache_size'] = self.export_image_cache_size
         export_settings['gltf_indices'] = self.export_indices
         export_settings['gltf_force_indices'] = self.export_force_indices
+        export_settings['gltf_optimize_cache'] = self.export_optimize_cache
         export_settings['gltf_texcoords'] = self.export_texcoords
         export_settings['gltf_normals'] = self.export_normals
         export_settings['gltf_tangents'] = self.export_tangents and self.export_normals
@@ -296,16 +445,32 @@ class ExportGLTF2_Base():
             export_settings['gltf_frame_range'] = self.export_frame_range
             export_settings['gltf_move_keyframes'] = self.export_move_keyframes
             export_settings['gltf_force_sampling'] = self.export_force_sampling
+            export_settings['gltf_frame_samples'] = self.export_frame_samples
+            export_settings['gltf_reduce_keys'] = self.export_reduce_keys
+            export_settings['gltf_reduce_tolerance_translation'] = self.export_reduce_tolerance_translation
+            export_settings['gltf_reduce_tolerance_rotation'] = self.export_reduce_tolerance_rotation
+            export_settings['gltf_reduce_tolerance_scale'] = self.export_reduce_tolerance_scale
+            export_settings['gltf_reduce_tolerance_weights'] = self.export_reduce_tolerance_weights
+            export_settings['gltf_drop_constant'] = self.export_drop_constant
         else:
             export_settings['gltf_current_frame'] = self.export_current_frame
             export_settings['gltf_frame_range'] = False
             export_settings['gltf_move_keyframes'] = False
             export_settings['gltf_force_sampling'] = False
+            export_settings['gltf_frame_samples'] = 1
+            export_settings['gltf_reduce_keys'] = False
+            export_settings['gltf_reduce_tolerance_translation'] = 0.0
+            export_settings['gltf_reduce_tolerance_rotation'] = 0.0
+            export_settings['gltf_reduce_tolerance_scale'] = 0.0
+            export_settings['gltf_reduce_tolerance_weights'] = 0.0
+            export_settings['gltf_drop_constant'] = False
         export_settings['gltf_skins'] = self.export_skins
         if self.export_skins:
             export_settings['gltf_bake_skins'] = self.export_bake_skins
+            export_settings['gltf_share_skins'] = self.export_share_skins
         else:
             export_settings['gltf_bake_skins'] = False
+            export_settings['gltf_share_skins'] = False
         export_settings['gltf_morph'] = self.export_morph
         if self.export_morph:
             export_settings['gltf_morph_normal'] = self.export_morph_normal
@@ -322,7 +487,7 @@ class ExportGLTF2_Base():
         export_settings['gltf_displacement'] = self.export_displacement
         
         export_settings['gltf_uri'] = []
-        export_settings['gltf_binary'] = bytearray()
+        export_settings['gltf_binary'] = gltf2_buffer.BufferBuilder(self.export_stream_buffers, export_settings['gltf_filedirectory'])
         export_settings['gltf_binaryfilename'] = os.path.splitext(os.path.basename(self.filepath))[0] + '.bin' 
 
         return gltf2_export.save(self, context, export_settings)
@@ -339,6 +504,18 @@ class ExportGLTF2_Base():
             col.prop(self, 'export_embed_buffers')
             col.prop(self, 'export_embed_images')
             col.prop(self, 'export_strip')
+        col.prop(self, 'export_stream_buffers')
+        col.prop(self, 'export_image_passthrough')
+        if self.export_format != 'ASCII' or self.export_embed_images:
+            col.prop(self, 'export_parallel_images')
+            col.prop(self, 'export_png_preset')
+            if self.export_png_preset == 'CUSTOM':
+                col.prop(self, 'export_png_level')
+                col.prop(self, 'export_png_filter')
+            col.prop(self, 'export_image_cache')
+            if self.export_image_cache:
+                col.prop(self, 'export_image_cache_directory')
+                col.prop(self, 'export_image_cache_size')
 
         col = layout.box().column()
         col.label('Nodes:', icon='OOPS')
@@ -351,6 +528,7 @@ class ExportGLTF2_Base():
         col.prop(self, 'export_apply')
         col.prop(self, 'export_indices')
         col.prop(self, 'export_force_indices')
+        col.prop(self, 'export_optimize_cache')
 
         col = layout.box().column()
         col.label('Attributes:', icon='SURFACE_DATA')
@@ -374,11 +552,20 @@ class ExportGLTF2_Base():
             col.prop(self, 'export_frame_range')
             col.prop(self, 'export_move_keyframes')
             col.prop(self, 'export_force_sampling')
+            col.prop(self, 'export_frame_samples')
+            col.prop(self, 'export_reduce_keys')
+            if self.export_reduce_keys:
+                col.prop(self, 'export_reduce_tolerance_translation')
+                col.prop(self, 'export_reduce_tolerance_rotation')
+                col.prop(self, 'export_reduce_tolerance_scale')
+                col.prop(self, 'export_reduce_tolerance_weights')
+            col.prop(self, 'export_drop_constant')
         else:
             col.prop(self, 'export_current_frame')
         col.prop(self, 'export_skins')
         if self.export_skins:
             col.prop(self, 'export_bake_skins')
+            col.prop(self, 'export_share_skins')
         col.prop(self, 'export_morph')            
         if self.export_morph:
             col.prop(self, 'export_morph_normal')
@@ -16,10 +16,16 @@
 # Imports
 #
 
+import array
 import bpy
 import math
 import mathutils
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from .gltf2_debug import *
 from .gltf2_extract import *
 
@@ -27,6 +33,118 @@ from .gltf2_extract import *
 # Globals
 #
 
+# Location, rotation quaternion (w, x, y, z) and scale of one joint.
+GLTF_JOINT_COMPONENTS = 10
+
+# Distance in frames to a keyframe, below which Blender may snap to it. Such keys are always evaluated by Blender.
+GLTF_FCURVE_KEYFRAME_THRESHOLD = 0.01
+
+# Values of the keyframe interpolation enum, as read by foreach_get.
+GLTF_FCURVE_INTERPOLATIONS = {'CONSTANT' : 0, 'LINEAR' : 1, 'BEZIER' : 2}
+
+# Range of the Bezier curve parameter, in which Blender accepts a root of the cubic.
+GLTF_FCURVE_BEZIER_MIN = -1.0e-10
+GLTF_FCURVE_BEZIER_MAX = 1.000001
+
+# Relative threshold, below which a sampled value equals the static value of a node.
+GLTF_CONSTANT_EPSILON = 1.0e-6
+
+# Maximum number of keys in a span of the key reduction. Longer samplers are split first, which bounds the reduction time.
+GLTF_REDUCE_MAX_SPAN = 256
+
+# Below this distance of two quaternions, slerp falls back to linear interpolation, as done by Blender.
+GLTF_SLERP_EPSILON = 0.0001
+
+#
+# Classes
+#
+
+class JointCache:
+    """
+    Stores the decomposed joint transformations of all bones of one armature in one contiguous float32 array.
+    A row per frame holds the transformations of all bones. Rows are found by the frame in constant time.
+    """
+    
+    __slots__ = ('bone_names', 'bone_indices', 'frame_rows', 'data', 'valid')
+    
+    def __init__(self, bone_names):
+        self.bone_names = list(bone_names)
+        self.bone_indices = {bone_name : bone_index for bone_index, bone_name in enumerate(self.bone_names)}
+        self.frame_rows = {}
+        self.data = array.array('f')
+        self.valid = bytearray()
+
+
+    def __getstate__(self):
+        return (self.bone_names, self.frame_rows, self.data.tobytes(), bytes(self.valid))
+
+
+    def __setstate__(self, state):
+        bone_names, frame_rows, data, valid = state
+        
+        self.__init__(bone_names)
+        
+        self.frame_rows = frame_rows
+        self.data.frombytes(data)
+        self.valid = bytearray(valid)
+
+
+    def row(self, frame):
+        """
+        Returns the row of the given frame. A row is added, if the frame is not stored yet.
+        """
+        
+        row = self.frame_rows.get(frame)
+        
+        if row is None:
+            row = len(self.frame_rows)
+            
+            self.frame_rows[frame] = row
+            
+            bone_count = len(self.bone_names)
+            
+            self.data.frombytes(bytes(self.data.itemsize * bone_count * GLTF_JOINT_COMPONENTS))
+            self.valid.extend(bytes(bone_count))
+        
+        return row
+
+
+    def set(self, frame, bone_name, location, rotation, scale):
+        """
+        Stores location, rotation and scale of a bone at the given frame.
+        """
+        
+        bone_count = len(self.bone_names)
+        
+        element = self.row(frame) * bone_count + self.bone_indices[bone_name]
+        
+        offset = element * GLTF_JOINT_COMPONENTS
+        
+        self.data[offset:offset + GLTF_JOINT_COMPONENTS] = array.array('f', (location[0], location[1], location[2], rotation[0], rotation[1], rotation[2], rotation[3], scale[0], scale[1], scale[2]))
+        self.valid[element] = 1
+
+
+    def get(self, frame, bone_name):
+        """
+        Returns location, rotation and scale of a bone at the given frame or None, if not stored.
+        """
+        
+        row = self.frame_rows.get(frame)
+        
+        if row is None:
+            return None
+        
+        element = row * len(self.bone_names) + self.bone_indices[bone_name]
+        
+        if not self.valid[element]:
+            return None
+        
+        offset = element * GLTF_JOINT_COMPONENTS
+        
+        values = self.data[offset:offset + GLTF_JOINT_COMPONENTS]
+        
+        return [mathutils.Vector(values[0:3]), mathutils.Quaternion(values[3:7]), mathutils.Vector(values[7:10])]
+
 #
 # Functions
 #
@@ -117,12 +235,38 @@ def animate_convert_keys(key_list):
     return times
 
 
+def animate_frame_grid(start, end, samples):
+    """
+    Creates the sample key frames from start to end with the given number of samples per frame.
+    Every key frame is calculated from an integer step, so no error is accumulated.
+    """
+    if end < start:
+        return []
+    
+    step_count = int(math.floor((end - start) * samples))
+    
+    return [start + step / samples for step in range(0, step_count + 1)]
+
+
+def animate_set_frame(key):
+    """
+    Sets the scene to the given key frame, which can be between two frames.
+    """
+    frame = int(math.floor(key))
+    
+    bpy.context.scene.frame_set(frame, key - frame)
+
+
 def animate_gather_keys(export_settings, fcurve_list, interpolation):
     """
     Merges and sorts several key frames to one set. 
     If an interpolation conversion is needed, the sample key frames are created as well.
     """
-    keys = []
+    keys = set()
+    
+    use_frame_range = export_settings['gltf_frame_range']
+    frame_start = bpy.context.scene.frame_start
+    frame_end = bpy.context.scene.frame_end
     
     if interpolation == 'CONVERSION_NEEDED':
         start = None
@@ -147,10 +291,7 @@ def animate_gather_keys(export_settings, fcurve_list, interpolation):
             add_epsilon_keyframe = False
             for blender_keyframe in blender_fcurve.keyframe_points:
                 if add_epsilon_keyframe:
-                    key = blender_keyframe.co[0] - 0.001
-                    
-                    if key not in keys:
-                        keys.append(key)
+                    keys.add(blender_keyframe.co[0] - 0.001)
                         
                     add_epsilon_keyframe = False
                 
@@ -158,18 +299,12 @@ def animate_gather_keys(export_settings, fcurve_list, interpolation):
                     add_epsilon_keyframe = True
             
             if add_epsilon_keyframe:
-                key = end - 0.001
-                
-                if key not in keys:
-                    keys.append(key)
-
-        key = start
-        while key <= end:
-            if not export_settings['gltf_frame_range'] or (export_settings['gltf_frame_range'] and key >= bpy.context.scene.frame_start and key <= bpy.context.scene.frame_end): 
-                keys.append(key)
-            key += 1.0
-            
-        keys.sort()
+                keys.add(end - 0.001)
+
+        if start is not None:
+            for key in animate_frame_grid(start, end, export_settings['gltf_frame_samples']):
+                if not use_frame_range or (key >= frame_start and key <= frame_end): 
+                    keys.add(key)
         
     else: 
         for blender_fcurve in fcurve_list:
@@ -178,22 +313,722 @@ def animate_gather_keys(export_settings, fcurve_list, interpolation):
             
             for blender_keyframe in blender_fcurve.keyframe_points:
                 key = blender_keyframe.co[0]
-                if not export_settings['gltf_frame_range'] or (export_settings['gltf_frame_range'] and key >= bpy.context.scene.frame_start and key <= bpy.context.scene.frame_end): 
-                    if key not in keys:
-                        keys.append(key)
+                if not use_frame_range or (key >= frame_start and key <= frame_end): 
+                    keys.add(key)
+
+    return sorted(keys)
 
-        keys.sort()
+
+def animate_joint_correction(blender_bone):
+    """
+    Calculates the matrix, which converts the pose of a bone to the local glTF joint transformation.
+    """
+    axis_basis_change = mathutils.Matrix(((1.0, 0.0, 0.0, 0.0), (0.0, 0.0, 1.0, 0.0), (0.0, -1.0, 0.0, 0.0) , (0.0, 0.0, 0.0, 1.0)))
+    
+    if blender_bone.parent is None:
+        return axis_basis_change * blender_bone.bone.matrix_local
     
-    return keys
+    return blender_bone.parent.bone.matrix_local.inverted() * blender_bone.bone.matrix_local
 
 
-def animate_location(export_settings, location, interpolation, node_type, node_name, matrix_correction, matrix_basis):
+def animate_sample_joints(export_settings, blender_armatures, armature_keys):
     """
-    Calculates/gathers the key value pairs for location transformations.
+    Samples the joint transformations of all given armatures at their key frames, given per armature name.
+    Every frame is only set once and only the armatures, which need this frame, are read.
+    """
+    joint_cache = export_settings['gltf_joint_cache']
+    
+    correction_matrices = {}
+    
+    key_armatures = {}
+    
+    for blender_armature in blender_armatures:
+        if joint_cache.get(blender_armature.name) is None:
+            joint_cache[blender_armature.name] = JointCache([blender_bone.name for blender_bone in blender_armature.pose.bones])
+        
+        for blender_bone in blender_armature.pose.bones:
+            correction_matrices[(blender_armature.name, blender_bone.name)] = animate_joint_correction(blender_bone)
+        
+        for key in armature_keys.get(blender_armature.name, []):
+            if key not in key_armatures:
+                key_armatures[key] = []
+            
+            key_armatures[key].append(blender_armature)
+    
+    #
+    
+    for key in sorted(key_armatures):
+        animate_set_frame(key)
+        
+        for blender_armature in key_armatures[key]:
+            armature_cache = joint_cache[blender_armature.name]
+            
+            for blender_bone in blender_armature.pose.bones:
+                matrix_basis = blender_bone.matrix_basis
+                
+                if export_settings['gltf_bake_skins']:
+                    matrix_basis = blender_armature.convert_space(blender_bone, blender_bone.matrix, from_space='POSE', to_space='LOCAL')
+                
+                matrix = correction_matrices[(blender_armature.name, blender_bone.name)] * matrix_basis 
+                
+                tmp_location, tmp_rotation, tmp_scale = matrix.decompose()
+                
+                armature_cache.set(key, blender_bone.name, tmp_location, tmp_rotation, tmp_scale)
+
+
+def animate_get_joint_transform(export_settings, object_name, node_name, key, matrix_correction, matrix_basis):
+    """
+    Returns location, rotation and scale of a joint at the given key frame.
+    Key frames, which were not sampled in advance, are evaluated and cached.
+    """
+    joint_cache = export_settings['gltf_joint_cache']
+    
+    if joint_cache.get(object_name) is None:
+        joint_cache[object_name] = JointCache([blender_bone.name for blender_bone in bpy.data.objects[object_name].pose.bones])
+    
+    transform = joint_cache[object_name].get(key, node_name)
+    
+    if transform is None:
+        animate_set_frame(key)
+        
+        matrix = matrix_correction * matrix_basis 
+        
+        transform = list(matrix.decompose())
+        
+        joint_cache[object_name].set(key, node_name, transform[0], transform[1], transform[2])
+    
+    return transform
+
+
+def animate_key_error(final_keys, values, components, is_rotation, first, last, index):
+    """
+    Calculates the error, if the value at index is interpolated between the values at first and last.
+    Rotations are spherical interpolated and the error is the angle in radians, otherwise it is the maximum component difference.
+    """
+    factor = (final_keys[index] - final_keys[first]) / (final_keys[last] - final_keys[first])
+    
+    first_value = values[first * components:(first + 1) * components]
+    last_value = values[last * components:(last + 1) * components]
+    value = values[index * components:(index + 1) * components]
+    
+    if is_rotation:
+        # glTF Quaternion notation to internal Quaternion notation.
+        first_rotation = mathutils.Quaternion((first_value[3], first_value[0], first_value[1], first_value[2]))
+        last_rotation = mathutils.Quaternion((last_value[3], last_value[0], last_value[1], last_value[2]))
+        
+        rotation = first_rotation.slerp(last_rotation, factor)
+        
+        interpolated = [rotation[1], rotation[2], rotation[3], rotation[0]]
+        
+        # q and -q are the same rotation.
+        if sum(interpolated[component] * value[component] for component in range(0, 4)) < 0.0:
+            interpolated = [-component_value for component_value in interpolated]
+        
+        # Numerically stable angle between both rotations, also for nearly equal ones.
+        difference = math.sqrt(sum((interpolated[component] - value[component]) ** 2 for component in range(0, 4)))
+        total = math.sqrt(sum((interpolated[component] + value[component]) ** 2 for component in range(0, 4)))
+        
+        return 4.0 * math.atan2(difference, total)
+    
+    error = 0.0
+    
+    for component in range(0, components):
+        interpolated = first_value[component] + (last_value[component] - first_value[component]) * factor
+        
+        error = max(error, abs(value[component] - interpolated))
+    
+    return error
+
+
+def animate_span_errors(key_array, value_array, is_rotation, first, last):
+    """
+    Calculates the errors of all keys between first and last at once, see animate_key_error.
+    The keys are a NumPy array and the values a NumPy array with one row per key. Returns a NumPy array of the errors.
+    """
+    factors = (key_array[first + 1:last] - key_array[first]) / (key_array[last] - key_array[first])
+    
+    first_value = value_array[first]
+    last_value = value_array[last]
+    values = value_array[first + 1:last]
+    
+    if is_rotation:
+        # Spherical interpolation along the shorter arc, like mathutils. Both factors do not depend on the component order.
+        cosine = float(numpy.dot(first_value, last_value))
+        
+        if cosine < 0.0:
+            last_value = -last_value
+            cosine = -cosine
+        
+        if 1.0 - cosine > GLTF_SLERP_EPSILON:
+            omega = math.acos(min(cosine, 1.0))
+            
+            first_factors = numpy.sin((1.0 - factors) * omega) / math.sin(omega)
+            last_factors = numpy.sin(factors * omega) / math.sin(omega)
+        else:
+            first_factors = 1.0 - factors
+            last_factors = factors
+        
+        interpolated = first_factors[:, None] * first_value + last_factors[:, None] * last_value
+        
+        # q and -q are the same rotation.
+        signs = numpy.where(numpy.einsum('ij,ij->i', interpolated, values) < 0.0, -1.0, 1.0)
+        
+        interpolated *= signs[:, None]
+        
+        difference = numpy.sqrt(((interpolated - values) ** 2).sum(axis=1))
+        total = numpy.sqrt(((interpolated + values) ** 2).sum(axis=1))
+        
+        return 4.0 * numpy.arctan2(difference, total)
+    
+    interpolated = first_value + (last_value - first_value) * factors[:, None]
+    
+    return numpy.abs(values - interpolated).max(axis=1)
+
+
+def animate_reduce_keys(final_keys, values, components, is_rotation, tolerance):
+    """
+    Removes all keys of a linear interpolated sampler, which are restored by interpolation within the given tolerance.
+    The most deviating key of a span is kept and both halves are processed again, until every span is within tolerance.
+    The tolerance is an angle in radians for rotations, otherwise a component difference in the unit of the values.
+    Spans have at most GLTF_REDUCE_MAX_SPAN keys, so every key is visited a bounded number of times.
+    If NumPy is available, the errors of a span are calculated at once in double precision.
+    Returns the reduced keys and values.
     """
-    if not export_settings['gltf_joint_cache'].get(node_name):
-        export_settings['gltf_joint_cache'][node_name] = {}
+    key_count = len(final_keys)
+    
+    if key_count < 3:
+        return final_keys, values
     
+    keep = [False] * key_count
+    
+    spans = []
+    
+    for first in range(0, key_count - 1, GLTF_REDUCE_MAX_SPAN - 1):
+        last = min(first + GLTF_REDUCE_MAX_SPAN - 1, key_count - 1)
+        
+        keep[first] = True
+        keep[last] = True
+        
+        spans.append((first, last))
+    
+    if numpy is not None:
+        key_array = numpy.asarray(final_keys, dtype=numpy.float64)
+        value_array = numpy.asarray(values, dtype=numpy.float64).reshape(key_count, components)
+    
+    while len(spans) > 0:
+        first, last = spans.pop()
+        
+        if last - first < 2:
+            continue
+        
+        max_error = tolerance
+        max_index = -1
+        
+        if numpy is not None:
+            errors = animate_span_errors(key_array, value_array, is_rotation, first, last)
+            
+            error_index = int(numpy.argmax(errors))
+            
+            if errors[error_index] > max_error:
+                max_index = first + 1 + error_index
+        else:
+            for index in range(first + 1, last):
+                error = animate_key_error(final_keys, values, components, is_rotation, first, last, index)
+                
+                if error > max_error:
+                    max_error = error
+                    max_index = index
+        
+        if max_index >= 0:
+            keep[max_index] = True
+            
+            spans.append((first, max_index))
+            spans.append((max_index, last))
+    
+    #
+    
+    reduced_keys = []
+    reduced_values = []
+    
+    for index in range(0, key_count):
+        if keep[index]:
+            reduced_keys.append(final_keys[index])
+            reduced_values.extend(values[index * components:(index + 1) * components])
+    
+    return reduced_keys, reduced_values
+
+
+def animate_is_constant(values, components, is_cubic, default_value, is_rotation):
+    """
+    Returns True, if every key of a sampler output equals the given static value, so the channel can be dropped.
+    Tangents of cubic spline samplers have to be zero. Rotations also match the negated quaternion.
+    """
+    if default_value is None or len(default_value) != components or len(values) == 0:
+        return False
+    
+    defaults = [default_value]
+    if is_rotation:
+        defaults.append([-component for component in default_value])
+    
+    stride = components
+    offset = 0
+    if is_cubic:
+        stride = 3 * components
+        offset = components
+    
+    if len(values) % stride != 0:
+        return False
+    
+    for key_start in range(0, len(values), stride):
+        if is_cubic:
+            for tangent_start in (key_start, key_start + 2 * components):
+                for i in range(0, components):
+                    if abs(values[tangent_start + i]) > GLTF_CONSTANT_EPSILON:
+                        return False
+        
+        key_value = values[key_start + offset:key_start + offset + components]
+        
+        found = False
+        
+        for default in defaults:
+            found = True
+            
+            for i in range(0, components):
+                if abs(key_value[i] - default[i]) > GLTF_CONSTANT_EPSILON * max(1.0, abs(default[i])):
+                    found = False
+                    break
+            
+            if found:
+                break
+        
+        if not found:
+            return False
+    
+    return True
+
+
+def animate_cube_root(values):
+    """
+    Signed cube root of a NumPy array, calculated like Blender does.
+    """
+    result = numpy.zeros_like(values)
+    
+    positive = values > 0.0
+    negative = values < 0.0
+    
+    result[positive] = numpy.exp(numpy.log(values[positive]) / 3.0)
+    result[negative] = -numpy.exp(numpy.log(-values[negative]) / 3.0)
+    
+    return result
+
+
+def animate_bezier_roots(frames, q0, q1, q2, q3):
+    """
+    Solves the x coordinate of Bezier segments for the curve parameter at the given frames, like findzero() of Blender.
+    All arguments are float32 NumPy arrays with one element per frame. The cubic is solved in double precision.
+    Returns the float32 parameters and a mask of the frames, for which a root was found.
+    """
+    # The coefficients are calculated in single precision.
+    c0 = (q0 - frames).astype(numpy.float64)
+    c1 = (3.0 * (q1 - q0)).astype(numpy.float64)
+    c2 = (3.0 * (q0 - 2.0 * q1 + q2)).astype(numpy.float64)
+    c3 = (q3 - q0 + 3.0 * (q1 - q2)).astype(numpy.float64)
+    
+    count = len(frames)
+    
+    # Up to three candidates per frame. The first one within the parameter range is taken.
+    candidates = numpy.full((3, count), numpy.nan)
+    
+    with numpy.errstate(all='ignore'):
+        #
+        # Cubic.
+        #
+        
+        cubic = c3 != 0.0
+        
+        a = c2 / c3 / 3.0
+        b = c1 / c3
+        c = c0 / c3
+        
+        p = b / 3.0 - a * a
+        q = (2.0 * a * a * a - a * b + c) / 2.0
+        d = q * q + p * p * p
+        
+        one_root = numpy.logical_and(cubic, d > 0.0)
+        
+        t = numpy.sqrt(numpy.where(one_root, d, 0.0))
+        
+        candidates[0] = numpy.where(one_root, animate_cube_root(-q + t) + animate_cube_root(-q - t) - a, candidates[0])
+        
+        double_root = numpy.logical_and(cubic, d == 0.0)
+        
+        t = animate_cube_root(numpy.where(double_root, -q, 0.0))
+        
+        candidates[0] = numpy.where(double_root, 2.0 * t - a, candidates[0])
+        candidates[1] = numpy.where(double_root, -t - a, candidates[1])
+        
+        three_roots = numpy.logical_and(cubic, d < 0.0)
+        
+        phi = numpy.arccos(numpy.where(three_roots, -q / numpy.sqrt(-(p * p * p)), 0.0))
+        t = numpy.sqrt(numpy.where(three_roots, -p, 0.0))
+        p = numpy.cos(phi / 3.0)
+        q = numpy.sqrt(3.0 - 3.0 * p * p)
+        
+        candidates[0] = numpy.where(three_roots, 2.0 * t * p - a, candidates[0])
+        candidates[1] = numpy.where(three_roots, -t * (p + q) - a, candidates[1])
+        candidates[2] = numpy.where(three_roots, -t * (p - q) - a, candidates[2])
+        
+        #
+        # Quadratic and linear.
+        #
+        
+        quadratic = numpy.logical_and(numpy.logical_not(cubic), c2 != 0.0)
+        
+        p = c1 * c1 - 4.0 * c2 * c0
+        
+        two_roots = numpy.logical_and(quadratic, p > 0.0)
+        
+        p = numpy.sqrt(numpy.where(two_roots, p, 0.0))
+        
+        candidates[0] = numpy.where(two_roots, (-c1 - p) / (2.0 * c2), candidates[0])
+        candidates[1] = numpy.where(two_roots, (-c1 + p) / (2.0 * c2), candidates[1])
+        
+        candidates[0] = numpy.where(numpy.logical_and(quadratic, c1 * c1 - 4.0 * c2 * c0 == 0.0), -c1 / (2.0 * c2), candidates[0])
+        
+        linear = numpy.logical_and(numpy.logical_not(cubic), numpy.logical_and(c2 == 0.0, c1 != 0.0))
+        
+        candidates[0] = numpy.where(linear, -c0 / c1, candidates[0])
+        
+        constant = numpy.logical_and(numpy.logical_not(cubic), numpy.logical_and(c2 == 0.0, numpy.logical_and(c1 == 0.0, c0 == 0.0)))
+        
+        candidates[0] = numpy.where(constant, 0.0, candidates[0])
+    
+        #
+        
+        candidates = candidates.astype(numpy.float32)
+        
+        valid = numpy.logical_and(candidates >= numpy.float32(GLTF_FCURVE_BEZIER_MIN), candidates <= numpy.float32(GLTF_FCURVE_BEZIER_MAX))
+    
+    found = valid.any(axis=0)
+    
+    roots = candidates[valid.argmax(axis=0), numpy.arange(count)]
+    
+    return roots, found
+
+
+def animate_evaluate_fcurve(blender_fcurve, keys):
+    """
+    Evaluates a fcurve at all keys and returns a list of values, like evaluate() does.
+    Constant, linear and Bezier segments are evaluated at once with NumPy, following the single precision code of Blender.
+    Constant and linear segments give identical values. Bezier segments match within a relative error of about 1.0e-6,
+    as the cubic is solved by another math library.
+    Keys close to, but not on a keyframe, keys in other segments and fcurves with modifiers or other extrapolations
+    are evaluated by evaluate().
+    """
+    keyframe_points = blender_fcurve.keyframe_points
+    
+    point_count = len(keyframe_points)
+    
+    if numpy is None or point_count == 0 or len(blender_fcurve.modifiers) > 0 or blender_fcurve.extrapolation != 'CONSTANT':
+        return [blender_fcurve.evaluate(key) for key in keys]
+    
+    #
+    
+    co = numpy.empty(point_count * 2, dtype=numpy.float32)
+    handle_left = numpy.empty(point_count * 2, dtype=numpy.float32)
+    handle_right = numpy.empty(point_count * 2, dtype=numpy.float32)
+    
+    keyframe_points.foreach_get('co', co)
+    keyframe_points.foreach_get('handle_left', handle_left)
+    keyframe_points.foreach_get('handle_right', handle_right)
+    
+    co = co.reshape(-1, 2)
+    handle_left = handle_left.reshape(-1, 2)
+    handle_right = handle_right.reshape(-1, 2)
+    
+    # Keyframes on the same frame are left to Blender.
+    if numpy.any(co[1:, 0] <= co[:-1, 0]):
+        return [blender_fcurve.evaluate(key) for key in keys]
+    
+    interpolations = numpy.empty(point_count, dtype=numpy.int32)
+    
+    try:
+        keyframe_points.foreach_get('interpolation', interpolations)
+    except (TypeError, RuntimeError):
+        # Older versions of Blender do not read enums in bulk.
+        interpolations[:] = [GLTF_FCURVE_INTERPOLATIONS.get(blender_keyframe.interpolation, -1) for blender_keyframe in keyframe_points]
+    
+    # Blender evaluates in single precision.
+    frames = numpy.asarray(keys, dtype=numpy.float32)
+    
+    values = numpy.empty(len(frames), dtype=numpy.float32)
+    
+    #
+    # Constant extrapolation before the first and after the last keyframe.
+    #
+    
+    before = frames <= co[0, 0]
+    after = numpy.logical_and(frames >= co[-1, 0], numpy.logical_not(before))
+    
+    values[before] = co[0, 1]
+    values[after] = co[-1, 1]
+    
+    inside = numpy.logical_not(numpy.logical_or(before, after))
+    
+    #
+    # The segment starts with the last keyframe at or before the key. Keys close to a keyframe, but not on it,
+    # are snapped to the keyframe by Blender.
+    #
+    
+    segment = numpy.clip(numpy.searchsorted(co[:, 0], frames, side='right') - 1, 0, max(point_count - 2, 0))
+    next_segment = numpy.minimum(segment + 1, point_count - 1)
+    
+    start = co[segment, 0]
+    end = co[next_segment, 0]
+    
+    snapped = numpy.logical_and(frames != start, numpy.minimum(frames - start, end - frames) <= GLTF_FCURVE_KEYFRAME_THRESHOLD)
+    
+    evaluated = numpy.logical_and(inside, numpy.logical_not(snapped))
+    
+    segment_interpolations = interpolations[segment]
+    
+    #
+    # Constant segments keep the value of the keyframe, which starts the segment.
+    #
+    
+    constant = numpy.logical_and(evaluated, segment_interpolations == GLTF_FCURVE_INTERPOLATIONS['CONSTANT'])
+    
+    values[constant] = co[segment[constant], 1]
+    
+    #
+    # Linear segments.
+    #
+    
+    linear = numpy.logical_and(evaluated, segment_interpolations == GLTF_FCURVE_INTERPOLATIONS['LINEAR'])
+    
+    # Same order of operations as the linear easing of Blender: change * time / duration + begin
+    begin = co[segment[linear], 1]
+    change = co[next_segment[linear], 1] - begin
+    
+    values[linear] = change * (frames[linear] - start[linear]) / (end[linear] - start[linear]) + begin
+    
+    #
+    # Bezier segments between the keyframe and its right handle and the left handle and the next keyframe.
+    #
+    
+    bezier = numpy.logical_and(evaluated, segment_interpolations == GLTF_FCURVE_INTERPOLATIONS['BEZIER'])
+    
+    bezier_indices = numpy.flatnonzero(bezier)
+    
+    v1 = co[segment[bezier_indices]].copy()
+    v2 = handle_right[segment[bezier_indices]].copy()
+    v3 = handle_left[next_segment[bezier_indices]].copy()
+    v4 = co[next_segment[bezier_indices]].copy()
+    
+    epsilon = numpy.finfo(numpy.float32).eps
+    
+    flat = numpy.logical_and(numpy.abs(v1[:, 1] - v4[:, 1]) < epsilon, numpy.logical_and(numpy.abs(v2[:, 1] - v3[:, 1]) < epsilon, numpy.abs(v3[:, 1] - v4[:, 1]) < epsilon))
+    
+    # Handles are shortened, so they do not overlap.
+    h1 = v1 - v2
+    h2 = v4 - v3
+    
+    length = v4[:, 0] - v1[:, 0]
+    length1 = numpy.abs(h1[:, 0])
+    length2 = numpy.abs(h2[:, 0])
+    
+    overlap = numpy.logical_and(length1 + length2 != 0.0, length1 + length2 > length)
+    
+    with numpy.errstate(all='ignore'):
+        factor = (length / (length1 + length2))[:, None]
+    
+    v2 = numpy.where(overlap[:, None], v1 - factor * h1, v2)
+    v3 = numpy.where(overlap[:, None], v4 - factor * h2, v3)
+    
+    roots, found = animate_bezier_roots(frames[bezier_indices], v1[:, 0], v2[:, 0], v3[:, 0], v4[:, 0])
+    
+    c0 = v1[:, 1]
+    c1 = 3.0 * (v2[:, 1] - v1[:, 1])
+    c2 = 3.0 * (v1[:, 1] - 2.0 * v2[:, 1] + v3[:, 1])
+    c3 = v4[:, 1] - v1[:, 1] + 3.0 * (v2[:, 1] - v3[:, 1])
+    
+    values[bezier_indices] = numpy.where(flat, v1[:, 1], c0 + roots * c1 + roots * roots * c2 + roots * roots * roots * c3)
+    
+    # Blender reports an error, if the curve could not be solved.
+    bezier[bezier_indices[numpy.logical_and(numpy.logical_not(flat), numpy.logical_not(found))]] = False
+    
+    #
+    # Snapped keys, keys in other segments and unsolved Bezier segments.
+    #
+    
+    remaining = numpy.logical_and(inside, numpy.logical_not(numpy.logical_or(numpy.logical_or(constant, linear), bezier)))
+    
+    for index in numpy.flatnonzero(remaining):
+        values[index] = blender_fcurve.evaluate(keys[index])
+    
+    return values.tolist()
+
+
+def animate_evaluate_channels(fcurve_list, keys, default_values):
+    """
+    Evaluates all fcurves of a transformation at all keys. Channels without fcurve keep their default value.
+    Returns one list of values per channel.
+    """
+    channels = []
+    
+    channel_index = 0
+    for blender_fcurve in fcurve_list:
+        if blender_fcurve is not None:
+            channels.append(animate_evaluate_fcurve(blender_fcurve, keys))
+        else:
+            channels.append([default_values[channel_index]] * len(keys))
+        
+        channel_index += 1
+    
+    return channels
+
+
+def animate_convert_location_keys(channels):
+    """
+    Converts evaluated location channels to glTF coordinate system. Returns one location per key.
+    """
+    if numpy is not None:
+        locations = numpy.array(channels, dtype=numpy.float32).reshape(3, -1)
+        
+        return numpy.column_stack((locations[0], locations[2], -locations[1])).tolist()
+    
+    return [convert_swizzle_location(location) for location in zip(*channels)]
+
+
+def animate_convert_rotation_keys(rotations):
+    """
+    Converts a NumPy array of quaternion rotations with 'w' at first position to glTF coordinate system.
+    Returns one rotation per key in glTF Quaternion notation.
+    """
+    return numpy.column_stack((rotations[:, 1], rotations[:, 3], -rotations[:, 2], rotations[:, 0])).astype(numpy.float32).tolist()
+
+
+def animate_convert_rotation_quaternion_keys(channels):
+    """
+    Converts evaluated quaternion channels to glTF coordinate system. Returns one rotation per key in glTF Quaternion notation.
+    """
+    if numpy is not None:
+        return animate_convert_rotation_keys(numpy.array(channels, dtype=numpy.float32).reshape(4, -1).T)
+    
+    rotations = []
+    
+    for rotation in zip(*channels):
+        rotation = convert_swizzle_rotation(rotation)
+        
+        rotations.append([rotation[1], rotation[2], rotation[3], rotation[0]])
+    
+    return rotations
+
+
+def animate_convert_rotation_euler_keys(channels, rotation_mode):
+    """
+    Converts evaluated euler channels to glTF coordinate system. Returns one rotation per key in glTF Quaternion notation.
+    With NumPy, the quaternions of the single axes are multiplied in the order of the rotation mode.
+    """
+    if numpy is None:
+        rotations = []
+        
+        for euler in zip(*channels):
+            rotation = animate_convert_rotation_euler(euler, rotation_mode)
+            
+            # Bring back to internal Quaternion notation. 
+            rotation = convert_swizzle_rotation([rotation[3], rotation[0], rotation[1], rotation[2]])
+            
+            rotations.append([rotation[1], rotation[2], rotation[3], rotation[0]])
+        
+        return rotations
+    
+    angles = numpy.array(channels, dtype=numpy.float32).reshape(3, -1).astype(numpy.float64) * 0.5
+    
+    rotations = None
+    
+    for axis in rotation_mode:
+        axis_index = 'XYZ'.index(axis)
+        
+        axis_rotations = numpy.zeros((angles.shape[1], 4))
+        axis_rotations[:, 0] = numpy.cos(angles[axis_index])
+        axis_rotations[:, axis_index + 1] = numpy.sin(angles[axis_index])
+        
+        if rotations is None:
+            rotations = axis_rotations
+        else:
+            rotations = animate_multiply_quaternions(axis_rotations, rotations)
+    
+    return animate_convert_rotation_keys(rotations)
+
+
+def animate_convert_rotation_axis_angle_keys(channels):
+    """
+    Converts evaluated axis angle channels to glTF coordinate system. Returns one rotation per key in glTF Quaternion notation.
+    """
+    if numpy is None:
+        rotations = []
+        
+        for axis_angle in zip(*channels):
+            rotation = animate_convert_rotation_axis_angle(axis_angle)
+            
+            # Bring back to internal Quaternion notation. 
+            rotation = convert_swizzle_rotation([rotation[3], rotation[0], rotation[1], rotation[2]])
+            
+            rotations.append([rotation[1], rotation[2], rotation[3], rotation[0]])
+        
+        return rotations
+    
+    axis_angles = numpy.array(channels, dtype=numpy.float32).reshape(4, -1).astype(numpy.float64)
+    
+    axes = axis_angles[1:4].T
+    
+    lengths = numpy.sqrt((axes * axes).sum(axis=1))
+    
+    # A zero axis gives the identity, as done by mathutils.
+    valid = lengths > 0.0
+    
+    rotations = numpy.zeros((axes.shape[0], 4))
+    rotations[:, 0] = 1.0
+    
+    half_angles = axis_angles[0, valid] * 0.5
+    
+    rotations[valid, 0] = numpy.cos(half_angles)
+    rotations[valid, 1:4] = axes[valid] / lengths[valid, None] * numpy.sin(half_angles)[:, None]
+    
+    return animate_convert_rotation_keys(rotations)
+
+
+def animate_multiply_quaternions(a, b):
+    """
+    Multiplies two NumPy arrays of quaternions with 'w' at first position row by row.
+    """
+    result = numpy.empty_like(a)
+    
+    result[:, 0] = a[:, 0] * b[:, 0] - a[:, 1] * b[:, 1] - a[:, 2] * b[:, 2] - a[:, 3] * b[:, 3]
+    result[:, 1] = a[:, 0] * b[:, 1] + a[:, 1] * b[:, 0] + a[:, 2] * b[:, 3] - a[:, 3] * b[:, 2]
+    result[:, 2] = a[:, 0] * b[:, 2] - a[:, 1] * b[:, 3] + a[:, 2] * b[:, 0] + a[:, 3] * b[:, 1]
+    result[:, 3] = a[:, 0] * b[:, 3] + a[:, 1] * b[:, 2] - a[:, 2] * b[:, 1] + a[:, 3] * b[:, 0]
+    
+    return result
+
+
+def animate_convert_scale_keys(channels):
+    """
+    Converts evaluated scale channels to glTF coordinate system. Returns one scale per key.
+    """
+    if numpy is not None:
+        scales = numpy.array(channels, dtype=numpy.float32).reshape(3, -1)
+        
+        return numpy.column_stack((scales[0], scales[2], scales[1])).tolist()
+    
+    return [convert_swizzle_scale(scale) for scale in zip(*channels)]
+
+
+def animate_location(export_settings, location, interpolation, node_type, object_name, node_name, matrix_correction, matrix_basis):
+    """
+    Calculates/gathers the key value pairs for location transformations.
+    """
     keys = animate_gather_keys(export_settings, location, interpolation)
     
     times = animate_convert_keys(keys)
@@ -202,6 +1037,9 @@ def animate_location(export_settings, location, interpolation, node_type, node_n
     result_in_tangent = {}
     result_out_tangent = {}
     
+    if node_type != 'JOINT' and interpolation != 'CUBICSPLINE':
+        translations = animate_convert_location_keys(animate_evaluate_channels(location, keys, [0.0, 0.0, 0.0]))
+    
     keyframe_index = 0
     for time in times:
         translation = [0.0, 0.0, 0.0]
@@ -209,33 +1047,20 @@ def animate_location(export_settings, location, interpolation, node_type, node_n
         out_tangent = [0.0, 0.0, 0.0]
         
         if node_type == 'JOINT':
-            if export_settings['gltf_joint_cache'][node_name].get(keys[keyframe_index]):
-                translation, tmp_rotation, tmp_scale = export_settings['gltf_joint_cache'][node_name][keys[keyframe_index]] 
-            else:
-                bpy.context.scene.frame_set(keys[keyframe_index])
-                
-                matrix = matrix_correction * matrix_basis 
-    
-                translation, tmp_rotation, tmp_scale = matrix.decompose()
-                
-                export_settings['gltf_joint_cache'][node_name][keys[keyframe_index]] = [translation, tmp_rotation, tmp_scale]
+            translation, tmp_rotation, tmp_scale = animate_get_joint_transform(export_settings, object_name, node_name, keys[keyframe_index], matrix_correction, matrix_basis)
+        elif interpolation != 'CUBICSPLINE':
+            translation = translations[keyframe_index]
         else:
             channel_index = 0
             for blender_fcurve in location:
                 
                 if blender_fcurve is not None:
-                    
-                    if interpolation == 'CUBICSPLINE':
-                        blender_key_frame = blender_fcurve.keyframe_points[keyframe_index]
+                    blender_key_frame = blender_fcurve.keyframe_points[keyframe_index]
 
-                        translation[channel_index] = blender_key_frame.co[1]
-                        
-                        in_tangent[channel_index] = 3.0 * (blender_key_frame.co[1] - blender_key_frame.handle_left[1]) / (blender_key_frame.co[0] - blender_key_frame.handle_left[0]) 
-                        out_tangent[channel_index] = 3.0 * (blender_key_frame.handle_right[1] - blender_key_frame.co[1]) / (blender_key_frame.handle_right[0] - blender_key_frame.co[0]) 
-                    else: 
-                        value = blender_fcurve.evaluate(keys[keyframe_index]) 
+                    translation[channel_index] = blender_key_frame.co[1]
                     
-                        translation[channel_index] = value
+                    in_tangent[channel_index] = 3.0 * (blender_key_frame.co[1] - blender_key_frame.handle_left[1]) / (blender_key_frame.co[0] - blender_key_frame.handle_left[0]) 
+                    out_tangent[channel_index] = 3.0 * (blender_key_frame.handle_right[1] - blender_key_frame.co[1]) / (blender_key_frame.handle_right[0] - blender_key_frame.co[0]) 
                 
                 channel_index += 1 
         
@@ -252,53 +1077,28 @@ def animate_location(export_settings, location, interpolation, node_type, node_n
     return result, result_in_tangent, result_out_tangent
 
 
-def animate_rotation_axis_angle(export_settings, rotation_axis_angle, interpolation, node_type, node_name, matrix_correction, matrix_basis):
+def animate_rotation_axis_angle(export_settings, rotation_axis_angle, interpolation, node_type, object_name, node_name, matrix_correction, matrix_basis):
     """
     Calculates/gathers the key value pairs for axis angle transformations.
     """
-    if not export_settings['gltf_joint_cache'].get(node_name):
-        export_settings['gltf_joint_cache'][node_name] = {}
-    
     keys = animate_gather_keys(export_settings, rotation_axis_angle, interpolation)
     
     times = animate_convert_keys(keys)
     
     result = {}
     
+    if node_type != 'JOINT':
+        rotations = animate_convert_rotation_axis_angle_keys(animate_evaluate_channels(rotation_axis_angle, keys, [1.0, 0.0, 0.0, 0.0]))
+    
     keyframe_index = 0
     for time in times:
-        axis_angle_rotation = [1.0, 0.0, 0.0, 0.0]
-        
-        rotation = [1.0, 0.0, 0.0, 0.0]
-        
         if node_type == 'JOINT':
-            if export_settings['gltf_joint_cache'][node_name].get(keys[keyframe_index]):
-                tmp_location, rotation, tmp_scale = export_settings['gltf_joint_cache'][node_name][keys[keyframe_index]] 
-            else:
-                bpy.context.scene.frame_set(keys[keyframe_index])
-                
-                matrix = matrix_correction * matrix_basis 
-    
-                tmp_location, rotation, tmp_scale = matrix.decompose()
-                
-                export_settings['gltf_joint_cache'][node_name][keys[keyframe_index]] = [tmp_location, rotation, tmp_scale]
-        else:
-            channel_index = 0
-            for blender_fcurve in rotation_axis_angle:
-                if blender_fcurve is not None:
-                    value = blender_fcurve.evaluate(keys[keyframe_index]) 
-                    
-                    axis_angle_rotation[channel_index] = value
-                
-                channel_index += 1 
-
-            rotation = animate_convert_rotation_axis_angle(axis_angle_rotation)
-        
-            # Bring back to internal Quaternion notation. 
-            rotation = convert_swizzle_rotation([rotation[3], rotation[0], rotation[1], rotation[2]])
+            tmp_location, rotation, tmp_scale = animate_get_joint_transform(export_settings, object_name, node_name, keys[keyframe_index], matrix_correction, matrix_basis)
             
-        # Bring back to glTF Quaternion notation.
-        rotation = [rotation[1], rotation[2], rotation[3], rotation[0]]
+            # Bring to glTF Quaternion notation.
+            rotation = [rotation[1], rotation[2], rotation[3], rotation[0]]
+        else:
+            rotation = rotations[keyframe_index]
         
         result[time] = rotation
         
@@ -307,53 +1107,28 @@ def animate_rotation_axis_angle(export_settings, rotation_axis_angle, interpolat
     return result
 
 
-def animate_rotation_euler(export_settings, rotation_euler, rotation_mode, interpolation, node_type, node_name, matrix_correction, matrix_basis):
+def animate_rotation_euler(export_settings, rotation_euler, rotation_mode, interpolation, node_type, object_name, node_name, matrix_correction, matrix_basis):
     """
     Calculates/gathers the key value pairs for euler angle transformations.
     """
-    if not export_settings['gltf_joint_cache'].get(node_name):
-        export_settings['gltf_joint_cache'][node_name] = {}
-    
     keys = animate_gather_keys(export_settings, rotation_euler, interpolation)
 
     times = animate_convert_keys(keys)
 
     result = {}
     
+    if node_type != 'JOINT':
+        rotations = animate_convert_rotation_euler_keys(animate_evaluate_channels(rotation_euler, keys, [0.0, 0.0, 0.0]), rotation_mode)
+    
     keyframe_index = 0
     for time in times:
-        euler_rotation = [0.0, 0.0, 0.0]
-        
-        rotation = [1.0, 0.0, 0.0, 0.0]
-        
         if node_type == 'JOINT':
-            if export_settings['gltf_joint_cache'][node_name].get(keys[keyframe_index]):
-                tmp_location, rotation, tmp_scale = export_settings['gltf_joint_cache'][node_name][keys[keyframe_index]] 
-            else:
-                bpy.context.scene.frame_set(keys[keyframe_index])
-                
-                matrix = matrix_correction * matrix_basis 
-    
-                tmp_location, rotation, tmp_scale = matrix.decompose()
-                
-                export_settings['gltf_joint_cache'][node_name][keys[keyframe_index]] = [tmp_location, rotation, tmp_scale]
-        else:
-            channel_index = 0
-            for blender_fcurve in rotation_euler:
-                if blender_fcurve is not None:
-                    value = blender_fcurve.evaluate(keys[keyframe_index]) 
-                    
-                    euler_rotation[channel_index] = value
-                
-                channel_index += 1
-    
-            rotation = animate_convert_rotation_euler(euler_rotation, rotation_mode)
-        
-            # Bring back to internal Quaternion notation. 
-            rotation = convert_swizzle_rotation([rotation[3], rotation[0], rotation[1], rotation[2]])
+            tmp_location, rotation, tmp_scale = animate_get_joint_transform(export_settings, object_name, node_name, keys[keyframe_index], matrix_correction, matrix_basis)
             
-        # Bring back to glTF Quaternion notation.
-        rotation = [rotation[1], rotation[2], rotation[3], rotation[0]]
+            # Bring to glTF Quaternion notation.
+            rotation = [rotation[1], rotation[2], rotation[3], rotation[0]]
+        else:
+            rotation = rotations[keyframe_index]
         
         result[time] = rotation
         
@@ -362,13 +1137,10 @@ def animate_rotation_euler(export_settings, rotation_euler, rotation_mode, inter
     return result
 
 
-def animate_rotation_quaternion(export_settings, rotation_quaternion, interpolation, node_type, node_name, matrix_correction, matrix_basis):
+def animate_rotation_quaternion(export_settings, rotation_quaternion, interpolation, node_type, object_name, node_name, matrix_correction, matrix_basis):
     """
     Calculates/gathers the key value pairs for quaternion transformations.
     """
-    if not export_settings['gltf_joint_cache'].get(node_name):
-        export_settings['gltf_joint_cache'][node_name] = {}
-    
     keys = animate_gather_keys(export_settings, rotation_quaternion, interpolation)
 
     times = animate_convert_keys(keys)
@@ -376,6 +1148,9 @@ def animate_rotation_quaternion(export_settings, rotation_quaternion, interpolat
     result = {}
     result_in_tangent = {}
     result_out_tangent = {}
+    
+    if node_type != 'JOINT' and interpolation != 'CUBICSPLINE':
+        rotations = animate_convert_rotation_quaternion_keys(animate_evaluate_channels(rotation_quaternion, keys, [1.0, 0.0, 0.0, 0.0]))
 
     keyframe_index = 0
     for time in times:
@@ -384,32 +1159,26 @@ def animate_rotation_quaternion(export_settings, rotation_quaternion, interpolat
         out_tangent = [1.0, 0.0, 0.0, 0.0]
         
         if node_type == 'JOINT':
-            if export_settings['gltf_joint_cache'][node_name].get(keys[keyframe_index]):
-                tmp_location, rotation, tmp_scale = export_settings['gltf_joint_cache'][node_name][keys[keyframe_index]] 
-            else:
-                bpy.context.scene.frame_set(keys[keyframe_index])
-                
-                matrix = matrix_correction * matrix_basis 
-    
-                tmp_location, rotation, tmp_scale = matrix.decompose()
-                
-                export_settings['gltf_joint_cache'][node_name][keys[keyframe_index]] = [tmp_location, rotation, tmp_scale]
+            tmp_location, rotation, tmp_scale = animate_get_joint_transform(export_settings, object_name, node_name, keys[keyframe_index], matrix_correction, matrix_basis)
+        elif interpolation != 'CUBICSPLINE':
+            # Already in glTF Quaternion notation.
+            result[time] = rotations[keyframe_index]
+            result_in_tangent[time] = [0.0, 0.0, 0.0, 1.0]
+            result_out_tangent[time] = [0.0, 0.0, 0.0, 1.0]
+            
+            keyframe_index += 1
+            continue
         else:
             channel_index = 0
             for blender_fcurve in rotation_quaternion:
                 
                 if blender_fcurve is not None:
-                    if interpolation == 'CUBICSPLINE':
-                        blender_key_frame = blender_fcurve.keyframe_points[keyframe_index]
+                    blender_key_frame = blender_fcurve.keyframe_points[keyframe_index]
 
-                        rotation[channel_index] = blender_key_frame.co[1]
-                        
-                        in_tangent[channel_index] = 3.0 * (blender_key_frame.co[1] - blender_key_frame.handle_left[1]) / (blender_key_frame.co[0] - blender_key_frame.handle_left[0]) 
-                        out_tangent[channel_index] = 3.0 * (blender_key_frame.handle_right[1] - blender_key_frame.co[1]) / (blender_key_frame.handle_right[0] - blender_key_frame.co[0]) 
-                    else: 
-                        value = blender_fcurve.evaluate(keys[keyframe_index]) 
-                        
-                        rotation[channel_index] = value
+                    rotation[channel_index] = blender_key_frame.co[1]
+                    
+                    in_tangent[channel_index] = 3.0 * (blender_key_frame.co[1] - blender_key_frame.handle_left[1]) / (blender_key_frame.co[0] - blender_key_frame.handle_left[0]) 
+                    out_tangent[channel_index] = 3.0 * (blender_key_frame.handle_right[1] - blender_key_frame.co[1]) / (blender_key_frame.handle_right[0] - blender_key_frame.co[0]) 
                 
                 channel_index += 1 
         
@@ -431,13 +1200,10 @@ def animate_rotation_quaternion(export_settings, rotation_quaternion, interpolat
     return result, result_in_tangent, result_out_tangent
 
 
-def animate_scale(export_settings, scale, interpolation, node_type, node_name, matrix_correction, matrix_basis):
+def animate_scale(export_settings, scale, interpolation, node_type, object_name, node_name, matrix_correction, matrix_basis):
     """
     Calculates/gathers the key value pairs for scale transformations.
     """
-    if not export_settings['gltf_joint_cache'].get(node_name):
-        export_settings['gltf_joint_cache'][node_name] = {}
-    
     keys = animate_gather_keys(export_settings, scale, interpolation)
 
     times = animate_convert_keys(keys)
@@ -445,6 +1211,9 @@ def animate_scale(export_settings, scale, interpolation, node_type, node_name, m
     result = {}
     result_in_tangent = {}
     result_out_tangent = {}
+    
+    if node_type != 'JOINT' and interpolation != 'CUBICSPLINE':
+        scales = animate_convert_scale_keys(animate_evaluate_channels(scale, keys, [1.0, 1.0, 1.0]))
 
     keyframe_index = 0
     for time in times:
@@ -453,32 +1222,20 @@ def animate_scale(export_settings, scale, interpolation, node_type, node_name, m
         out_tangent = [0.0, 0.0, 0.0]
         
         if node_type == 'JOINT':
-            if export_settings['gltf_joint_cache'][node_name].get(keys[keyframe_index]):
-                tmp_location, tmp_rotation, scale_data = export_settings['gltf_joint_cache'][node_name][keys[keyframe_index]] 
-            else:
-                bpy.context.scene.frame_set(keys[keyframe_index])
-                
-                matrix = matrix_correction * matrix_basis 
-    
-                tmp_location, tmp_rotation, scale_data = matrix.decompose()
-                
-                export_settings['gltf_joint_cache'][node_name][keys[keyframe_index]] = [tmp_location, tmp_rotation, scale_data]
+            tmp_location, tmp_rotation, scale_data = animate_get_joint_transform(export_settings, object_name, node_name, keys[keyframe_index], matrix_correction, matrix_basis)
+        elif interpolation != 'CUBICSPLINE':
+            scale_data = scales[keyframe_index]
         else:
             channel_index = 0
             for blender_fcurve in scale:
                 
                 if blender_fcurve is not None:
-                    if interpolation == 'CUBICSPLINE':
-                        blender_key_frame = blender_fcurve.keyframe_points[keyframe_index]
+                    blender_key_frame = blender_fcurve.keyframe_points[keyframe_index]
 
-                        scale_data[channel_index] = blender_key_frame.co[1]
-                        
-                        in_tangent[channel_index] = 3.0 * (blender_key_frame.co[1] - blender_key_frame.handle_left[1]) / (blender_key_frame.co[0] - blender_key_frame.handle_left[0]) 
-                        out_tangent[channel_index] = 3.0 * (blender_key_frame.handle_right[1] - blender_key_frame.co[1]) / (blender_key_frame.handle_right[0] - blender_key_frame.co[0]) 
-                    else: 
-                        value = blender_fcurve.evaluate(keys[keyframe_index]) 
-                        
-                        scale_data[channel_index] = value
+                    scale_data[channel_index] = blender_key_frame.co[1]
+                    
+                    in_tangent[channel_index] = 3.0 * (blender_key_frame.co[1] - blender_key_frame.handle_left[1]) / (blender_key_frame.co[0] - blender_key_frame.handle_left[0]) 
+                    out_tangent[channel_index] = 3.0 * (blender_key_frame.handle_right[1] - blender_key_frame.co[1]) / (blender_key_frame.handle_right[0] - blender_key_frame.co[0]) 
                 
                 channel_index += 1 
         
@@ -495,7 +1252,7 @@ def animate_scale(export_settings, scale, interpolation, node_type, node_name, m
     return result, result_in_tangent, result_out_tangent
 
 
-def animate_value(export_settings, value_parameter, interpolation, node_type, node_name, matrix_correction, matrix_basis):
+def animate_value(export_settings, value_parameter, interpolation, node_type, object_name, node_name, matrix_correction, matrix_basis):
     """
     Calculates/gathers the key value pairs for scalar anaimations.
     """
@@ -506,6 +1263,9 @@ def animate_value(export_settings, value_parameter, interpolation, node_type, no
     result = {}
     result_in_tangent = {}
     result_out_tangent = {}
+    
+    if interpolation != 'CUBICSPLINE':
+        channels = [animate_evaluate_fcurve(blender_fcurve, keys) for blender_fcurve in value_parameter if blender_fcurve is not None]
 
     keyframe_index = 0
     for time in times:
@@ -513,20 +1273,18 @@ def animate_value(export_settings, value_parameter, interpolation, node_type, no
         in_tangent = []
         out_tangent = []
         
-        for blender_fcurve in value_parameter:
-            
-            if blender_fcurve is not None:
-                if interpolation == 'CUBICSPLINE':
+        if interpolation != 'CUBICSPLINE':
+            value_data = [channel[keyframe_index] for channel in channels]
+        else:
+            for blender_fcurve in value_parameter:
+                
+                if blender_fcurve is not None:
                     blender_key_frame = blender_fcurve.keyframe_points[keyframe_index]
 
                     value_data.append(blender_key_frame.co[1])
                     
                     in_tangent.append(3.0 * (blender_key_frame.co[1] - blender_key_frame.handle_left[1]) / (blender_key_frame.co[0] - blender_key_frame.handle_left[0])) 
                     out_tangent.append(3.0 * (blender_key_frame.handle_right[1] - blender_key_frame.co[1]) / (blender_key_frame.handle_right[0] - blender_key_frame.co[0])) 
-                else: 
-                    value = blender_fcurve.evaluate(keys[keyframe_index]) 
-                    
-                    value_data.append(value)
         
         result[time] = value_data
         result_in_tangent[time] = in_tangent
@@ -0,0 +1,167 @@
+# Copyright (c) 2017 The Khronos Group Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import shutil
+import tempfile
+
+from .gltf2_debug import *
+
+#
+# Globals
+#
+
+GLTF_STREAM_COPY_SIZE = 16 * 1024 * 1024
+
+#
+# Classes
+#
+
+class BufferBuilder:
+    """
+    Assembles the binary glTF buffer out of segments, which are referenced and not copied.
+    The offset of a segment is known as soon as it is appended.
+    If streaming, segments are written at once to a temporary file in the given directory and not kept in memory.
+    """
+
+    def __init__(self, stream=False, directory=None):
+        self.segments = []
+        self.length = 0
+
+        self.stream_file = None
+
+        if stream:
+            self.stream_file = tempfile.TemporaryFile(dir=directory)
+
+
+    def __len__(self):
+        return self.length
+
+
+    def align(self, alignment):
+        """
+        Pads the buffer with zeros, so the next segment starts at a multiple of the given alignment.
+        """
+
+        if alignment <= 0:
+            return
+
+        remainder = self.length % alignment
+
+        if remainder > 0:
+            self.append_segment(bytes(alignment - remainder))
+
+
+    def append_segment(self, data):
+        """
+        Appends the given bytes like object without padding and returns its offset.
+        """
+
+        offset = self.length
+
+        segment = memoryview(data).cast('B')
+
+        if segment.nbytes > 0:
+            if self.stream_file is not None:
+                self.stream_file.write(segment)
+            else:
+                self.segments.append(segment)
+
+            self.length += segment.nbytes
+
+        return offset
+
+
+    def append(self, data, alignment):
+        """
+        Appends the given bytes like object at the given alignment and returns its offset.
+        """
+
+        self.align(alignment)
+
+        return self.append_segment(data)
+
+
+    def write_to(self, file):
+        """
+        Writes all segments in order to the given binary file.
+        """
+
+        if self.stream_file is not None:
+            self.stream_file.seek(0)
+
+            shutil.copyfileobj(self.stream_file, file, GLTF_STREAM_COPY_SIZE)
+
+            self.stream_file.seek(0, 2)
+
+            return
+
+        file.writelines(self.segments)
+
+
+    def iter_chunks(self, size):
+        """
+        Yields the whole buffer in order as bytes like objects of at most the given size.
+        """
+
+        if self.stream_file is not None:
+            self.stream_file.seek(0)
+
+            while True:
+                chunk = self.stream_file.read(size)
+
+                if len(chunk) == 0:
+                    break
+
+                yield chunk
+
+            self.stream_file.seek(0, 2)
+
+            return
+
+        for segment in self.segments:
+            for offset in range(0, segment.nbytes, size):
+                yield segment[offset:offset + size]
+
+
+    def to_bytes(self):
+        """
+        Returns the whole buffer as one bytes object.
+        """
+
+        if self.stream_file is not None:
+            self.stream_file.seek(0)
+
+            data = self.stream_file.read()
+
+            self.stream_file.seek(0, 2)
+
+            return data
+
+        return b''.join(self.segments)
+
+
+    def close(self):
+        """
+        Releases all segments and removes the temporary file.
+        """
+
+        if self.stream_file is not None:
+            self.stream_file.close()
+            self.stream_file = None
+
+        self.segments = []
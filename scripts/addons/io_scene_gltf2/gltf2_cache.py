@@ -0,0 +1,154 @@
+# Copyright (c) 2017 The Khronos Group Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import hashlib
+import os
+import tempfile
+
+from .gltf2_debug import *
+
+#
+# Globals
+#
+
+GLTF_CACHE_EXTENSION = '.png'
+
+#
+# Classes
+#
+
+class ImageCache:
+    """
+    Content addressed cache of encoded images in a directory, which is kept across exports.
+    Entries are keyed by the image name, the pixel digest, the size and the encoder settings.
+    The least recently used entries are removed, if the cache exceeds its maximum size.
+    """
+
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+
+        os.makedirs(self.directory, exist_ok=True)
+
+
+    def key(self, name, width, height, pixels, level, png_filter):
+        """
+        Returns the key of an encoded image.
+        """
+
+        digest = hashlib.sha1()
+
+        digest.update(memoryview(pixels).cast('B'))
+
+        key = hashlib.sha1()
+
+        key.update('\0'.join([name, str(width), str(height), str(level), png_filter, digest.hexdigest()]).encode('utf-8'))
+
+        return key.hexdigest()
+
+
+    def path(self, key):
+        """
+        Returns the file path of a cache entry.
+        """
+
+        return os.path.join(self.directory, key + GLTF_CACHE_EXTENSION)
+
+
+    def get(self, key):
+        """
+        Returns the cached data or None. A hit marks the entry as recently used.
+        """
+
+        path = self.path(key)
+
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except OSError:
+            return None
+
+        try:
+            os.utime(path)
+        except OSError as error:
+            print_console('DEBUG', 'Cannot mark image in cache as used: ' + str(error))
+
+        return data
+
+
+    def put(self, key, data):
+        """
+        Stores data in the cache. The file is replaced at once, so other exports never read partial entries.
+        """
+
+        temporary_path = None
+
+        try:
+            file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory)
+
+            with os.fdopen(file_descriptor, 'wb') as file:
+                file.write(data)
+
+            os.replace(temporary_path, self.path(key))
+        except OSError as error:
+            print_console('WARNING', 'Cannot store image in cache: ' + str(error))
+
+            if temporary_path is not None and os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+
+    def evict(self):
+        """
+        Removes the least recently used entries, until the cache is within its maximum size.
+        """
+
+        entries = []
+        size = 0
+
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(GLTF_CACHE_EXTENSION) or not entry.is_file():
+                continue
+
+            try:
+                entry_stat = entry.stat()
+            except OSError:
+                continue
+
+            entries.append((entry_stat.st_mtime, entry_stat.st_size, entry.path))
+            size += entry_stat.st_size
+
+        if size <= self.max_size:
+            return
+
+        entries.sort()
+
+        removed = 0
+
+        for mtime, entry_size, path in entries:
+            if size <= self.max_size:
+                break
+
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+
+            size -= entry_size
+            removed += 1
+
+        print_console('DEBUG', 'Removed images from cache: ' + str(removed))
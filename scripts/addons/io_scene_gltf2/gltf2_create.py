@@ -16,15 +16,45 @@
 # Imports
 #
 
+import array
+import collections
+import concurrent.futures
+import hashlib
+import os
 import struct
+import sys
 import zlib
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from .gltf2_debug import *
 
 #
 # Globals
 #
 
+# Little endian NumPy types and native array types of the accessor component types.
+GLTF_COMPONENT_NUMPY_TYPES = {'BYTE' : '<i1', 'UNSIGNED_BYTE' : '<u1', 'SHORT' : '<i2', 'UNSIGNED_SHORT' : '<u2', 'UNSIGNED_INT' : '<u4', 'FLOAT' : '<f4'}
+GLTF_COMPONENT_ARRAY_TYPES = {'BYTE' : 'b', 'UNSIGNED_BYTE' : 'B', 'SHORT' : 'h', 'UNSIGNED_SHORT' : 'H', 'UNSIGNED_INT' : 'I' if array.array('I').itemsize == 4 else 'L', 'FLOAT' : 'f'}
+
+# PNG filter types. Adaptive filtering selects one of them per row.
+GLTF_PNG_FILTERS = {'NONE' : 0, 'SUB' : 1, 'UP' : 2, 'AVERAGE' : 3, 'PAETH' : 4}
+
+# Compression level and filter of the PNG encoder presets.
+GLTF_PNG_PRESETS = {'FAST' : (1, 'NONE'), 'SHIP' : (9, 'ADAPTIVE')}
+
+# Maximum number of threads encoding images. Every pending image holds a snapshot of its float pixels.
+GLTF_PNG_MAX_WORKERS = 4
+
+# Number of rows filtered at once, to limit the memory of the intermediate arrays.
+GLTF_PNG_FILTER_ROWS = 256
+
+# Placeholder of a data URI in the JSON, which is replaced while saving. Formatted with a nonce and the index.
+GLTF_DATA_URI_PLACEHOLDER = 'glTF-data-uri-{}-{}'
+
 #
 # Functions
 #
@@ -123,6 +153,7 @@ def create_bufferView(operator,
                   data_buffer, target, alignment):
     """
     Creates and appends a bufferView with the given parameters.
+    A bufferView with identical content, target and alignment is reused.
     """
 
     if data_buffer is None:
@@ -144,6 +175,15 @@ def create_bufferView(operator,
     
     #
     
+    bufferView_key = (hashlib.sha1(data_buffer).digest(), len(data_buffer), target_number, alignment)
+    
+    bufferView_index = export_settings['gltf_bufferView_cache'].get(bufferView_key)
+    
+    if bufferView_index is not None:
+        return bufferView_index
+    
+    #
+    
     bufferView = {}
     
     if target_number != 0:
@@ -153,24 +193,7 @@ def create_bufferView(operator,
     
     binary = export_settings['gltf_binary']
     
-    #
-    
-    binary_length = len(binary)
-    
-    remainder = 0
-    
-    if alignment > 0:
-        remainder = binary_length % alignment
-    
-    if remainder > 0:
-        padding_byte = struct.pack('<1b', 0) 
-        for i in range(0, alignment - remainder):
-            binary.extend(padding_byte)
-    
-    #
-    
-    bufferView['byteOffset'] = len(binary)
-    binary.extend(data_buffer)
+    bufferView['byteOffset'] = binary.append(data_buffer, alignment)
     
     # Only have one buffer. 
     bufferView['buffer'] = 0
@@ -179,6 +202,8 @@ def create_bufferView(operator,
 
     bufferViews.append(bufferView)
 
+    export_settings['gltf_bufferView_cache'][bufferView_key] = len(bufferViews) - 1
+
     return len(bufferViews) - 1
     
 
@@ -189,13 +214,13 @@ def create_accessor(operator,
                   data, componentType, count, type, target):
     """
     Creates and appends an accessor with the given parameters.
+    An accessor with identical content, componentType, count and type is reused.
     """
     
     if data is None:
         print_console('ERROR', 'No data')
         return -1
     
-    gltf_convert_type = [ "b", "B", "h", "H", "I", "f" ]
     gltf_enumNames = [ "BYTE", "UNSIGNED_BYTE", "SHORT", "UNSIGNED_SHORT", "UNSIGNED_INT", "FLOAT" ]
     gltf_convert_type_size = [ 1, 1, 2, 2, 4, 4 ]
     
@@ -205,7 +230,6 @@ def create_accessor(operator,
     
     componentTypeInteger = [ 5120, 5121, 5122, 5123, 5125, 5126 ][gltf_enumNames.index(componentType)]
     
-    convert_type = gltf_convert_type[gltf_enumNames.index(componentType)]
     convert_type_size = gltf_convert_type_size[gltf_enumNames.index(componentType)]
     
     if count < 1:
@@ -238,28 +262,45 @@ def create_accessor(operator,
     
     #
     
-    minimum = []
-    maximum = []
+    length = count * type_count
     
-    for component in range(0, count):
+    if numpy is not None and not isinstance(data, (list, tuple)):
+        #
+        # Buffer protocol input e.g. array.array, memoryview or NumPy array.
+        # Bounds are reduced per column of the converted values, so the stored data never falls outside of them.
+        #
+        
+        values = numpy.asarray(data)[0:length].reshape(count, type_count).astype(GLTF_COMPONENT_NUMPY_TYPES[componentType])
+        
+        accessor['min'] = values.min(axis=0).tolist()
+        accessor['max'] = values.max(axis=0).tolist()
+        
+        data_buffer = values.tobytes()
+    else:
+        #
+        # Every component is a strided slice of the converted data.
+        #
+        
+        data_array = array.array(GLTF_COMPONENT_ARRAY_TYPES[componentType], data[0:length])
+        
+        minimum = []
+        maximum = []
+        
         for component_index in range(0, type_count):
-            element = data[component * type_count + component_index]
+            component_data = data_array[component_index:length:type_count]
             
-            if component == 0:
-                minimum.append(element)
-                maximum.append(element)
-            else:
-                minimum[component_index] = min(minimum[component_index], element)
-                maximum[component_index] = max(maximum[component_index], element)
-            
-    accessor['min'] = minimum
-    accessor['max'] = maximum
+            minimum.append(min(component_data))
+            maximum.append(max(component_data))
+                
+        accessor['min'] = minimum
+        accessor['max'] = maximum
         
-    #
-    
-    convert_type = '<' + str(count * type_count) + convert_type
+        if sys.byteorder != 'little':
+            data_array.byteswap()
+        
+        data_buffer = data_array.tobytes()
     
-    data_buffer = struct.pack(convert_type, *data) 
+    #
     
     bufferView = create_bufferView(operator, context, export_settings, glTF, data_buffer, target, convert_type_size)
 
@@ -270,31 +311,151 @@ def create_accessor(operator,
     accessor['bufferView'] = bufferView 
 
     #
+    
+    # Equal bufferViews do have equal content.
+    accessor_key = (bufferView, componentTypeInteger, count, type)
+    
+    accessor_index = export_settings['gltf_accessor_cache'].get(accessor_key)
+    
+    if accessor_index is not None:
+        return accessor_index
+
+    #
 
     accessors.append(accessor)
 
+    export_settings['gltf_accessor_cache'][accessor_key] = len(accessors) - 1
+
     return len(accessors) - 1
 
 
-def create_png_data(blender_image):
+def create_png_pixels(blender_image):
     """
-    Creates a PNG byte array from a given Blender image.
+    Takes a snapshot of the pixels of a Blender image.
+    Returns the width, the height and the RGBA pixels as float32 buffer.
     """
-    if blender_image is None:
-        return None
-    
     width = blender_image.size[0]
     height = blender_image.size[1]
     
-    buf = bytearray([int(channel * 255.0) for channel in blender_image.pixels])    
+    count = len(blender_image.pixels)
     
-    #
-    # Taken from 'blender-thumbnailer.py' in Blender.
-    #
+    if hasattr(blender_image.pixels, 'foreach_get'):
+        if numpy is not None:
+            pixels = numpy.empty(count, dtype=numpy.float32)
+        else:
+            pixels = array.array('f', bytes(4 * count))
+        
+        blender_image.pixels.foreach_get(pixels)
+    else:
+        # Slicing copies all pixels at once, if foreach_get is not available.
+        if numpy is not None:
+            pixels = numpy.array(blender_image.pixels[:], dtype=numpy.float32)
+        else:
+            pixels = array.array('f', blender_image.pixels[:])
+    
+    return width, height, pixels
+
+
+def create_png_filter(rows, png_filter):
+    """
+    Filters rows of RGBA bytes and returns them with the filter type byte at the start of each row.
+    Adaptive filtering selects the filter with the minimum sum of absolute differences per row.
+    """
+    
+    height, stride = rows.shape
+    
+    if png_filter == 'ADAPTIVE':
+        filter_types = sorted(GLTF_PNG_FILTERS.values())
+    else:
+        filter_types = [GLTF_PNG_FILTERS[png_filter]]
+    
+    result = numpy.empty((height, stride + 1), dtype=numpy.uint8)
+    
+    for start in range(0, height, GLTF_PNG_FILTER_ROWS):
+        end = min(start + GLTF_PNG_FILTER_ROWS, height)
+        
+        x = rows[start:end].astype(numpy.int16)
+        
+        # Left (a), up (b) and upper left (c) neighbours of each byte.
+        b = numpy.zeros_like(x)
+        if start > 0:
+            b[0] = rows[start - 1]
+        b[1:] = x[:-1]
+        
+        a = numpy.zeros_like(x)
+        a[:, 4:] = x[:, :-4]
+        
+        c = numpy.zeros_like(x)
+        c[:, 4:] = b[:, :-4]
+        
+        best_filtered = None
+        best_type = None
+        best_score = None
+        
+        for filter_type in filter_types:
+            if filter_type == 0:
+                filtered = x
+            elif filter_type == 1:
+                filtered = x - a
+            elif filter_type == 2:
+                filtered = x - b
+            elif filter_type == 3:
+                filtered = x - ((a + b) >> 1)
+            else:
+                p = a + b - c
+                pa = numpy.abs(p - a)
+                pb = numpy.abs(p - b)
+                pc = numpy.abs(p - c)
+                filtered = x - numpy.where((pa <= pb) & (pa <= pc), a, numpy.where(pb <= pc, b, c))
+            
+            filtered = (filtered & 0xFF).astype(numpy.uint8)
+            
+            if len(filter_types) == 1:
+                best_filtered = filtered
+                best_type = numpy.full(end - start, filter_type, dtype=numpy.uint8)
+                break
+            
+            score = numpy.abs(filtered.view(numpy.int8).astype(numpy.int32)).sum(axis=1)
+            
+            if best_filtered is None:
+                best_filtered = filtered
+                best_type = numpy.full(end - start, filter_type, dtype=numpy.uint8)
+                best_score = score
+            else:
+                better = score < best_score
+                best_filtered[better] = filtered[better]
+                best_type[better] = filter_type
+                best_score = numpy.minimum(score, best_score)
+        
+        result[start:end, 0] = best_type
+        result[start:end, 1:] = best_filtered
+    
+    return result
+
+
+def create_png_encode(width, height, pixels, level = 9, png_filter = 'NONE'):
+    """
+    Creates a PNG byte array from RGBA float pixels with the given compression level and filter.
+    Does not access any Blender data, so it can be executed in another thread.
+    Without NumPy, the rows are not filtered.
+    """
     
-    # reverse the vertical line order and add null bytes at the start
     width_byte_4 = width * 4
-    raw_data = b"".join(b'\x00' + buf[span:span + width_byte_4] for span in range((height - 1) * width * 4, -1, - width_byte_4))
+    
+    if numpy is not None:
+        buf = numpy.clip(numpy.asarray(pixels, dtype=numpy.float64) * 255.0, 0.0, 255.0).astype(numpy.uint8)
+        
+        # reverse the vertical line order and filter
+        raw_data = create_png_filter(buf.reshape(height, width_byte_4)[::-1], png_filter).tobytes()
+    else:
+        buf = bytearray([int(channel * 255.0) for channel in pixels])    
+        
+        #
+        # Taken from 'blender-thumbnailer.py' in Blender.
+        #
+        
+        # reverse the vertical line order and add null bytes at the start
+        raw_data = b"".join(b'\x00' + buf[span:span + width_byte_4] for span in range((height - 1) * width * 4, -1, - width_byte_4))
 
     def png_pack(png_tag, data):
         chunk_head = png_tag + data
@@ -303,10 +464,112 @@ def create_png_data(blender_image):
     return b"".join([
         b'\x89PNG\r\n\x1a\n',
         png_pack(b'IHDR', struct.pack("!2I5B", width, height, 8, 6, 0, 0, 0)),
-        png_pack(b'IDAT', zlib.compress(raw_data, 9)),
+        png_pack(b'IDAT', zlib.compress(raw_data, level)),
         png_pack(b'IEND', b'')])
 
 
+def create_png_data(blender_image, level = 9, png_filter = 'NONE'):
+    """
+    Creates a PNG byte array from a given Blender image.
+    """
+    if blender_image is None:
+        return None
+    
+    width, height, pixels = create_png_pixels(blender_image)
+    
+    return create_png_encode(width, height, pixels, level, png_filter)
+
+
+def create_png_data_sequence(blender_images, parallel, level = 9, png_filter = 'NONE', cache = None):
+    """
+    Yields the PNG byte arrays of the given Blender images in order.
+    If parallel, the pixels are taken on the main thread and encoded in a thread pool, as zlib and NumPy release the GIL.
+    Only one image per thread is pending at once, to limit the memory of the pixel snapshots.
+    Images found in the given cache are not encoded again and new encodings are stored in it.
+    """
+    
+    if numpy is None and png_filter != 'NONE':
+        print_console('WARNING', 'PNG filters require NumPy. Images are not filtered.')
+    
+    executor = None
+    max_workers = 0
+    
+    if parallel and len(blender_images) > 1:
+        max_workers = min(os.cpu_count() or 1, GLTF_PNG_MAX_WORKERS)
+        
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    
+    pending = collections.deque()
+    
+    try:
+        for blender_image in blender_images:
+            width, height, pixels = create_png_pixels(blender_image)
+            
+            cache_key = None
+            png_data = None
+            
+            if cache is not None:
+                cache_key = cache.key(blender_image.name, width, height, pixels, level, png_filter)
+                
+                png_data = cache.get(cache_key)
+                
+                if png_data is not None:
+                    cache_key = None
+            
+            if png_data is None:
+                if executor is None:
+                    png_data = create_png_encode(width, height, pixels, level, png_filter)
+                else:
+                    png_data = executor.submit(create_png_encode, width, height, pixels, level, png_filter)
+            
+            pixels = None
+            
+            pending.append((png_data, cache_key))
+            
+            while len(pending) > max_workers:
+                yield create_png_result(*pending.popleft(), cache)
+        
+        while len(pending) > 0:
+            yield create_png_result(*pending.popleft(), cache)
+    finally:
+        if executor is not None:
+            for png_data, cache_key in pending:
+                if isinstance(png_data, concurrent.futures.Future):
+                    png_data.cancel()
+            
+            executor.shutdown()
+
+
+def create_png_result(png_data, cache_key, cache):
+    """
+    Returns the PNG byte array of a pending image, waiting for its encoding if needed.
+    A new encoding is stored in the cache, if a cache key is given.
+    """
+    
+    if isinstance(png_data, concurrent.futures.Future):
+        png_data = png_data.result()
+    
+    if cache_key is not None:
+        cache.put(cache_key, png_data)
+    
+    return png_data
+
+
+def create_data_uri(export_settings, mime_type, data):
+    """
+    Creates a placeholder for a base64 data URI. The data is a bytes like object or a buffer builder.
+    The data URI is encoded in chunks and written directly to the file, when the glTF is saved.
+    """
+    
+    data_uris = export_settings['gltf_data_uris']
+    
+    placeholder = GLTF_DATA_URI_PLACEHOLDER.format(export_settings['gltf_data_uri_nonce'], len(data_uris))
+    
+    data_uris.append(('data:' + mime_type + ';base64,', data))
+    
+    return placeholder
+
+
 def create_custom_property(blender_element):
     """
     Filters and creates a custom property, which is stored in the glTF extra field.
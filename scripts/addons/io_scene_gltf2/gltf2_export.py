@@ -16,9 +16,12 @@
 # Imports
 #
 
+import base64
 import bpy
 import json
+import re
 import struct
+import uuid
 
 from .gltf2_debug import *
 from .gltf2_filter import *
@@ -28,6 +31,9 @@ from .gltf2_generate import *
 # Globals
 #
 
+# Bytes encoded to base64 at once. Multiple of 3, so no padding is inserted between chunks.
+GLTF_BASE64_CHUNK_SIZE = 3 * 1024 * 1024
+
 #
 # Functions
 #
@@ -47,6 +53,18 @@ def prepare(export_settings):
     
     export_settings['gltf_joint_cache'] = {}
     
+    export_settings['gltf_accessor_cache'] = {}
+    
+    export_settings['gltf_bufferView_cache'] = {}
+    
+    export_settings['gltf_time_grids'] = {}
+    
+    export_settings['gltf_data_uris'] = []
+    
+    export_settings['gltf_data_uri_nonce'] = uuid.uuid4().hex
+    
+    export_settings['gltf_index_registry'] = {}
+    
     if not export_settings['gltf_current_frame']:
         bpy.context.scene.frame_set(0)
 
@@ -62,6 +80,62 @@ def finish(export_settings):
     bpy.context.scene.frame_set(export_settings['gltf_original_frame'])  
 
 
+def save_base64(file, data):
+    """
+    Encodes the data to base64 in chunks and writes it to the text file.
+    The data is a bytes like object or a buffer builder.
+    """
+    
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = memoryview(data).cast('B')
+        
+        chunks = (data[offset:offset + GLTF_BASE64_CHUNK_SIZE] for offset in range(0, data.nbytes, GLTF_BASE64_CHUNK_SIZE))
+    else:
+        chunks = data.iter_chunks(GLTF_BASE64_CHUNK_SIZE)
+    
+    remainder = b''
+    
+    for chunk in chunks:
+        if len(remainder) > 0:
+            chunk = remainder + bytes(chunk)
+        
+        length = len(chunk) - len(chunk) % 3
+        
+        file.write(base64.b64encode(chunk[:length]).decode('ascii'))
+        
+        remainder = bytes(chunk[length:])
+    
+    file.write(base64.b64encode(remainder).decode('ascii'))
+
+
+def save_json(file, glTF_encoded, export_settings):
+    """
+    Writes the encoded glTF to the text file and streams the data URIs in place of their placeholders.
+    """
+    
+    data_uris = export_settings['gltf_data_uris']
+    
+    if len(data_uris) == 0:
+        file.write(glTF_encoded)
+        return
+    
+    placeholder = re.compile(re.escape(GLTF_DATA_URI_PLACEHOLDER.format(export_settings['gltf_data_uri_nonce'], '')) + '([0-9]+)')
+    
+    start = 0
+    
+    for match in placeholder.finditer(glTF_encoded):
+        file.write(glTF_encoded[start:match.start()])
+        
+        prefix, data = data_uris[int(match.group(1))]
+        
+        file.write(prefix)
+        save_base64(file, data)
+        
+        start = match.end()
+    
+    file.write(glTF_encoded[start:])
+
+
 def save(operator,
          context,
          export_settings):
@@ -75,82 +149,83 @@ def save(operator,
     
     #
     
-    prepare(export_settings)
+    try:
+        prepare(export_settings)
     
-    #
+        #
 
-    glTF = {}
+        glTF = {}
 
-    generate_glTF(operator, context, export_settings, glTF)
+        generate_glTF(operator, context, export_settings, glTF)
 
-    #
+        #
 
-    indent = None
-    separators = separators=(',', ':')
+        indent = None
+        separators = separators=(',', ':')
 
-    if export_settings['gltf_format'] == 'ASCII' and not export_settings['gltf_strip']:
-        indent = 4
-        separators = separators=(', ', ' : ')
+        if export_settings['gltf_format'] == 'ASCII' and not export_settings['gltf_strip']:
+            indent = 4
+            separators = separators=(', ', ' : ')
     
-    glTF_encoded = json.dumps(glTF, indent=indent, separators=separators, sort_keys=True)
+        glTF_encoded = json.dumps(glTF, indent=indent, separators=separators, sort_keys=True)
     
-    #
+        #
 
-    if export_settings['gltf_format'] == 'ASCII':
-        file = open(export_settings['gltf_filepath'], "w", encoding="utf8", newline="\n")
-        file.write(glTF_encoded)
-        file.write("\n")
-        file.close()
-        
-        binary = export_settings['gltf_binary']
-        if len(binary) > 0 and not export_settings['gltf_embed_buffers']:
-            file = open(export_settings['gltf_filedirectory'] + export_settings['gltf_binaryfilename'], "wb")
-            file.write(binary)
+        if export_settings['gltf_format'] == 'ASCII':
+            file = open(export_settings['gltf_filepath'], "w", encoding="utf8", newline="\n")
+            save_json(file, glTF_encoded, export_settings)
+            file.write("\n")
             file.close()
         
-    else:
-        file = open(export_settings['gltf_filepath'], "wb")
+            binary = export_settings['gltf_binary']
+            if len(binary) > 0 and not export_settings['gltf_embed_buffers']:
+                file = open(export_settings['gltf_filedirectory'] + export_settings['gltf_binaryfilename'], "wb")
+                binary.write_to(file)
+                file.close()
+        
+        else:
+            file = open(export_settings['gltf_filepath'], "wb")
 
-        glTF_data = glTF_encoded.encode()
-        binary = export_settings['gltf_binary']
+            glTF_data = glTF_encoded.encode()
+            binary = export_settings['gltf_binary']
 
-        length_gtlf = len(glTF_data)
-        spaces_gltf = (4 - (length_gtlf & 3)) & 3
-        length_gtlf += spaces_gltf
+            length_gtlf = len(glTF_data)
+            spaces_gltf = (4 - (length_gtlf & 3)) & 3
+            length_gtlf += spaces_gltf
 
-        length_bin = len(binary)
-        zeros_bin = (4 - (length_bin & 3)) & 3
-        length_bin += zeros_bin
+            length_bin = len(binary)
+            zeros_bin = (4 - (length_bin & 3)) & 3
+            length_bin += zeros_bin
 
-        length = 12 + 8 + length_gtlf
-        if length_bin > 0:
-            length += 8 + length_bin
+            length = 12 + 8 + length_gtlf
+            if length_bin > 0:
+                length += 8 + length_bin
         
-        # Header (Version 2)
-        file.write('glTF'.encode())
-        file.write(struct.pack("I", 2))
-        file.write(struct.pack("I", length))
+            # Header (Version 2)
+            file.write('glTF'.encode())
+            file.write(struct.pack("I", 2))
+            file.write(struct.pack("I", length))
         
-        # Chunk 0 (JSON)
-        file.write(struct.pack("I", length_gtlf)) 
-        file.write('JSON'.encode())
-        file.write(glTF_data)
-        for i in range(0, spaces_gltf):
-            file.write(' '.encode())
-
-        # Chunk 1 (BIN)
-        if length_bin > 0:
-            file.write(struct.pack("I", length_bin)) 
-            file.write('BIN\0'.encode())
-            file.write(binary)
-            for i in range(0, zeros_bin):
-                file.write('\0'.encode())
+            # Chunk 0 (JSON)
+            file.write(struct.pack("I", length_gtlf)) 
+            file.write('JSON'.encode())
+            file.write(glTF_data)
+            file.write(b' ' * spaces_gltf)
+
+            # Chunk 1 (BIN)
+            if length_bin > 0:
+                file.write(struct.pack("I", length_bin)) 
+                file.write('BIN\0'.encode())
+                binary.write_to(file)
+                file.write(b'\0' * zeros_bin)
             
-        file.close()
+            file.close()
         
-    #
+        #
     
-    finish(export_settings)
+        finish(export_settings)
+    finally:
+        export_settings['gltf_binary'].close()
     
     #
 
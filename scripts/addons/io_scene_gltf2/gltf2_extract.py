@@ -16,9 +16,15 @@
 # Imports
 #
 
+import array
 import mathutils
 import mathutils.geometry
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from .gltf2_debug import *
 
 #
@@ -27,6 +33,9 @@ from .gltf2_debug import *
 
 GLTF_MAX_COLORS = 2
 
+GLTF_BUFFER_NUMPY_TYPES = {'FLOAT' : 'float32', 'INT' : 'int32', 'BOOL' : 'bool'}
+GLTF_BUFFER_ARRAY_TYPES = {'FLOAT' : 'f', 'INT' : 'i', 'BOOL' : 'b'}
+
 #
 # Functions
 #
@@ -77,286 +86,373 @@ def decompose_transition(matrix, context, export_settings):
     return translation, rotation, scale
 
 
-def extract_primitive_floor(a, indices, use_tangents):
+def extract_buffer(blender_collection, attribute, components, buffer_type='FLOAT'):
     """
-    Shift indices, that the first one starts with 0. It is assumed, that the indices are packed.
+    Reads an attribute of all elements of a Blender collection with one foreach_get call.
+    The result is a flat, typed buffer. If NumPy is not available, an array.array is used.
     """
+    
+    count = len(blender_collection) * components
+    
+    if numpy is not None:
+        buffer = numpy.empty(count, dtype=GLTF_BUFFER_NUMPY_TYPES[buffer_type])
+    else:
+        buffer = array.array(GLTF_BUFFER_ARRAY_TYPES[buffer_type], [0]) * count
+        
+    if count > 0:
+        blender_collection.foreach_get(attribute, buffer)
+    
+    return buffer
 
-    attributes = {
-        'POSITION' : [],
-        'NORMAL' : []
-    }
+
+def extract_swizzle_buffer(buffer):
+    """
+    Converts a flat buffer of locations from Blender coordinate system to glTF coordinate system.
+    Returns a list of Python floats.
+    """
     
-    if use_tangents:
-        attributes['TANGENT'] = []
+    if numpy is not None:
+        locations = numpy.asarray(buffer, dtype=numpy.float32).reshape(-1, 3)
+        
+        return numpy.column_stack((locations[:, 0], locations[:, 2], -locations[:, 1])).ravel().tolist()
     
-    result_primitive = {
-        'material' : a['material'],
-        'indices' : [],
-        'attributes' : attributes
-    }
+    result = [0.0] * len(buffer)
     
-    source_attributes = a['attributes']
+    result[0::3] = buffer[0::3]
+    result[1::3] = buffer[2::3]
+    result[2::3] = [-value for value in buffer[1::3]]
     
-    #
+    return result
+
+
+def extract_delta_buffer(target, source):
+    """
+    Subtracts two flat lists of locations component wise. Single precision is used, as done by mathutils.
+    """
     
-    texcoord_index = 0
-    process_texcoord = True
-    while process_texcoord:  
-        texcoord_id = 'TEXCOORD_' + str(texcoord_index)
+    if numpy is not None:
+        return (numpy.array(target, dtype=numpy.float32) - numpy.array(source, dtype=numpy.float32)).tolist()
+    
+    result = []
+    
+    for offset in range(0, len(target), 3):
+        delta = mathutils.Vector(target[offset:offset + 3])
+        delta -= mathutils.Vector(source[offset:offset + 3])
         
-        if source_attributes.get(texcoord_id) is not None:
-            attributes[texcoord_id] = []
-            texcoord_index += 1
-        else:
-            process_texcoord = False
+        result.extend(delta)
+    
+    return result
+
+
+def extract_texcoord_buffer(buffer):
+    """
+    Flips the v coordinate of a flat texture coordinate buffer. Returns a list of Python floats.
+    """
+    
+    if numpy is not None:
+        texcoords = buffer.reshape(-1, 2).astype(numpy.float64)
+        texcoords[:, 1] = 1.0 - texcoords[:, 1]
         
-    texcoord_max = texcoord_index 
+        return texcoords.ravel().tolist()
+    
+    result = buffer.tolist()
+    
+    result[1::2] = [1.0 - value for value in buffer[1::2]]
+    
+    return result
+
 
+def extract_mesh_buffers(blender_mesh, blender_shape_keys, use_tangents, texcoord_max, color_max):
+    """
+    Gathers all per vertex, per loop and per polygon data of a mesh with one foreach_get call per attribute.
+    Locations, normals and tangents are already converted to glTF coordinate system.
+    """
+    
+    buffers = {}
+    
+    #
+    # Vertices
     #
     
-    color_index = 0
-    process_color = True
-    while process_color:  
-        color_id = 'COLOR_' + str(color_index)
+    vertex_locations = extract_buffer(blender_mesh.vertices, 'co', 3)
+    
+    positions = extract_swizzle_buffer(vertex_locations)
+    
+    buffers['vertex_locations'] = vertex_locations.tolist()
+    buffers['positions'] = positions
+    
+    source_vertex_normals = extract_buffer(blender_mesh.vertices, 'normal', 3)
+    
+    vertex_normals = extract_swizzle_buffer(source_vertex_normals)
+    
+    buffers['vertex_normals'] = vertex_normals
+    
+    #
+    # Loops
+    #
+    
+    buffers['loop_vertex_indices'] = extract_buffer(blender_mesh.loops, 'vertex_index', 1, 'INT').tolist()
+    
+    buffers['loop_tangents'] = None
+    buffers['loop_tangent_locations'] = None
+    
+    if use_tangents:
+        loop_tangents = extract_buffer(blender_mesh.loops, 'tangent', 3)
         
-        if source_attributes.get(color_id) is not None:
-            attributes[color_id] = []
-            color_index += 1
-        else:
-            process_color = False
+        buffers['loop_tangents'] = loop_tangents.tolist()
+        buffers['loop_tangent_locations'] = extract_swizzle_buffer(loop_tangents)
+    
+    texcoords = []
+    
+    for texcoord_index in range(0, texcoord_max):
+        texcoords.append(extract_texcoord_buffer(extract_buffer(blender_mesh.uv_layers[texcoord_index].data, 'uv', 2)))
+    
+    buffers['texcoords'] = texcoords
+    
+    colors = []
+    
+    for color_index in range(0, color_max):
+        blender_color_data = blender_mesh.vertex_colors[color_index].data
         
-    color_max = color_index 
-
+        color_components = 3
+        if len(blender_color_data) > 0:
+            color_components = len(blender_color_data[0].color)
+        
+        color = extract_buffer(blender_color_data, 'color', color_components).tolist()
+        
+        # Alpha is not used, so only keep red, green and blue.
+        if color_components != 3:
+            del color[3::color_components]
+        
+        colors.append(color)
+    
+    buffers['colors'] = colors
+    
+    #
+    # Polygons
     #
     
-    bone_index = 0
-    process_bone = True
-    while process_bone:  
-        joint_id = 'JOINTS_' + str(bone_index)
-        weight_id = 'WEIGHTS_' + str(bone_index)
+    source_polygon_normals = extract_buffer(blender_mesh.polygons, 'normal', 3)
+    
+    polygon_normals = extract_swizzle_buffer(source_polygon_normals)
+    
+    buffers['polygon_normals'] = polygon_normals
+    buffers['polygon_use_smooth'] = extract_buffer(blender_mesh.polygons, 'use_smooth', 1, 'BOOL').tolist()
+    buffers['polygon_material_indices'] = extract_buffer(blender_mesh.polygons, 'material_index', 1, 'INT').tolist()
+    buffers['polygon_loop_starts'] = extract_buffer(blender_mesh.polygons, 'loop_start', 1, 'INT').tolist()
+    buffers['polygon_loop_totals'] = extract_buffer(blender_mesh.polygons, 'loop_total', 1, 'INT').tolist()
+    
+    #
+    # Shape keys, stored as delta to the base mesh.
+    #
+    
+    morph_positions = []
+    morph_vertex_normals = []
+    morph_polygon_normals = []
+    
+    for blender_shape_key in blender_shape_keys:
+        shape_key_positions = extract_swizzle_buffer(extract_buffer(blender_shape_key.data, 'co', 3))
         
-        if source_attributes.get(joint_id) is not None:
-            attributes[joint_id] = []
-            attributes[weight_id] = []
-            bone_index += 1
-        else:
-            process_bone = False
+        morph_positions.append(extract_delta_buffer(shape_key_positions, positions))
+        
+        shape_key_vertex_normals = extract_swizzle_buffer(blender_shape_key.normals_vertex_get())
+        
+        morph_vertex_normals.append(extract_delta_buffer(shape_key_vertex_normals, vertex_normals))
         
-    bone_max = bone_index
+        shape_key_polygon_normals = extract_swizzle_buffer(blender_shape_key.normals_polygon_get())
+        
+        morph_polygon_normals.append(extract_delta_buffer(shape_key_polygon_normals, polygon_normals))
     
-    # 
+    buffers['morph_positions'] = morph_positions
+    buffers['morph_vertex_normals'] = morph_vertex_normals
+    buffers['morph_polygon_normals'] = morph_polygon_normals
     
-    morph_index = 0
-    process_morph = True
-    while process_morph:  
-        morph_position_id = 'MORPH_POSITION_' + str(morph_index)
-        morph_normal_id = 'MORPH_NORMAL_' + str(morph_index)
-        morph_tangent_id = 'MORPH_TANGENT_' + str(morph_index)
-        
-        if source_attributes.get(morph_position_id) is not None:
-            attributes[morph_position_id] = []
-            attributes[morph_normal_id] = []
-            if use_tangents:
-                attributes[morph_tangent_id] = []
-            morph_index += 1
-        else:
-            process_morph = False
+    return buffers
+
+
+def extract_attribute_ids(source_attributes, use_tangents):
+    """
+    Returns the identifiers of all attributes of a primitive together with their component count.
+    """
+    
+    attribute_ids = [('POSITION', 3), ('NORMAL', 3)]
+    
+    if use_tangents:
+        attribute_ids.append(('TANGENT', 4))
+    
+    #
     
-    morph_max = morph_index
+    texcoord_index = 0
+    while source_attributes.get('TEXCOORD_' + str(texcoord_index)) is not None:
+        attribute_ids.append(('TEXCOORD_' + str(texcoord_index), 2))
+        texcoord_index += 1
 
     #
+    
+    color_index = 0
+    while source_attributes.get('COLOR_' + str(color_index)) is not None:
+        attribute_ids.append(('COLOR_' + str(color_index), 4))
+        color_index += 1
 
-    min_index = min(indices)
-    max_index = max(indices)
+    #
+    
+    bone_index = 0
+    while source_attributes.get('JOINTS_' + str(bone_index)) is not None:
+        attribute_ids.append(('JOINTS_' + str(bone_index), 4))
+        attribute_ids.append(('WEIGHTS_' + str(bone_index), 4))
+        bone_index += 1
     
-    for old_index in indices:
-        result_primitive['indices'].append(old_index - min_index)
+    # 
     
-    for old_index in range(min_index, max_index + 1):
-        for vi in range(0, 3):
-            attributes['POSITION'].append(source_attributes['POSITION'][old_index * 3 + vi])     
-            attributes['NORMAL'].append(source_attributes['NORMAL'][old_index * 3 + vi])
-
+    morph_index = 0
+    while source_attributes.get('MORPH_POSITION_' + str(morph_index)) is not None:
+        attribute_ids.append(('MORPH_POSITION_' + str(morph_index), 3))
+        attribute_ids.append(('MORPH_NORMAL_' + str(morph_index), 3))
         if use_tangents:
-            for vi in range(0, 4):
-                attributes['TANGENT'].append(source_attributes['TANGENT'][old_index * 4 + vi])
-            
-        for texcoord_index in range(0, texcoord_max):
-            texcoord_id = 'TEXCOORD_' + str(texcoord_index)
-            for vi in range(0, 2):
-                attributes[texcoord_id].append(source_attributes[texcoord_id][old_index * 2 + vi])
-
-        for color_index in range(0, color_max):
-            color_id = 'COLOR_' + str(color_index)
-            for vi in range(0, 4):
-                attributes[color_id].append(source_attributes[color_id][old_index * 4 + vi])
-
-        for bone_index in range(0, bone_max):
-            joint_id = 'JOINTS_' + str(bone_index)
-            weight_id = 'WEIGHTS_' + str(bone_index)
-            for vi in range(0, 4):
-                attributes[joint_id].append(source_attributes[joint_id][old_index * 4 + vi])
-                attributes[weight_id].append(source_attributes[weight_id][old_index * 4 + vi])
-                
-        for morph_index in range(0, morph_max):
-            morph_position_id = 'MORPH_POSITION_' + str(morph_index)
-            morph_normal_id = 'MORPH_NORMAL_' + str(morph_index)
-            morph_tangent_id = 'MORPH_TANGENT_' + str(morph_index)
-            for vi in range(0, 3):
-                attributes[morph_position_id].append(source_attributes[morph_position_id][old_index * 3 + vi])
-                attributes[morph_normal_id].append(source_attributes[morph_normal_id][old_index * 3 + vi])
-            if use_tangents:
-                for vi in range(0, 4):
-                    attributes[morph_tangent_id].append(source_attributes[morph_tangent_id][old_index * 4 + vi])
-
-    return result_primitive
+            # Morph target tangents are stored without the w component.
+            attribute_ids.append(('MORPH_TANGENT_' + str(morph_index), 3))
+        morph_index += 1
+    
+    return attribute_ids
 
 
-def extract_primitive_pack(a, indices, use_tangents):
+def extract_primitive_take(a, new_to_old_indices, indices, use_tangents):
     """
-    Packs indices, that the first one starts with 0. Current indices can have gaps.
+    Creates a primitive with the given indices. Vertex i of the new primitive is vertex new_to_old_indices[i] of the source primitive.
+    If NumPy is available, every attribute is gathered with one take() call and kept as flat NumPy array.
+    Otherwise, every attribute is a flat list. Both are accepted by create_accessor and are stored with identical bytes,
+    so callers must not depend on the type of the attributes.
     """
-
-    attributes = {
-        'POSITION' : [],
-        'NORMAL' : []
-    }
     
-    if use_tangents:
-        attributes['TANGENT'] = []
+    attributes = {}
     
     result_primitive = {
         'material' : a['material'],
-        'indices' : [],
+        'indices' : indices,
         'attributes' : attributes
     }
-
+    
     source_attributes = a['attributes']
     
     #
     
-    texcoord_index = 0
-    process_texcoord = True
-    while process_texcoord:  
-        texcoord_id = 'TEXCOORD_' + str(texcoord_index)
+    if numpy is not None:
+        rows = numpy.asarray(new_to_old_indices, dtype=numpy.int64)
+    
+    for attribute_id, components in extract_attribute_ids(source_attributes, use_tangents):
+        source = source_attributes[attribute_id]
         
-        if source_attributes.get(texcoord_id) is not None:
-            attributes[texcoord_id] = []
-            texcoord_index += 1
+        if numpy is not None:
+            attributes[attribute_id] = numpy.asarray(source).reshape(-1, components).take(rows, axis=0).ravel()
         else:
-            process_texcoord = False
-        
-    texcoord_max = texcoord_index 
-
-    #
+            target = []
+            
+            for old_index in new_to_old_indices:
+                target.extend(source[old_index * components:(old_index + 1) * components])
+            
+            attributes[attribute_id] = target
     
-    color_index = 0
-    process_color = True
-    while process_color:  
-        color_id = 'COLOR_' + str(color_index)
+    return result_primitive
+
+
+def extract_primitive_pack(a, indices, use_tangents):
+    """
+    Packs indices, that the first one starts with 0. Current indices can have gaps.
+    The new vertices are ordered by their first occurrence in the indices.
+    The indices are a list. The attributes are flat NumPy arrays or lists, see extract_primitive_take.
+    """
+
+    if numpy is not None:
+        old_indices = numpy.asarray(indices, dtype=numpy.int64)
         
-        if source_attributes.get(color_id) is not None:
-            attributes[color_id] = []
-            color_index += 1
-        else:
-            process_color = False
+        unique_indices, first_occurrence, inverse = numpy.unique(old_indices, return_index=True, return_inverse=True)
         
-    color_max = color_index 
-
-    #
-    
-    bone_index = 0
-    process_bone = True
-    while process_bone:  
-        joint_id = 'JOINTS_' + str(bone_index)
-        weight_id = 'WEIGHTS_' + str(bone_index)
+        # Sort the unique indices by first occurrence and remap.
+        order = numpy.argsort(first_occurrence, kind='stable')
         
-        if source_attributes.get(joint_id) is not None:
-            attributes[joint_id] = []
-            attributes[weight_id] = []
-            bone_index += 1
-        else:
-            process_bone = False
+        rank = numpy.empty_like(order)
+        rank[order] = numpy.arange(len(order))
         
-    bone_max = bone_index 
+        new_to_old_indices = unique_indices[order].tolist()
+        new_indices = rank[inverse.ravel()].tolist()
+    else:
+        old_to_new_indices = {}
+        new_to_old_indices = []
+        new_indices = []
     
-    # 
+        for old_index in indices:
+            new_index = old_to_new_indices.get(old_index)
+            
+            if new_index is None:
+                new_index = len(new_to_old_indices)
+                
+                old_to_new_indices[old_index] = new_index
+                new_to_old_indices.append(old_index) 
+            
+            new_indices.append(new_index)
     
-    morph_index = 0
-    process_morph = True
-    while process_morph:  
-        morph_position_id = 'MORPH_POSITION_' + str(morph_index)
-        morph_normal_id = 'MORPH_NORMAL_' + str(morph_index)
-        morph_tangent_id = 'MORPH_TANGENT_' + str(morph_index)
+    return extract_primitive_take(a, new_to_old_indices, new_indices, use_tangents)     
+
+    
+def extract_primitive_split(a, range_indices, use_tangents):
+    """
+    Splits a primitive into several ones, where each one uses at most range_indices vertices.
+    Triangles are visited once and in order. A new primitive is started as soon as a triangle does not fit anymore,
+    so each primitive covers a coherent run of triangles.
+    The attributes are flat NumPy arrays or lists, see extract_primitive_take.
+    """
+    
+    source_primitive = a
+    
+    if numpy is not None:
+        # Convert each attribute stream only once, as it is gathered for every primitive.
+        source_attributes = {}
         
-        if source_attributes.get(morph_position_id) is not None:
-            attributes[morph_position_id] = []
-            attributes[morph_normal_id] = []
-            if use_tangents:
-                attributes[morph_tangent_id] = []
-            morph_index += 1
-        else:
-            process_morph = False
+        for attribute_id, components in extract_attribute_ids(a['attributes'], use_tangents):
+            source_attributes[attribute_id] = numpy.asarray(a['attributes'][attribute_id])
+            
+        source_primitive = {
+            'material' : a['material'],
+            'attributes' : source_attributes
+        }
     
-    morph_max = morph_index
-
     #
-
+    
+    result_primitives = []
+    
+    indices = a['indices']
+    
     old_to_new_indices = {}
-    new_to_old_indices = {}
-
-    new_index = 0
-    for old_index in indices:
-        if old_to_new_indices.get(old_index) is None:
-            old_to_new_indices[old_index] = new_index
-            new_to_old_indices[new_index] = old_index 
-            new_index += 1
+    new_to_old_indices = []
+    local_indices = []
+    
+    for face_index in range(0, len(indices), 3):
+        face = indices[face_index:face_index + 3]
         
-        result_primitive['indices'].append(old_to_new_indices[old_index])
-
-    end_new_index = new_index
+        new_vertex_count = len(set(old_index for old_index in face if old_index not in old_to_new_indices))
         
-    for new_index in range(0, end_new_index):
-        old_index = new_to_old_indices[new_index]
+        if len(new_to_old_indices) + new_vertex_count > range_indices:
+            result_primitives.append(extract_primitive_take(source_primitive, new_to_old_indices, local_indices, use_tangents))
+            
+            old_to_new_indices = {}
+            new_to_old_indices = []
+            local_indices = []
         
-        for vi in range(0, 3):
-            attributes['POSITION'].append(source_attributes['POSITION'][old_index * 3 + vi])     
-            attributes['NORMAL'].append(source_attributes['NORMAL'][old_index * 3 + vi])
-
-        if use_tangents:
-            for vi in range(0, 4):
-                attributes['TANGENT'].append(source_attributes['TANGENT'][old_index * 4 + vi])
+        for old_index in face:
+            new_index = old_to_new_indices.get(old_index)
             
-        for texcoord_index in range(0, texcoord_max):
-            texcoord_id = 'TEXCOORD_' + str(texcoord_index)
-            for vi in range(0, 2):
-                attributes[texcoord_id].append(source_attributes[texcoord_id][old_index * 2 + vi])
-    
-        for color_index in range(0, color_max):
-            color_id = 'COLOR_' + str(color_index)
-            for vi in range(0, 4):
-                attributes[color_id].append(source_attributes[color_id][old_index * 4 + vi])
-    
-        for bone_index in range(0, bone_max):
-            joint_id = 'JOINTS_' + str(bone_index)
-            weight_id = 'WEIGHTS_' + str(bone_index)
-            for vi in range(0, 4):
-                attributes[joint_id].append(source_attributes[joint_id][old_index * 4 + vi])
-                attributes[weight_id].append(source_attributes[weight_id][old_index * 4 + vi])
+            if new_index is None:
+                new_index = len(new_to_old_indices)
                 
-        for morph_index in range(0, morph_max):
-            morph_position_id = 'MORPH_POSITION_' + str(morph_index)
-            morph_normal_id = 'MORPH_NORMAL_' + str(morph_index)
-            morph_tangent_id = 'MORPH_TANGENT_' + str(morph_index)
-            for vi in range(0, 3):
-                attributes[morph_position_id].append(source_attributes[morph_position_id][old_index * 3 + vi])
-                attributes[morph_normal_id].append(source_attributes[morph_normal_id][old_index * 3 + vi])
-            if use_tangents:
-                for vi in range(0, 4):
-                    attributes[morph_tangent_id].append(source_attributes[morph_tangent_id][old_index * 4 + vi])
+                old_to_new_indices[old_index] = new_index
+                new_to_old_indices.append(old_index)
+            
+            local_indices.append(new_index)
+    
+    if len(local_indices) > 0:
+        result_primitives.append(extract_primitive_take(source_primitive, new_to_old_indices, local_indices, use_tangents))
     
-    return result_primitive     
+    return result_primitives
 
     
 def extract_primitives(glTF, blender_mesh, blender_vertex_groups, export_settings):
@@ -404,9 +500,9 @@ def extract_primitives(glTF, blender_mesh, blender_vertex_groups, export_setting
 
     #
     
-    vertex_index_to_new_indices = {}
+    vertex_key_to_new_index = {}
     
-    material_map[''] = vertex_index_to_new_indices 
+    material_map[''] = vertex_key_to_new_index 
     
     #
     # Create primitive for each material.
@@ -433,9 +529,9 @@ def extract_primitives(glTF, blender_mesh, blender_vertex_groups, export_setting
         
         #
         
-        vertex_index_to_new_indices = {}
+        vertex_key_to_new_index = {}
         
-        material_map[blender_material.name] = vertex_index_to_new_indices 
+        material_map[blender_material.name] = vertex_key_to_new_index 
 
     texcoord_max = 0
     if blender_mesh.uv_layers.active:
@@ -443,33 +539,10 @@ def extract_primitives(glTF, blender_mesh, blender_vertex_groups, export_setting
 
     #
     
-    vertex_colors = {}
-    
-    color_max = 0
-    color_index = 0
-    for vertex_color in blender_mesh.vertex_colors:
-        vertex_color_name = 'COLOR_' + str(color_index)
-        vertex_colors[vertex_color_name] = vertex_color
-        
-        color_index += 1
-        if color_index >= GLTF_MAX_COLORS:
-            break
-    color_max = color_index
+    color_max = min(len(blender_mesh.vertex_colors), GLTF_MAX_COLORS)
         
     #
     
-    bone_max = 0
-    for blender_polygon in blender_mesh.polygons:
-        for loop_index in blender_polygon.loop_indices:
-            vertex_index = blender_mesh.loops[loop_index].vertex_index
-            bones_count = len(blender_mesh.vertices[vertex_index].groups)
-            if bones_count > 0:
-                if bones_count % 4 == 0:
-                    bones_count -= 1
-                bone_max = max(bone_max, bones_count // 4 + 1)            
-    
-    #
-    
     morph_max = 0
     
     blender_shape_keys = []
@@ -480,40 +553,152 @@ def extract_primitives(glTF, blender_mesh, blender_vertex_groups, export_setting
         for blender_shape_key in blender_mesh.shape_keys.key_blocks:
             if blender_shape_key != blender_shape_key.relative_key:
                 blender_shape_keys.append(blender_shape_key) 
+
+    if not export_settings['gltf_morph']:
+        blender_shape_keys = []
+
+    #
+    # Gather all mesh data at once.
+    #
+    
+    buffers = extract_mesh_buffers(blender_mesh, blender_shape_keys, use_tangents, texcoord_max, color_max)
+    
+    positions = buffers['positions']
+    vertex_normals = buffers['vertex_normals']
+    vertex_locations = buffers['vertex_locations']
+    loop_vertex_indices = buffers['loop_vertex_indices']
+    loop_tangents = buffers['loop_tangents']
+    loop_tangent_locations = buffers['loop_tangent_locations']
+    polygon_normals = buffers['polygon_normals']
+    polygon_use_smooth = buffers['polygon_use_smooth']
+    polygon_material_indices = buffers['polygon_material_indices']
+    polygon_loop_starts = buffers['polygon_loop_starts']
+    polygon_loop_totals = buffers['polygon_loop_totals']
+    texcoords = buffers['texcoords']
+    vertex_colors = buffers['colors']
+    morph_positions = buffers['morph_positions']
+    morph_vertex_normals = buffers['morph_vertex_normals']
+    morph_polygon_normals = buffers['morph_polygon_normals']
         
+    #
+    # Joints and weights only depend on the vertex, so they are gathered once per used vertex.
+    #
+    
+    vertex_joints = {}
+    vertex_weights = {}
+    
+    bone_max = 0
+    
+    if export_settings['gltf_skins']:
+        for vertex_index in set(loop_vertex_indices):
+            joints = []
+            weights = []
+
+            vertex = blender_mesh.vertices[vertex_index]
+
+            if vertex.groups is not None and len(vertex.groups) > 0:
+                joint = []
+                weight = []
+                for group_element in vertex.groups:
+
+                    if len(joint) == 4:
+                        joints.append(joint)
+                        weights.append(weight)
+                        joint = []
+                        weight = []
+                    
+                    #
+                    
+                    vertex_group_index = group_element.group
+                    
+                    vertex_group_name = blender_vertex_groups[vertex_group_index].name
+                    
+                    #
+                    
+                    joint_index = 0
+                    joint_weight = 0.0 
+                    
+                    if export_settings['group_index'].get(vertex_group_name) is not None:
+                        joint_index = export_settings['group_index'][vertex_group_name]
+                        joint_weight = group_element.weight
+                    
+                    #
+                    
+                    joint.append(joint_index)
+                    weight.append(joint_weight)
+                    
+                if len(joint) > 0:
+                    for fill in range(0, 4 - len(joint)):
+                        joint.append(0)
+                        weight.append(0.0)
+
+                    joints.append(joint)
+                    weights.append(weight)
+            
+            vertex_joints[vertex_index] = joints
+            vertex_weights[vertex_index] = weights
+            
+            bone_max = max(bone_max, len(joints))
+            
+        for vertex_index in vertex_joints:
+            joints = vertex_joints[vertex_index]
+            weights = vertex_weights[vertex_index]
+            
+            for fill in range(0, bone_max - len(joints)):
+                joints.append([0, 0, 0, 0])
+                weights.append([0.0, 0.0, 0.0, 0.0])
+    
+    #
+    
+    material_names = []
+    
+    for blender_material in blender_mesh.materials:
+        if blender_material is None:
+            material_names.append(None)
+        else:
+            material_names.append(blender_material.name)
+    
     #
     # Convert polygon to primitive indices and eliminate invalid ones. Assign to material.
     #
-    for blender_polygon in blender_mesh.polygons:
+    for polygon_index in range(0, len(polygon_loop_starts)):
         export_color = True
         
         #
         
+        material_index = polygon_material_indices[polygon_index]
+        
         primitive = None
-        vertex_index_to_new_indices = None
-        if blender_polygon.material_index < 0 or blender_polygon.material_index >= len(blender_mesh.materials) or blender_mesh.materials[blender_polygon.material_index] is None:
+        vertex_key_to_new_index = None
+        if material_index < 0 or material_index >= len(material_names) or material_names[material_index] is None:
             primitive = material_name_to_primitives['']
-            vertex_index_to_new_indices = material_map['']
+            vertex_key_to_new_index = material_map['']
         else:
-            primitive = material_name_to_primitives[blender_mesh.materials[blender_polygon.material_index].name]
-            vertex_index_to_new_indices = material_map[blender_mesh.materials[blender_polygon.material_index].name]
+            primitive = material_name_to_primitives[material_names[material_index]]
+            vertex_key_to_new_index = material_map[material_names[material_index]]
             
             # 
             
-            if blender_mesh.materials[blender_polygon.material_index].name in export_settings['gltf_use_no_color']: 
+            if material_names[material_index] in export_settings['gltf_use_no_color']: 
                 export_color = False
         #
         
         attributes = primitive['attributes']
         
-        face_normal = blender_polygon.normal
-        face_tangent = mathutils.Vector((0.0, 0.0, 0.0))
-        if use_tangents:
-            for loop_index in blender_polygon.loop_indices:
-                temp_vertex = blender_mesh.loops[loop_index]
-                face_tangent += temp_vertex.tangent
+        loop_start = polygon_loop_starts[polygon_index]
+        loop_total = polygon_loop_totals[polygon_index]
+        use_smooth = polygon_use_smooth[polygon_index]
+        
+        face_normal = tuple(polygon_normals[polygon_index * 3:polygon_index * 3 + 3])
+        face_tangent = None
+        if use_tangents and not use_smooth:
+            face_tangent_sum = mathutils.Vector((0.0, 0.0, 0.0))
+            for loop_index in range(loop_start, loop_start + loop_total):
+                face_tangent_sum += mathutils.Vector(loop_tangents[loop_index * 3:loop_index * 3 + 3])
                 
-            face_tangent.normalize() 
+            face_tangent_sum.normalize()
+            
+            face_tangent = tuple(convert_swizzle_tangent(face_tangent_sum))
         
         #
         
@@ -521,31 +706,27 @@ def extract_primitives(glTF, blender_mesh, blender_vertex_groups, export_setting
         
         loop_index_list = []
         
-        if len(blender_polygon.loop_indices) == 3:
-            loop_index_list.extend(blender_polygon.loop_indices)
-        elif len(blender_polygon.loop_indices) > 3:
+        if loop_total == 3:
+            loop_index_list.extend(range(loop_start, loop_start + loop_total))
+        elif loop_total > 3:
             # Triangulation of polygon. Using internal function, as non-convex polygons could exist.
             polyline = []
             
-            for loop_index in blender_polygon.loop_indices:
-                vertex_index = blender_mesh.loops[loop_index].vertex_index
-                v = blender_mesh.vertices[vertex_index].co
-                polyline.append(mathutils.Vector((v[0], v[1], v[2])))
+            for loop_index in range(loop_start, loop_start + loop_total):
+                vertex_index = loop_vertex_indices[loop_index]
+                polyline.append(mathutils.Vector(vertex_locations[vertex_index * 3:vertex_index * 3 + 3]))
                 
             triangles = mathutils.geometry.tessellate_polygon((polyline,))
             
             for triangle in triangles:
-                loop_index_list.append(blender_polygon.loop_indices[triangle[0]])
-                loop_index_list.append(blender_polygon.loop_indices[triangle[2]])
-                loop_index_list.append(blender_polygon.loop_indices[triangle[1]])
+                loop_index_list.append(loop_start + triangle[0])
+                loop_index_list.append(loop_start + triangle[2])
+                loop_index_list.append(loop_start + triangle[1])
         else:
             continue
         
         for loop_index in loop_index_list:
-            vertex_index = blender_mesh.loops[loop_index].vertex_index
-            
-            if vertex_index_to_new_indices.get(vertex_index) is None:
-                vertex_index_to_new_indices[vertex_index] = []
+            vertex_index = loop_vertex_indices[loop_index]
             
             #
             
@@ -561,116 +742,53 @@ def extract_primitives(glTF, blender_mesh, blender_vertex_groups, export_setting
             target_normals = []
             target_tangents = []
             
-            vertex = blender_mesh.vertices[vertex_index]
-            
-            v = convert_swizzle_location(vertex.co)
-            if blender_polygon.use_smooth:
-                n = convert_swizzle_location(vertex.normal)
+            v = positions[vertex_index * 3:vertex_index * 3 + 3]
+            if use_smooth:
+                n = vertex_normals[vertex_index * 3:vertex_index * 3 + 3]
                 if use_tangents:
-                    t = convert_swizzle_tangent(blender_mesh.loops[loop_index].tangent)
+                    t = loop_tangent_locations[loop_index * 3:loop_index * 3 + 3]
+                    t.append(1.0)
             else:
-                n = convert_swizzle_location(face_normal)
+                n = face_normal
                 if use_tangents:
-                    t = convert_swizzle_tangent(face_tangent)
+                    t = face_tangent
                 
-            if blender_mesh.uv_layers.active:
-                for texcoord_index in range(0, texcoord_max):
-                    uv = blender_mesh.uv_layers[texcoord_index].data[loop_index].uv
-                    uvs.append([uv.x, 1.0 - uv.y])
+            for texcoord_index in range(0, texcoord_max):
+                uvs.append(texcoords[texcoord_index][loop_index * 2:loop_index * 2 + 2])
                     
             #
             
             if color_max > 0 and export_color:
                 for color_index in range(0, color_max):
-                    color_name = 'COLOR_' + str(color_index)
-                    color = vertex_colors[color_name].data[loop_index].color
-                    colors.append([color[0], color[1], color[2], 1.0])
+                    color = vertex_colors[color_index][loop_index * 3:loop_index * 3 + 3]
+                    color.append(1.0)
+                    colors.append(color)
             
             #
             
-            bone_count = 0
-
-            if vertex.groups is not None and len(vertex.groups) > 0 and export_settings['gltf_skins']:
-                joint = []
-                weight = []
-                for group_element in vertex.groups:
-
-                    if len(joint) == 4:
-                        bone_count += 1
-                        joints.append(joint)
-                        weights.append(weight)
-                        joint = []
-                        weight = []
-                    
-                    #
-                    
-                    vertex_group_index = group_element.group
-                    
-                    vertex_group_name = blender_vertex_groups[vertex_group_index].name
-                    
-                    #
-                    
-                    joint_index = 0
-                    joint_weight = 0.0 
-                    
-                    if export_settings['group_index'].get(vertex_group_name) is not None:
-                        joint_index = export_settings['group_index'][vertex_group_name]
-                        joint_weight = group_element.weight
-                    
-                    #
-                    
-                    joint.append(joint_index)
-                    weight.append(joint_weight)
-                    
-                if len(joint) > 0:
-                    bone_count += 1
-                    
-                    for fill in range(0, 4 - len(joint)):
-                        joint.append(0)
-                        weight.append(0.0)
-
-                    joints.append(joint)
-                    weights.append(weight)
-                    
-            for fill in range(0, bone_max - bone_count):
-                joints.append([0, 0, 0, 0])
-                weights.append([0.0, 0.0, 0.0, 0.0])
+            if export_settings['gltf_skins']:
+                joints = vertex_joints[vertex_index]
+                weights = vertex_weights[vertex_index]
                     
             #
             
             if morph_max > 0 and export_settings['gltf_morph']:
                 for morph_index in range(0, morph_max):
-                    blender_shape_key = blender_shape_keys[morph_index]
-                    
-                    v_morph = convert_swizzle_location(blender_shape_key.data[vertex_index].co)
-                    
-                    # Store delta.
-                    v_morph -= v
-                    
-                    target_positions.append(v_morph)
+                    target_positions.append(morph_positions[morph_index][vertex_index * 3:vertex_index * 3 + 3])
                     
                     #
                     
-                    n_morph = None
-                    
-                    if blender_polygon.use_smooth:
-                        temp_normals = blender_shape_key.normals_vertex_get()
-                        n_morph = (temp_normals[vertex_index * 3 + 0], temp_normals[vertex_index * 3 + 1], temp_normals[vertex_index * 3 + 2])
+                    if use_smooth:
+                        n_morph = morph_vertex_normals[morph_index][vertex_index * 3:vertex_index * 3 + 3]
                     else:
-                        temp_normals = blender_shape_key.normals_polygon_get()
-                        n_morph = (temp_normals[blender_polygon.index * 3 + 0], temp_normals[blender_polygon.index * 3 + 1], temp_normals[blender_polygon.index * 3 + 2])
-                        
-                    n_morph = convert_swizzle_location(n_morph)
-
-                    # Store delta.
-                    n_morph -= n
+                        n_morph = morph_polygon_normals[morph_index][polygon_index * 3:polygon_index * 3 + 3]
                         
                     target_normals.append(n_morph)
                     
                     #
                     
                     if use_tangents:
-                        rotation = n_morph.rotation_difference(n)
+                        rotation = mathutils.Vector(n_morph).rotation_difference(mathutils.Vector(n))
     
                         t_morph = mathutils.Vector((t[0], t[1], t[2]))
                         
@@ -679,95 +797,42 @@ def extract_primitives(glTF, blender_mesh, blender_vertex_groups, export_setting
                         target_tangents.append(t_morph)
             
             #
+            # Build one hashable key out of all attributes, so already created vertices are found in constant time.
             #
 
-            create = True
-                
-            for current_new_index in vertex_index_to_new_indices[vertex_index]:
-                found = True
-                
-                for i in range(0, 3):
-                    if attributes['POSITION'][current_new_index * 3 + i] != v[i]:
-                        found = False
-                        break
-
-                    if attributes['NORMAL'][current_new_index * 3 + i] != n[i]:
-                        found = False
-                        break
+            vertex_key = [vertex_index]
+            
+            vertex_key.extend(v)
+            vertex_key.extend(n)
+            if use_tangents:
+                vertex_key.extend(t)
+            
+            for texcoord_index in range(0, texcoord_max):
+                vertex_key.extend(uvs[texcoord_index])
+            
+            if export_color:
+                for color_index in range(0, color_max):
+                    # Alpha is always 1.0 - see above.
+                    vertex_key.extend(colors[color_index][0:3])
 
-                if use_tangents:
-                    for i in range(0, 4):
-                        if attributes['TANGENT'][current_new_index * 4 + i] != t[i]:
-                            found = False
-                            break
-                
-                if not found:
-                    continue
-                
-                for texcoord_index in range(0, texcoord_max):
-                    uv = uvs[texcoord_index]
-                    
-                    texcoord_id = 'TEXCOORD_' + str(texcoord_index)
-                    for i in range(0, 2):
-                        if attributes[texcoord_id][current_new_index * 2 + i] != uv[i]:
-                            found = False
-                            break
-                
-                if export_color:
-                    for color_index in range(0, color_max):
-                        color = colors[color_index]
-                        
-                        color_id = 'COLOR_' + str(color_index)
-                        for i in range(0, 3):
-                            # Alpha is always 1.0 - see above.
-                            if attributes[color_id][current_new_index * 4 + i] != color[i]:
-                                found = False
-                                break
+            if export_settings['gltf_skins']:
+                for bone_index in range(0, bone_max):
+                    vertex_key.extend(joints[bone_index])
+                    vertex_key.extend(weights[bone_index])
 
-                if export_settings['gltf_skins']:
-                    for bone_index in range(0, bone_max):
-                        joint = joints[bone_index]
-                        weight = weights[bone_index]
-                                            
-                        joint_id = 'JOINTS_' + str(bone_index)
-                        weight_id = 'WEIGHTS_' + str(bone_index)
-                        for i in range(0, 4):
-                            if attributes[joint_id][current_new_index * 4 + i] != joint[i]:
-                                found = False
-                                break
-                            if attributes[weight_id][current_new_index * 4 + i] != weight[i]:
-                                found = False
-                                break
-                            
-                if export_settings['gltf_morph']:
-                    for morph_index in range(0, morph_max):
-                        target_position = target_positions[morph_index]
-                        target_normal = target_normals[morph_index]
-                        if use_tangents:
-                            target_tangent = target_tangents[morph_index]
-                                            
-                        target_position_id = 'MORPH_POSITION_' + str(morph_index)
-                        target_normal_id = 'MORPH_NORMAL_' + str(morph_index)
-                        target_tangent_id = 'MORPH_TANGENT_' + str(morph_index)
-                        for i in range(0, 3):
-                            if attributes[target_position_id][current_new_index * 3 + i] != target_position[i]:
-                                found = False
-                                break
-                            if attributes[target_normal_id][current_new_index * 3 + i] != target_normal[i]:
-                                found = False
-                                break
-                            if use_tangents:
-                                if attributes[target_tangent_id][current_new_index * 3 + i] != target_tangent[i]:
-                                    found = False
-                                    break
-                
-                if found:
-                    indices.append(current_new_index)
-                    
-                    create = False
-                    break
-                
-            if not create:
+            if export_settings['gltf_morph']:
+                for morph_index in range(0, morph_max):
+                    vertex_key.extend(target_positions[morph_index])
+                    vertex_key.extend(target_normals[morph_index])
+                    if use_tangents:
+                        vertex_key.extend(target_tangents[morph_index])
+            
+            vertex_key = tuple(vertex_key)
+            
+            current_new_index = vertex_key_to_new_index.get(vertex_key)
+            
+            if current_new_index is not None:
+                indices.append(current_new_index)
                 continue
             
             new_index = 0
@@ -777,7 +842,7 @@ def extract_primitives(glTF, blender_mesh, blender_vertex_groups, export_setting
             
             primitive['max_index'] = new_index 
 
-            vertex_index_to_new_indices[vertex_index].append(new_index)
+            vertex_key_to_new_index[vertex_key] = new_index
             
             #
             #
@@ -791,14 +856,13 @@ def extract_primitives(glTF, blender_mesh, blender_vertex_groups, export_setting
             if use_tangents:
                 attributes['TANGENT'].extend(t)
                 
-            if blender_mesh.uv_layers.active:
-                for texcoord_index in range(0, texcoord_max):
-                    texcoord_id = 'TEXCOORD_' + str(texcoord_index)
-                    
-                    if attributes.get(texcoord_id) is None:
-                        attributes[texcoord_id] = []
-                    
-                    attributes[texcoord_id].extend(uvs[texcoord_index])
+            for texcoord_index in range(0, texcoord_max):
+                texcoord_id = 'TEXCOORD_' + str(texcoord_index)
+                
+                if attributes.get(texcoord_id) is None:
+                    attributes[texcoord_id] = []
+                
+                attributes[texcoord_id].extend(uvs[texcoord_index])
 
             if export_color:
                 for color_index in range(0, color_max):
@@ -853,64 +917,21 @@ def extract_primitives(glTF, blender_mesh, blender_vertex_groups, export_setting
     # Add primitive plus split them if needed.
     # 
     
+    range_indices = 65536
+    if export_settings['gltf_indices'] == 'UNSIGNED_BYTE':
+        range_indices = 256
+    elif export_settings['gltf_indices'] == 'UNSIGNED_INT':
+        range_indices = 4294967296
+    
     result_primitives = []
     
     for material_name, primitive in material_name_to_primitives.items():
-        export_color = True
-        if material_name in export_settings['gltf_use_no_color']: 
-            export_color = False
-
-        #
-        
         indices = primitive['indices']
         
         if len(indices) == 0:
             continue
         
-        position = primitive['attributes']['POSITION']
-        normal = primitive['attributes']['NORMAL']
-        if use_tangents:
-            tangent = primitive['attributes']['TANGENT']
-        texcoords = []
-        for texcoord_index in range(0, texcoord_max):
-            texcoords.append(primitive['attributes']['TEXCOORD_' + str(texcoord_index)])
-        colors = []
-        if export_color:
-            for color_index in range(0, color_max):
-                texcoords.append(primitive['attributes']['COLOR_' + str(color_index)])
-        joints = []
-        weights = []
-        if export_settings['gltf_skins']:
-            for bone_index in range(0, bone_max):
-                joints.append(primitive['attributes']['JOINTS_' + str(bone_index)])
-                weights.append(primitive['attributes']['WEIGHTS_' + str(bone_index)])
-         
-        target_positions = []
-        target_normals = []
-        target_tangents = []
-        if export_settings['gltf_morph']:
-            for morph_index in range(0, morph_max):
-                target_positions.append(primitive['attributes']['MORPH_POSITION_' + str(morph_index)])
-                target_normals.append(primitive['attributes']['MORPH_NORMAL_' + str(morph_index)])
-                if use_tangents:
-                    target_tangents.append(primitive['attributes']['MORPH_TANGENT_' + str(morph_index)])
-            
-        #
-        
-        count = len(indices) 
-        
-        if count == 0:
-            continue
-        
-        max_index = max(indices)
-        
-        #
-        
-        range_indices = 65536
-        if export_settings['gltf_indices'] == 'UNSIGNED_BYTE':
-            range_indices = 256
-        elif export_settings['gltf_indices'] == 'UNSIGNED_INT':
-            range_indices = 4294967296
+        max_index = primitive['max_index']
         
         # 
 
@@ -918,121 +939,11 @@ def extract_primitives(glTF, blender_mesh, blender_vertex_groups, export_setting
             #
             # Spliting result_primitives.
             #
-                    
-            # At start, all indicees are pending.
-            pending_attributes = {
-                'POSITION' : [],
-                'NORMAL' : []
-            }
-            
-            if use_tangents:
-                pending_attributes['TANGENT'] = []
-            
-            pending_primitive = {
-                'material' : material_name,
-                'indices' : [],
-                'attributes' : pending_attributes
-            }
-            
-            pending_primitive['indices'].extend(indices)
             
-                            
-            pending_attributes['POSITION'].extend(position)
-            pending_attributes['NORMAL'].extend(normal)
-            if use_tangents:
-                pending_attributes['TANGENT'].extend(tangent)
-            texcoord_index = 0
-            for texcoord in texcoords:
-                pending_attributes['TEXCOORD_' + str(texcoord_index)] = texcoord
-                texcoord_index += 1
-            if export_color:
-                color_index = 0
-                for color in colors:
-                    pending_attributes['COLOR_' + str(color_index)] = color
-                    color_index += 1 
-            if export_settings['gltf_skins']:
-                joint_index = 0
-                for joint in joints:
-                    pending_attributes['JOINTS_' + str(joint_index)] = joint
-                    joint_index += 1 
-                weight_index = 0
-                for weight in weights:
-                    pending_attributes['WEIGHTS_' + str(weight_index)] = weight
-                    weight_index += 1 
-            if export_settings['gltf_morph']:
-                morph_index = 0
-                for target_position in target_positions:
-                    pending_attributes['MORPH_POSITION_' + str(morph_index)] = target_position
-                    morph_index += 1 
-                morph_index = 0
-                for target_normal in target_normals:
-                    pending_attributes['MORPH_NORMAL_' + str(morph_index)] = target_normal
-                    morph_index += 1 
-                if use_tangents:
-                    morph_index = 0
-                    for target_tangent in target_tangents:
-                        pending_attributes['MORPH_TANGENT_' + str(morph_index)] = target_tangent
-                        morph_index += 1 
-            
-            pending_indices = pending_primitive['indices']
-            
-            # Continue until all are processed.
-            while len(pending_indices) > 0:
-                
-                process_indices = pending_primitive['indices']
-                
-                pending_indices = []
-
-                #
-                #
-                
-                all_local_indices = []
-
-                for i in range(0, (max(process_indices) // range_indices) + 1):
-                    all_local_indices.append([])
+            for current_primitive in extract_primitive_split(primitive, range_indices, use_tangents):
+                result_primitives.append(current_primitive)
                 
-                #
-                #
-                
-                # For all faces ...
-                for face_index in range(0, len(process_indices), 3):
-                    
-                    written = False
-
-                    face_min_index = min(process_indices[face_index + 0], process_indices[face_index + 1], process_indices[face_index + 2])
-                    face_max_index = max(process_indices[face_index + 0], process_indices[face_index + 1], process_indices[face_index + 2])
-
-                    # ... check if it can be but in a range of maximum indices.
-                    for i in range(0, (max(process_indices) // range_indices) + 1):
-                        offset = i * range_indices 
-                        
-                        # Yes, so store the primitive with its indices.
-                        if face_min_index >= offset and face_max_index < offset + range_indices:
-                            all_local_indices[i].extend([process_indices[face_index + 0], process_indices[face_index + 1], process_indices[face_index + 2]])
-                            
-                            written = True
-                            break
-                    
-                    # If not written, the triangel face has indices from different ranges.
-                    if not written:
-                        pending_indices.extend([process_indices[face_index + 0], process_indices[face_index + 1], process_indices[face_index + 2]])
-
-                # Only add result_primitives, which do have indices in it.
-                for local_indices in all_local_indices:
-                    if len(local_indices) > 0:
-                        current_primitive = extract_primitive_floor(pending_primitive, local_indices, use_tangents)
-                        
-                        result_primitives.append(current_primitive)
-                        
-                        print_console('DEBUG', 'Adding primitive with splitting. Indices: ' + str(len(current_primitive['indices'])) + ' Vertices: ' + str(len(current_primitive['attributes']['POSITION']) // 3))
-
-                # Process primitive faces having indices in several ranges.            
-                if len(pending_indices) > 0:
-                    pending_primitive = extract_primitive_pack(pending_primitive, pending_indices, use_tangents)
-                    
-                    pending_attributes = pending_primitive['attributes'] 
-
-                    print_console('DEBUG', 'Creating temporary primitive for splitting')
+                print_console('DEBUG', 'Adding primitive with splitting. Indices: ' + str(len(current_primitive['indices'])) + ' Vertices: ' + str(len(current_primitive['attributes']['POSITION']) // 3))
                                 
         else:
             #
@@ -35,6 +35,11 @@ def filter_apply(export_settings):
     """
     filtered_objects = []
     implicit_filtered_objects = []
+    
+    visited_objects = set()
+    
+    # Reverse index from data blocks to the first filtered object using them.
+    data_users = {}
 
     for blender_object in bpy.data.objects:
         
@@ -45,12 +50,17 @@ def filter_apply(export_settings):
             continue
         
         filtered_objects.append(blender_object)
+        visited_objects.add(blender_object)
+        
+        if blender_object.data is not None and blender_object.data not in data_users:
+            data_users[blender_object.data] = blender_object
         
         if export_settings['gltf_selected']:
             current_parent = blender_object.parent
             while current_parent:
-                if current_parent not in filtered_objects and current_parent not in implicit_filtered_objects:
+                if current_parent not in visited_objects:
                     implicit_filtered_objects.append(current_parent)
+                    visited_objects.add(current_parent)
                 
                 current_parent = current_parent.parent
 
@@ -69,50 +79,35 @@ def filter_apply(export_settings):
         
         current_blender_mesh = blender_mesh
         
-        current_blender_object = None
+        current_blender_object = data_users.get(blender_mesh)
         
-        skip = True
+        if current_blender_object is None or current_blender_object.type != 'MESH':
+            continue
         
-        for blender_object in filtered_objects:
+        use_auto_smooth = current_blender_mesh.use_auto_smooth
+        
+        if use_auto_smooth:
             
-            current_blender_object = blender_object
+            if current_blender_mesh.shape_keys is None: 
+                current_blender_object = current_blender_object.copy()
+            else:
+                use_auto_smooth = False
+                
+                print_console('WARNING', 'Auto smooth and shape keys cannot be exported in parallel. Falling back to non auto smooth.')
+        
+        if export_settings['gltf_apply'] or use_auto_smooth:
             
-            if current_blender_object.type != 'MESH':
-                continue
+            if not export_settings['gltf_apply']:
+                current_blender_object.modifiers.clear()
             
-            if current_blender_object.data == current_blender_mesh:
-                
-                skip = False
-                
-                use_auto_smooth = current_blender_mesh.use_auto_smooth
-                
-                if use_auto_smooth:
-                    
-                    if current_blender_mesh.shape_keys is None: 
-                        current_blender_object = current_blender_object.copy()
-                    else:
-                        use_auto_smooth = False
-                        
-                        print_console('WARNING', 'Auto smooth and shape keys cannot be exported in parallel. Falling back to non auto smooth.')
-                
-                if export_settings['gltf_apply'] or use_auto_smooth:
-                    
-                    if not export_settings['gltf_apply']:
-                        current_blender_object.modifiers.clear()
-                    
-                    if use_auto_smooth:
-                        blender_modifier = current_blender_object.modifiers.new('Temporary_Auto_Smooth', 'EDGE_SPLIT')
-                    
-                        blender_modifier.split_angle = current_blender_mesh.auto_smooth_angle
-                        blender_modifier.use_edge_angle = current_blender_mesh.has_custom_normals == False
+            if use_auto_smooth:
+                blender_modifier = current_blender_object.modifiers.new('Temporary_Auto_Smooth', 'EDGE_SPLIT')
+            
+                blender_modifier.split_angle = current_blender_mesh.auto_smooth_angle
+                blender_modifier.use_edge_angle = current_blender_mesh.has_custom_normals == False
 
-                    current_blender_mesh = current_blender_object.to_mesh(bpy.context.scene, True, 'PREVIEW')
-                    temporary_meshes.append(current_blender_mesh)
-                
-                break
-        
-        if skip:
-            continue
+            current_blender_mesh = current_blender_object.to_mesh(bpy.context.scene, True, 'PREVIEW')
+            temporary_meshes.append(current_blender_mesh)
             
         filtered_meshes[blender_mesh.name] = current_blender_mesh
         filtered_vertex_groups[blender_mesh.name] = current_blender_object.vertex_groups
@@ -124,37 +119,18 @@ def filter_apply(export_settings):
         if blender_curve.users == 0:
             continue
         
-        current_blender_curve = blender_curve
-
-        current_blender_mesh = None
-    
-        current_blender_object = None
+        current_blender_object = data_users.get(blender_curve)
         
-        skip = True
+        if current_blender_object is None or current_blender_object.type != 'CURVE':
+            continue
         
-        for blender_object in filtered_objects:
-            
-            current_blender_object = blender_object
-            
-            if current_blender_object.type != 'CURVE':
-                continue
-            
-            if current_blender_object.data == current_blender_curve:
-
-                skip = False
-                
-                current_blender_object = current_blender_object.copy()
-                
-                if not export_settings['gltf_apply']:
-                    current_blender_object.modifiers.clear()
-                
-                current_blender_mesh = current_blender_object.to_mesh(bpy.context.scene, True, 'PREVIEW')
-                temporary_meshes.append(current_blender_mesh)
-                
-                break
+        current_blender_object = current_blender_object.copy()
         
-        if skip:
-            continue
+        if not export_settings['gltf_apply']:
+            current_blender_object.modifiers.clear()
+        
+        current_blender_mesh = current_blender_object.to_mesh(bpy.context.scene, True, 'PREVIEW')
+        temporary_meshes.append(current_blender_mesh)
             
         filtered_meshes[blender_curve.name] = current_blender_mesh
         filtered_vertex_groups[blender_curve.name] = current_blender_object.vertex_groups
@@ -167,28 +143,51 @@ def filter_apply(export_settings):
     
     #
 
+    # Materials used by the filtered meshes and materials linked to the filtered objects.
+    
+    mesh_materials = set()
+    
+    for mesh_name, blender_mesh in filtered_meshes.items():
+        mesh_materials.update(blender_mesh.materials)
+    
+    object_materials = []
+    
+    for blender_object in filtered_objects:
+        if blender_object.material_slots:
+            for blender_material_slot in blender_object.material_slots:
+                if blender_material_slot.link == 'DATA':
+                    continue
+                
+                object_materials.append(blender_material_slot.material)
+    
+    #
+
     filtered_materials = []
+    
+    added_materials = set()
+    
+    added_object_materials = False
 
     for blender_material in get_used_materials():
         
         if blender_material.users == 0:
             continue
         
-        for mesh_name, blender_mesh in filtered_meshes.items():
-            for compare_blender_material in blender_mesh.materials:
-                if compare_blender_material == blender_material and blender_material not in filtered_materials:
-                    filtered_materials.append(blender_material)
+        if blender_material in mesh_materials and blender_material not in added_materials:
+            filtered_materials.append(blender_material)
+            added_materials.add(blender_material)
         
         #
 
-        for blender_object in filtered_objects:
-            if blender_object.material_slots:
-                for blender_material_slot in blender_object.material_slots:
-                    if blender_material_slot.link == 'DATA':
-                        continue
-                    
-                    if blender_material_slot.material not in filtered_materials:
-                        filtered_materials.append(blender_material_slot.material)
+        if added_object_materials:
+            continue
+        
+        for object_material in object_materials:
+            if object_material not in added_materials:
+                filtered_materials.append(object_material)
+                added_materials.add(object_material)
+        
+        added_object_materials = True
                     
     export_settings['filtered_materials'] = filtered_materials                
 
@@ -274,29 +273,36 @@ def filter_apply(export_settings):
     #
 
     filtered_images = []
+    
+    added_images = set()
 
     for blender_texture in filtered_textures:
         
         if isinstance(blender_texture, bpy.types.ShaderNodeTexImage):
-            if blender_texture.image is not None and blender_texture.image not in filtered_images and blender_texture.image.users != 0 and blender_texture.image.size[0] > 0 and blender_texture.image.size[1] > 0:
+            if blender_texture.image is not None and blender_texture.image not in added_images and blender_texture.image.users != 0 and blender_texture.image.size[0] > 0 and blender_texture.image.size[1] > 0:
                 
                 if blender_texture.image.filepath == '':
                     blender_texture.image.filepath = 'glTF_Generated_' + blender_texture.image.name + '.png'
                 
                 filtered_images.append(blender_texture.image)
+                added_images.add(blender_texture.image)
         else:
-            if blender_texture.texture.image is not None and blender_texture.texture.image not in filtered_images and blender_texture.texture.image.users != 0 and blender_texture.texture.image.size[0] > 0 and blender_texture.texture.image.size[1] > 0:
+            if blender_texture.texture.image is not None and blender_texture.texture.image not in added_images and blender_texture.texture.image.users != 0 and blender_texture.texture.image.size[0] > 0 and blender_texture.texture.image.size[1] > 0:
                 
                 if blender_texture.texture.image.filepath == '':
                     blender_texture.texture.image.filepath = 'glTF_Generated_' + blender_texture.texture.image.name + '.png'
 
                 filtered_images.append(blender_texture.texture.image)
+                added_images.add(blender_texture.texture.image)
                     
     export_settings['filtered_images'] = filtered_images
     
     #
+    # Explicitly filtered objects, so cameras and lamps are looked up in constant time.
     #
     
+    filtered_object_set = set(filtered_objects)
+    
     filtered_cameras = []
     
     for blender_camera in bpy.data.cameras:
@@ -305,7 +311,7 @@ def filter_apply(export_settings):
             continue
         
         if export_settings['gltf_selected']:
-            if blender_camera not in filtered_objects:
+            if blender_camera not in filtered_object_set:
                 continue 
         
         filtered_cameras.append(blender_camera)
@@ -323,7 +329,7 @@ def filter_apply(export_settings):
             continue
 
         if export_settings['gltf_selected']:
-            if blender_light not in filtered_objects:
+            if blender_light not in filtered_object_set:
                 continue 
 
         if blender_light.type == 'AREA' or blender_light.type == 'HEMI':
@@ -344,7 +350,7 @@ def filter_apply(export_settings):
             continue
 
         if export_settings['gltf_selected']:
-            if blender_light not in filtered_objects:
+            if blender_light not in filtered_object_set:
                 continue 
 
         if blender_light.type == 'AREA' or blender_light.type == 'HEMI':
@@ -385,3 +391,29 @@ def filter_apply(export_settings):
                 group_index[blender_bone.name] = len(group_index)
 
     export_settings['group_index'] = group_index
+    
+    #
+    # Skinned objects per armature in order of their skins. Children of the armature come first.
+    #
+    
+    skinned_children = {}
+    
+    if export_settings['gltf_skins']:
+        for blender_object in filtered_objects:
+            if blender_object.type != 'ARMATURE' or len(blender_object.pose.bones) == 0:
+                continue
+            
+            skinned_children[blender_object] = list(blender_object.children)
+        
+        armature_children = {blender_armature : set(children) for blender_armature, children in skinned_children.items()}
+        
+        for blender_object in filtered_objects:
+            blender_armature = blender_object.find_armature()
+            
+            if blender_armature not in skinned_children or blender_object in armature_children[blender_armature]:
+                continue
+            
+            skinned_children[blender_armature].append(blender_object)
+            armature_children[blender_armature].add(blender_object)
+    
+    export_settings['skinned_children'] = skinned_children
@@ -16,16 +16,18 @@
 # Imports
 #
 
-import base64
 import bpy
 import copy
+import os
 
 from .gltf2_animate import *
+from .gltf2_cache import *
 from .gltf2_create import *
 from .gltf2_debug import *
 from .gltf2_extract import *
 from .gltf2_filter import *
 from .gltf2_get import *
+from .gltf2_optimize import *
 
 #
 # Globals
@@ -65,50 +67,50 @@ def generate_asset(operator,
     glTF['asset'] = asset
 
 
-def generate_animations_parameter(operator,
+def generate_animations_input(operator,
                   context,
                   export_settings,
                   glTF,
                   action,
-                  channels,
-                  samplers,
-                  blender_node_name,
+                  final_keys):
+    """
+    Helper function for the sampler input. Samplers of the same action and with the same keys share one accessor.
+    """
+    
+    time_grid_key = (action.name, tuple(final_keys))
+    
+    input = export_settings['gltf_time_grids'].get(time_grid_key)
+    
+    if input is None:
+        componentType = "FLOAT"
+        count = len(final_keys)
+        type = "SCALAR"
+        
+        input = create_accessor(operator, context, export_settings, glTF, final_keys, componentType, count, type, "")
+        
+        export_settings['gltf_time_grids'][time_grid_key] = input
+    
+    return input
+
+
+def generate_animations_fcurves(action,
                   blender_bone_name,
-                  rotation_mode,
-                  matrix_correction,
-                  matrix_basis,
                   is_morph_data):
     """
-    Helper function for storing animation parameters.
+    Helper function for gathering the fcurves of an action by transform.
+    Returns the fcurves by data path and the prefix and postfix of the sampler names.
     """
     
-    name = blender_node_name
-    
     prefix = ""
     postfix = ""
     
-    node_type = 'NODE'
-    used_node_name = blender_node_name 
-    if blender_bone_name is not None:
-        node_type = 'JOINT'
-        used_node_name = blender_bone_name
-
-    #
-        
-    location = [None, None, None]
-    rotation_axis_angle = [None, None, None, None]
-    rotation_euler = [None, None, None]
-    rotation_quaternion = [None, None, None, None]
-    scale = [None, None, None]
-    value = []
-    
     data = {
-        'location' : location,
-        'rotation_axis_angle' : rotation_axis_angle,
-        'rotation_euler' : rotation_euler,
-        'rotation_quaternion' : rotation_quaternion,
-        'scale' : scale,
-        'value' : value
+        'location' : [None, None, None],
+        'rotation_axis_angle' : [None, None, None, None],
+        'rotation_euler' : [None, None, None],
+        'rotation_quaternion' : [None, None, None, None],
+        'scale' : [None, None, None],
+        'value' : []
     }
     
     # Gather fcurves by transform
@@ -134,13 +136,87 @@ def generate_animations_parameter(operator,
         else:
             data[data_path].append(blender_fcurve)
     
+    return data, prefix, postfix
+
+
+def generate_animations_joint_keys(export_settings,
+                  blender_armatures):
+    """
+    Helper function for gathering the key frames of all joint samplers per armature.
+    The keys are gathered like for the samplers, so the sampled joint transformations are found by the same keys.
+    """
+    
+    armature_keys = {}
+    
+    for blender_armature in blender_armatures:
+        blender_action = blender_armature.animation_data.action
+        
+        keys = set()
+        
+        for blender_bone in blender_armature.pose.bones:
+            data, prefix, postfix = generate_animations_fcurves(blender_action, blender_bone.name, False)
+            
+            for data_path in ['location', 'rotation_axis_angle', 'rotation_euler', 'rotation_quaternion', 'scale']:
+                fcurve_list = data[data_path]
+                
+                if fcurve_list.count(None) == len(fcurve_list):
+                    continue
+                
+                # Joints are never exported as cubic spline.
+                interpolation = animate_get_interpolation(export_settings, fcurve_list)
+                if interpolation == 'CUBICSPLINE':
+                    interpolation = 'CONVERSION_NEEDED'
+                
+                keys.update(animate_gather_keys(export_settings, fcurve_list, interpolation))
+        
+        armature_keys[blender_armature.name] = sorted(keys)
+    
+    return armature_keys
+
+
+def generate_animations_parameter(operator,
+                  context,
+                  export_settings,
+                  glTF,
+                  action,
+                  channels,
+                  samplers,
+                  blender_node_name,
+                  blender_bone_name,
+                  rotation_mode,
+                  matrix_correction,
+                  matrix_basis,
+                  is_morph_data):
+    """
+    Helper function for storing animation parameters.
+    """
+    
+    name = blender_node_name
+    
+    node_type = 'NODE'
+    used_node_name = blender_node_name 
+    if blender_bone_name is not None:
+        node_type = 'JOINT'
+        used_node_name = blender_bone_name
+
+    #
+    
+    data, prefix, postfix = generate_animations_fcurves(action, blender_bone_name, is_morph_data)
+        
+    location = data['location']
+    rotation_axis_angle = data['rotation_axis_angle']
+    rotation_euler = data['rotation_euler']
+    rotation_quaternion = data['rotation_quaternion']
+    scale = data['scale']
+    value = data['value']
+    
     #
 
     if location.count(None) < 3:
         
         sampler_name = prefix + action.name + "_translation"
         
-        if get_index(samplers, sampler_name) == -1:
+        if get_index(export_settings, samplers, sampler_name) == -1:
             
             sampler = {}
             
@@ -154,7 +230,7 @@ def generate_animations_parameter(operator,
             if interpolation == 'CONVERSION_NEEDED':
                 sampler['interpolation'] = 'LINEAR'
             
-            translation_data, in_tangent_data, out_tangent_data = animate_location(export_settings, location, interpolation, node_type, used_node_name, matrix_correction, matrix_basis)
+            translation_data, in_tangent_data, out_tangent_data = animate_location(export_settings, location, interpolation, node_type, blender_node_name, used_node_name, matrix_correction, matrix_basis)
             
             #
             
@@ -181,31 +257,33 @@ def generate_animations_parameter(operator,
                     for i in range(0, 3):
                         values.append(out_tangent_data[key][i])
             
-            #
+            if export_settings['gltf_reduce_keys'] and sampler['interpolation'] == 'LINEAR':
+                final_keys, values = animate_reduce_keys(final_keys, values, 3, False, export_settings['gltf_reduce_tolerance_translation'])
             
-            componentType = "FLOAT"
-            count = len(final_keys)
-            type = "SCALAR"
+            #
             
-            input = create_accessor(operator, context, export_settings, glTF, final_keys, componentType, count, type, "")
+            if export_settings['gltf_drop_constant'] and animate_is_constant(values, 3, interpolation == 'CUBICSPLINE', get_node_default(export_settings, glTF, name + postfix, 'translation'), False):
+                export_settings['gltf_dropped_channels'] += 1
+            else:
+                input = generate_animations_input(operator, context, export_settings, glTF, action, final_keys)
             
-            sampler['input'] = input
+                sampler['input'] = input
             
-            #
+                #
     
-            componentType = "FLOAT"
-            count = len(values) // 3
-            type = "VEC3"
+                componentType = "FLOAT"
+                count = len(values) // 3
+                type = "VEC3"
             
-            output = create_accessor(operator, context, export_settings, glTF, values, componentType, count, type, "")
+                output = create_accessor(operator, context, export_settings, glTF, values, componentType, count, type, "")
             
-            sampler['output'] = output
+                sampler['output'] = output
             
-            #
+                #
     
-            sampler['name'] = sampler_name
+                sampler['name'] = sampler_name
             
-            samplers.append(sampler)  
+                samplers.append(sampler)  
 
     #
     #
@@ -217,26 +295,26 @@ def generate_animations_parameter(operator,
     
     sampler_name = prefix + action.name + "_rotation"
 
-    if get_index(samplers, sampler_name) == -1:
+    if get_index(export_settings, samplers, sampler_name) == -1:
         if rotation_axis_angle.count(None) < 4:
             interpolation = animate_get_interpolation(export_settings, rotation_axis_angle)
             # Conversion required in any case.
             if interpolation == 'CUBICSPLINE':
                 interpolation = 'CONVERSION_NEEDED'
-            rotation_data = animate_rotation_axis_angle(export_settings, rotation_axis_angle, interpolation, node_type, used_node_name, matrix_correction, matrix_basis)
+            rotation_data = animate_rotation_axis_angle(export_settings, rotation_axis_angle, interpolation, node_type, blender_node_name, used_node_name, matrix_correction, matrix_basis)
         
         if rotation_euler.count(None) < 3:
             interpolation = animate_get_interpolation(export_settings, rotation_euler)
             # Conversion required in any case.
             if interpolation == 'CUBICSPLINE':
                 interpolation = 'CONVERSION_NEEDED'
-            rotation_data = animate_rotation_euler(export_settings, rotation_euler, rotation_mode, interpolation, node_type, used_node_name, matrix_correction, matrix_basis)
+            rotation_data = animate_rotation_euler(export_settings, rotation_euler, rotation_mode, interpolation, node_type, blender_node_name, used_node_name, matrix_correction, matrix_basis)
 
         if rotation_quaternion.count(None) < 4:
             interpolation = animate_get_interpolation(export_settings, rotation_quaternion)
             if interpolation == 'CUBICSPLINE' and node_type == 'JOINT':
                 interpolation = 'CONVERSION_NEEDED'
-            rotation_data, rotation_in_tangent_data, rotation_out_tangent_data = animate_rotation_quaternion(export_settings, rotation_quaternion, interpolation, node_type, used_node_name, matrix_correction, matrix_basis)
+            rotation_data, rotation_in_tangent_data, rotation_out_tangent_data = animate_rotation_quaternion(export_settings, rotation_quaternion, interpolation, node_type, blender_node_name, used_node_name, matrix_correction, matrix_basis)
         
     if rotation_data is not None:
         
@@ -265,41 +343,43 @@ def generate_animations_parameter(operator,
                 for i in range(0, 4):
                     values.append(rotation_out_tangent_data[key][i])
 
+        if export_settings['gltf_reduce_keys'] and (interpolation == 'LINEAR' or interpolation == 'CONVERSION_NEEDED'):
+            final_keys, values = animate_reduce_keys(final_keys, values, 4, True, export_settings['gltf_reduce_tolerance_rotation'])
+
         #
 
         sampler = {}
 
         #
         
-        componentType = "FLOAT"
-        count = len(final_keys)
-        type = "SCALAR"
-        
-        input = create_accessor(operator, context, export_settings, glTF, final_keys, componentType, count, type, "")
+        if export_settings['gltf_drop_constant'] and animate_is_constant(values, 4, interpolation == 'CUBICSPLINE', get_node_default(export_settings, glTF, name + postfix, 'rotation'), True):
+            export_settings['gltf_dropped_channels'] += 1
+        else:
+            input = generate_animations_input(operator, context, export_settings, glTF, action, final_keys)
         
-        sampler['input'] = input
+            sampler['input'] = input
         
-        #
+            #
 
-        componentType = "FLOAT"
-        count = len(values) // 4
-        type = "VEC4"
+            componentType = "FLOAT"
+            count = len(values) // 4
+            type = "VEC4"
         
-        output = create_accessor(operator, context, export_settings, glTF, values, componentType, count, type, "")
+            output = create_accessor(operator, context, export_settings, glTF, values, componentType, count, type, "")
         
-        sampler['output'] = output
+            sampler['output'] = output
         
-        #
+            #
         
-        sampler['interpolation'] = interpolation
-        if interpolation == 'CONVERSION_NEEDED':
-            sampler['interpolation'] = 'LINEAR'
+            sampler['interpolation'] = interpolation
+            if interpolation == 'CONVERSION_NEEDED':
+                sampler['interpolation'] = 'LINEAR'
         
-        #
+            #
 
-        sampler['name'] = sampler_name
+            sampler['name'] = sampler_name
         
-        samplers.append(sampler) 
+            samplers.append(sampler) 
     
     #
     #
@@ -307,7 +387,7 @@ def generate_animations_parameter(operator,
     if scale.count(None) < 3:
         sampler_name = prefix + action.name + "_scale"
     
-        if get_index(samplers, sampler_name) == -1:
+        if get_index(export_settings, samplers, sampler_name) == -1:
 
             sampler = {}
             
@@ -321,7 +401,7 @@ def generate_animations_parameter(operator,
             if interpolation == 'CONVERSION_NEEDED':
                 sampler['interpolation'] = 'LINEAR'
             
-            scale_data, in_tangent_data, out_tangent_data = animate_scale(export_settings, scale, interpolation, node_type, used_node_name, matrix_correction, matrix_basis)
+            scale_data, in_tangent_data, out_tangent_data = animate_scale(export_settings, scale, interpolation, node_type, blender_node_name, used_node_name, matrix_correction, matrix_basis)
 
             #
 
@@ -348,31 +428,33 @@ def generate_animations_parameter(operator,
                     for i in range(0, 3):
                         values.append(out_tangent_data[key][i])
     
+            if export_settings['gltf_reduce_keys'] and sampler['interpolation'] == 'LINEAR':
+                final_keys, values = animate_reduce_keys(final_keys, values, 3, False, export_settings['gltf_reduce_tolerance_scale'])
+    
             #
             
-            componentType = "FLOAT"
-            count = len(final_keys)
-            type = "SCALAR"
+            if export_settings['gltf_drop_constant'] and animate_is_constant(values, 3, interpolation == 'CUBICSPLINE', get_node_default(export_settings, glTF, name + postfix, 'scale'), False):
+                export_settings['gltf_dropped_channels'] += 1
+            else:
+                input = generate_animations_input(operator, context, export_settings, glTF, action, final_keys)
             
-            input = create_accessor(operator, context, export_settings, glTF, final_keys, componentType, count, type, "")
+                sampler['input'] = input
             
-            sampler['input'] = input
-            
-            #
+                #
 
-            componentType = "FLOAT"
-            count = len(values) // 3
-            type = "VEC3"
+                componentType = "FLOAT"
+                count = len(values) // 3
+                type = "VEC3"
             
-            output = create_accessor(operator, context, export_settings, glTF, values, componentType, count, type, "")
+                output = create_accessor(operator, context, export_settings, glTF, values, componentType, count, type, "")
             
-            sampler['output'] = output
+                sampler['output'] = output
             
-            #
+                #
 
-            sampler['name'] = sampler_name
+                sampler['name'] = sampler_name
             
-            samplers.append(sampler)
+                samplers.append(sampler)
             
     #
     #  
@@ -380,7 +462,7 @@ def generate_animations_parameter(operator,
     if len(value) > 0 and is_morph_data:
         sampler_name = prefix + action.name + "_weights"
     
-        if get_index(samplers, sampler_name) == -1:
+        if get_index(export_settings, samplers, sampler_name) == -1:
             
             sampler = {}
             
@@ -394,7 +476,7 @@ def generate_animations_parameter(operator,
             if interpolation == 'CONVERSION_NEEDED':
                 sampler['interpolation'] = 'LINEAR'
             
-            value_data, in_tangent_data, out_tangent_data = animate_value(export_settings, value, interpolation, node_type, used_node_name, matrix_correction, matrix_basis)
+            value_data, in_tangent_data, out_tangent_data = animate_value(export_settings, value, interpolation, node_type, blender_node_name, used_node_name, matrix_correction, matrix_basis)
 
             #
 
@@ -421,31 +503,37 @@ def generate_animations_parameter(operator,
                     for i in range(0, len(out_tangent_data[key])):
                         values.append(out_tangent_data[key][i])
     
+            if export_settings['gltf_reduce_keys'] and sampler['interpolation'] == 'LINEAR' and len(final_keys) > 0:
+                final_keys, values = animate_reduce_keys(final_keys, values, len(values) // len(final_keys), False, export_settings['gltf_reduce_tolerance_weights'])
+    
             #
             
-            componentType = "FLOAT"
-            count = len(final_keys)
-            type = "SCALAR"
+            weights_count = 0
+            if len(final_keys) > 0:
+                weights_count = len(value_data[keys[-1]])
             
-            input = create_accessor(operator, context, export_settings, glTF, final_keys, componentType, count, type, "")
+            if export_settings['gltf_drop_constant'] and animate_is_constant(values, weights_count, interpolation == 'CUBICSPLINE', get_node_default(export_settings, glTF, name + postfix, 'weights'), False):
+                export_settings['gltf_dropped_channels'] += 1
+            else:
+                input = generate_animations_input(operator, context, export_settings, glTF, action, final_keys)
             
-            sampler['input'] = input
+                sampler['input'] = input
             
-            #
+                #
 
-            componentType = "FLOAT"
-            count = len(values)
-            type = "SCALAR"
+                componentType = "FLOAT"
+                count = len(values)
+                type = "SCALAR"
             
-            output = create_accessor(operator, context, export_settings, glTF, values, componentType, count, type, "")
+                output = create_accessor(operator, context, export_settings, glTF, values, componentType, count, type, "")
             
-            sampler['output'] = output
+                sampler['output'] = output
             
-            #
+                #
 
-            sampler['name'] = sampler_name
+                sampler['name'] = sampler_name
             
-            samplers.append(sampler)
+                samplers.append(sampler)
 
     #
     #
@@ -492,7 +580,12 @@ def generate_animations_parameter(operator,
             
             sampler_name = prefix + action.name + "_" + path
             
-            channel['sampler'] = get_index(samplers, sampler_name)
+            channel['sampler'] = get_index(export_settings, samplers, sampler_name)
+            
+            # Sampler has been dropped, as the channel is constant.
+            if channel['sampler'] < 0:
+                write_transform_index += 1
+                continue
             
             #
             #
@@ -503,7 +596,7 @@ def generate_animations_parameter(operator,
             
             target_name = name + postfix 
             
-            target['node'] = get_node_index(glTF, target_name)
+            target['node'] = get_node_index(export_settings, glTF, target_name)
             
             channel['target'] = target
             
@@ -531,6 +624,8 @@ def generate_animations(operator,
     
     samplers = []
     
+    export_settings['gltf_dropped_channels'] = 0
+    
     #
     #
     
@@ -577,6 +672,25 @@ def generate_animations(operator,
             
             bpy.ops.nla.bake(frame_start=start, frame_end=end, only_selected=False, visual_keying=True, clear_constraints=False, use_current_action=False, bake_types={'POSE'})
     
+    #
+    # Precalculate joint animation data of all armatures in one pass over the frames.
+    #
+    
+    if export_settings['gltf_skins']:
+        blender_armatures = []
+        
+        for blender_object in filtered_objects:
+            if blender_object.type != 'ARMATURE' or len(blender_object.pose.bones) == 0:
+                continue
+            
+            if blender_object.animation_data is None or blender_object.animation_data.action is None:
+                continue
+            
+            blender_armatures.append(blender_object)
+        
+        if len(blender_armatures) > 0:
+            animate_sample_joints(export_settings, blender_armatures, generate_animations_joint_keys(export_settings, blender_armatures))
+    
     #
     #
     
@@ -602,77 +716,13 @@ def generate_animations(operator,
                 
                 #
                 
-                axis_basis_change = mathutils.Matrix(((1.0, 0.0, 0.0, 0.0), (0.0, 0.0, 1.0, 0.0), (0.0, -1.0, 0.0, 0.0) , (0.0, 0.0, 0.0, 1.0)))
-                
-                # Precalculate joint animation data.
-                
-                start = None
-                end = None
-                
-                for current_blender_action in bpy.data.actions:
-                    for current_blender_fcurve in current_blender_action.fcurves:
-                        if current_blender_fcurve is None:
-                            continue
-                        
-                        if start == None:
-                            start = current_blender_fcurve.range()[0]
-                        else:
-                            start = min(start, current_blender_fcurve.range()[0])
-                            
-                        if end == None:
-                            end = current_blender_fcurve.range()[1]
-                        else:
-                            end = max(end, current_blender_fcurve.range()[1])
-                
-                if start is None or end is None:
-                    start = bpy.context.scene.frame_start
-                    end = bpy.context.scene.frame_end
-                
-                #
-
-                for frame in range(int(start), int(end) + 1):
-                    bpy.context.scene.frame_set(frame)
-                    
-                    for blender_bone in blender_object.pose.bones:
-                    
-                        matrix_basis = blender_bone.matrix_basis
-                        
-                        #
-    
-                        correction_matrix_local = mathutils.Matrix.Identity(4)
-                    
-                        if blender_bone.parent is None:
-                            correction_matrix_local = axis_basis_change * blender_bone.bone.matrix_local
-                        else:
-                            correction_matrix_local = blender_bone.parent.bone.matrix_local.inverted() * blender_bone.bone.matrix_local
-                            
-                        #
-                        if not export_settings['gltf_joint_cache'].get(blender_bone.name):
-                            export_settings['gltf_joint_cache'][blender_bone.name] = {}
-                        
-                        if export_settings['gltf_bake_skins']:
-                            matrix_basis = blender_object.convert_space(blender_bone, blender_bone.matrix, from_space='POSE', to_space='LOCAL')
-                        
-                        matrix = correction_matrix_local * matrix_basis 
-            
-                        tmp_location, tmp_rotation, tmp_scale = matrix.decompose()
-                        
-                        export_settings['gltf_joint_cache'][blender_bone.name][float(frame)] = [tmp_location, tmp_rotation, tmp_scale]
-                        
-                #
-
                 for blender_bone in blender_object.pose.bones:
                     
                     matrix_basis = blender_bone.matrix_basis
                     
                     #
 
-                    correction_matrix_local = mathutils.Matrix.Identity(4)
-                
-                    if blender_bone.parent is None:
-                        correction_matrix_local = axis_basis_change * blender_bone.bone.matrix_local
-                    else:
-                        correction_matrix_local = blender_bone.parent.bone.matrix_local.inverted() * blender_bone.bone.matrix_local
+                    correction_matrix_local = animate_joint_correction(blender_bone)
                     
                     #
                     
@@ -724,6 +774,9 @@ def generate_animations(operator,
             if blender_backup_action.get(blender_object.name) is not None:
                 blender_object.animation_data.action = blender_backup_action[blender_object.name]
     
+    if export_settings['gltf_dropped_channels'] > 0:
+        print_console('DEBUG', 'Dropped constant animation channels: ' + str(export_settings['gltf_dropped_channels']))
+    
     #
     #
 
@@ -1080,6 +1133,9 @@ def generate_meshes(operator,
         
         internal_primitives = extract_primitives(glTF, blender_mesh, filtered_vertex_groups[name], export_settings)
         
+        if export_settings['gltf_optimize_cache']:
+            internal_primitives = optimize_primitives(internal_primitives, name)
+        
         if len(internal_primitives) == 0:
             continue
         
@@ -1101,7 +1157,7 @@ def generate_meshes(operator,
             #
             
             if export_settings['gltf_materials']:
-                material = get_material_index(glTF, internal_primitive['material'])
+                material = get_material_index(export_settings, glTF, internal_primitive['material'])
 
                 if get_material_requires_texcoords(glTF, material) and not export_settings['gltf_texcoords']:
                     material = -1
@@ -1481,7 +1537,7 @@ def generate_dublicate_mesh(operator,
     if blender_object is None:
         return -1
     
-    mesh_index = get_mesh_index(glTF, blender_object.data.name)
+    mesh_index = get_mesh_index(export_settings, glTF, blender_object.data.name)
     
     if mesh_index == -1:
         return False
@@ -1495,7 +1551,7 @@ def generate_dublicate_mesh(operator,
     primitive_index = 0
     for blender_material_slot in blender_object.material_slots:
         if blender_material_slot.link == 'OBJECT':
-            primitives[primitive_index]['material'] = get_material_index(glTF, blender_material_slot.material.name)
+            primitives[primitive_index]['material'] = get_material_index(export_settings, glTF, blender_material_slot.material.name)
             
         primitive_index += 1
 
@@ -1507,7 +1563,7 @@ def generate_dublicate_mesh(operator,
     
     glTF['meshes'].append(new_mesh)
     
-    return get_mesh_index(glTF, new_name)
+    return get_mesh_index(export_settings, glTF, new_name)
 
 
 def generate_node_parameter(operator,
@@ -1572,7 +1628,7 @@ def generate_node_instance(operator,
         #
         
         if blender_object.type == 'MESH' or blender_object.type == 'CURVE':
-                mesh = get_mesh_index(glTF, blender_object.data.name)
+                mesh = get_mesh_index(export_settings, glTF, blender_object.data.name)
                 
                 if mesh >= 0:
                     
@@ -1597,7 +1653,7 @@ def generate_node_instance(operator,
         
         if export_settings['gltf_cameras']:
             if blender_object.type == 'CAMERA':
-                camera = get_camera_index(glTF, blender_object.data.name)
+                camera = get_camera_index(export_settings, glTF, blender_object.data.name)
                 
                 if camera >= 0:
                     # Add correction node for camera, as default direction is different to Blender.
@@ -1613,7 +1669,7 @@ def generate_node_instance(operator,
     
         if export_settings['gltf_lights_cmn']:
             if blender_object.type == 'LAMP':
-                light = get_light_index_cmn(glTF, blender_object.data.name)
+                light = get_light_index_cmn(export_settings, glTF, blender_object.data.name)
                 if light >= 0:
                     khr_lights_cmn = {'light' : light}
                     extensions = {'KHR_lights_cmn' : khr_lights_cmn}
@@ -1630,7 +1686,7 @@ def generate_node_instance(operator,
 
         if export_settings['gltf_lights_pbr']:
             if blender_object.type == 'LAMP':
-                light = get_light_index_pbr(glTF, blender_object.data.name)
+                light = get_light_index_pbr(export_settings, glTF, blender_object.data.name)
                 if light >= 0:
                     khr_lights_pbr = {'light' : light}
                     extensions = {'KHR_lights_pbr' : khr_lights_pbr}
@@ -1673,6 +1729,9 @@ def generate_nodes(operator,
     nodes = []
     
     skins = []
+    
+    # Skin index by armature and skinned object.
+    object_skins = {}
 
     #
     #
@@ -1751,27 +1810,31 @@ def generate_nodes(operator,
             
             #
             
-            children_list = list(blender_object.children)
+            axis_basis_change = mathutils.Matrix(((1.0, 0.0, 0.0, 0.0), (0.0, 0.0, 1.0, 0.0), (0.0, -1.0, 0.0, 0.0) , (0.0, 0.0, 0.0, 1.0))) 
             
-            for blender_check_object in filtered_objects:
-                blender_check_armature = blender_check_object.find_armature()
-                
-                if blender_check_armature is not None and blender_check_object not in children_list:
-                    children_list.append(blender_check_object)
+            # Skin index by bind shape matrix of the children.
+            bind_shape_skins = {}
             
             #
     
-            for blender_object_child in children_list:
+            for blender_object_child in export_settings['skinned_children'][blender_object]:
                 #
                 # Property: skin and node
                 #
                 
+                bind_shape_matrix = axis_basis_change * blender_object.matrix_world.inverted() * blender_object_child.matrix_world * axis_basis_change.inverted() 
+                
+                bind_shape_key = tuple(tuple(row) for row in bind_shape_matrix)
+                
+                # Children with the same bind shape matrix have equal inverse bind matrices and share one skin.
+                if export_settings['gltf_share_skins'] and bind_shape_key in bind_shape_skins:
+                    object_skins[(blender_object, blender_object_child)] = bind_shape_skins[bind_shape_key]
+                    continue
+                
                 inverse_matrices = []
                 
                 for blender_bone in blender_object.pose.bones:
         
-                    axis_basis_change = mathutils.Matrix(((1.0, 0.0, 0.0, 0.0), (0.0, 0.0, 1.0, 0.0), (0.0, -1.0, 0.0, 0.0) , (0.0, 0.0, 0.0, 1.0))) 
-
                     if not joints_written:                    
                         node = {}
                     
@@ -1805,8 +1868,6 @@ def generate_nodes(operator,
                     
                     inverse_bind_matrix = axis_basis_change * blender_bone.bone.matrix_local
 
-                    bind_shape_matrix = axis_basis_change * blender_object.matrix_world.inverted() * blender_object_child.matrix_world * axis_basis_change.inverted() 
-                    
                     inverse_bind_matrix = inverse_bind_matrix.inverted() * bind_shape_matrix
                     
                     for column in range(0, 4):
@@ -1821,7 +1882,7 @@ def generate_nodes(operator,
                     
                 skin = {}
                 
-                skin['skeleton'] = get_node_index(glTF, blender_object.name)
+                skin['skeleton'] = get_node_index(export_settings, glTF, blender_object.name)
 
                 skin['joints'] = joints
                 
@@ -1837,6 +1898,10 @@ def generate_nodes(operator,
                 
                 #
                 
+                bind_shape_skins[bind_shape_key] = len(skins)
+                
+                object_skins[(blender_object, blender_object_child)] = len(skins)
+                
                 skins.append(skin)
             
             #
@@ -1857,7 +1922,7 @@ def generate_nodes(operator,
     #
 
     for blender_object in filtered_objects:
-        node_index = get_node_index(glTF, blender_object.name)
+        node_index = get_node_index(export_settings, glTF, blender_object.name)
         
         node = nodes[node_index]
         
@@ -1865,26 +1930,8 @@ def generate_nodes(operator,
         
         if export_settings['gltf_skins']:
             blender_armature = blender_object.find_armature()
-            if blender_armature is not None:
-                index_offset = 0
-                
-                if blender_object in blender_armature.children:
-                    index_offset = blender_armature.children.index(blender_object)
-                else:
-                    index_local_offset = 0
-                    
-                    for blender_check_object in filtered_objects:
-                        blender_check_armature = blender_check_object.find_armature()
-                        if blender_check_armature == blender_armature:
-                            index_local_offset += 1
-                            
-                        if blender_object == blender_check_object:
-                            index_local_offset -= 1
-                            break
-                    
-                    index_offset = len(blender_armature.children) + index_local_offset
-                
-                node['skin'] = get_skin_index(glTF, blender_armature.name, index_offset)
+            if (blender_armature, blender_object) in object_skins:
+                node['skin'] = object_skins[(blender_armature, blender_object)]
 
         #
 
@@ -1893,27 +1940,27 @@ def generate_nodes(operator,
         # Camera
         if export_settings['gltf_cameras']:
             if blender_object.type == 'CAMERA':
-                child_index = get_node_index(glTF, 'Correction_' + blender_object.name)
+                child_index = get_node_index(export_settings, glTF, 'Correction_' + blender_object.name)
                 if child_index >= 0:
                     children.append(child_index)
 
         # Light CMN
         if export_settings['gltf_lights_cmn']:
             if blender_object.type == 'LAMP':
-                child_index = get_node_index(glTF, 'Correction_' + blender_object.name)
+                child_index = get_node_index(export_settings, glTF, 'Correction_' + blender_object.name)
                 if child_index >= 0:
                     children.append(child_index)
 
         # Light PBR
         if export_settings['gltf_lights_pbr']:
             if blender_object.type == 'LAMP':
-                child_index = get_node_index(glTF, 'Correction_' + blender_object.name)
+                child_index = get_node_index(export_settings, glTF, 'Correction_' + blender_object.name)
                 if child_index >= 0:
                     children.append(child_index)
 
         # Nodes
         for blender_child_node in blender_object.children:
-            child_index = get_node_index(glTF, blender_child_node.name)
+            child_index = get_node_index(export_settings, glTF, blender_child_node.name)
             
             if blender_child_node.parent_type == 'BONE' and export_settings['gltf_skins']:
                 continue
@@ -1926,7 +1973,7 @@ def generate_nodes(operator,
         # Duplications
         if blender_object.dupli_type == 'GROUP' and blender_object.dupli_group != None:
 
-            child_index = get_node_index(glTF, 'Duplication_Offset_' + blender_object.name)
+            child_index = get_node_index(export_settings, glTF, 'Duplication_Offset_' + blender_object.name)
             if child_index >= 0:
                 children.append(child_index)
                 
@@ -1935,7 +1982,7 @@ def generate_nodes(operator,
                 duplication_children = []
                 
                 for blender_dupli_object in blender_object.dupli_group.objects:
-                    child_index = get_node_index(glTF, 'Duplication_' + blender_object.name + '_' + blender_dupli_object.name)
+                    child_index = get_node_index(export_settings, glTF, 'Duplication_' + blender_object.name + '_' + blender_dupli_object.name)
                     if child_index >= 0:
                         duplication_children.append(child_index)
                 
@@ -1963,7 +2010,7 @@ def generate_nodes(operator,
                     if blender_bone.parent:
                         continue
                     
-                    child_index = get_node_index(glTF, blender_object.name + "_" + blender_bone.name)
+                    child_index = get_node_index(export_settings, glTF, blender_object.name + "_" + blender_bone.name)
             
                     if child_index < 0:
                         continue
@@ -1973,7 +2020,7 @@ def generate_nodes(operator,
                 for blender_bone in blender_object.pose.bones:
                     joint_children = []
                     for blender_bone_child in blender_bone.children:
-                        child_index = get_node_index(glTF, blender_object.name + "_" + blender_bone_child.name) 
+                        child_index = get_node_index(export_settings, glTF, blender_object.name + "_" + blender_bone_child.name) 
                     
                         if child_index < 0:
                             continue
@@ -1983,7 +2030,7 @@ def generate_nodes(operator,
                     for blender_object_name in blender_object_to_bone:
                         blender_bone_name = blender_object_to_bone[blender_object_name]
                         if blender_bone_name == blender_bone.name:
-                            child_index = get_node_index(glTF, blender_object_name) 
+                            child_index = get_node_index(export_settings, glTF, blender_object_name) 
                         
                             if child_index < 0:
                                 continue
@@ -1991,7 +2038,7 @@ def generate_nodes(operator,
                             joint_children.append(child_index)
                 
                     if len(joint_children) > 0:
-                        node_index = get_node_index(glTF, blender_object.name + "_" + blender_bone.name)
+                        node_index = get_node_index(export_settings, glTF, blender_object.name + "_" + blender_bone.name)
                         
                         child_node = nodes[node_index]
                         
@@ -2013,6 +2060,40 @@ def generate_images(operator,
                   
     images = []
 
+    #
+    # PNG data is encoded for all images, unless stored external. Only the encoded images are cached.
+    #
+    
+    encode_images = export_settings['gltf_format'] != 'ASCII' or export_settings['gltf_embed_images']
+    
+    image_cache = None
+    
+    if encode_images and export_settings['gltf_image_cache']:
+        try:
+            image_cache = ImageCache(export_settings['gltf_image_cache_directory'], export_settings['gltf_image_cache_size'] * 1024 * 1024)
+        except OSError as error:
+            print_console('WARNING', 'Cannot use image cache: ' + str(error))
+    
+    #
+    # Unmodified PNG and JPEG files are stored as they are.
+    #
+    
+    source_mime_types = {}
+    
+    if export_settings['gltf_image_passthrough']:
+        for blender_image in filtered_images:
+            mime_type = get_image_source_mime_type(blender_image)
+            
+            if mime_type is not None:
+                source_mime_types[blender_image] = mime_type
+    
+    encoded_images = [blender_image for blender_image in filtered_images if blender_image not in source_mime_types]
+    
+    png_data_sequence = iter([])
+    
+    if encode_images:
+        png_data_sequence = create_png_data_sequence(encoded_images, export_settings['gltf_parallel_images'], export_settings['gltf_png_level'], export_settings['gltf_png_filter'], image_cache)
+
     #
     #
 
@@ -2024,27 +2105,57 @@ def generate_images(operator,
         image = {}
 
         #
+        
+        image_data = None
+        mime_type = 'image/png'
+        
+        if blender_image in source_mime_types:
+            image_data = get_image_source_data(blender_image)
+            
+            if image_data is not None:
+                mime_type = source_mime_types[blender_image]
+            else:
+                # The file vanished since it has been checked.
+                image_data = create_png_data(blender_image, export_settings['gltf_png_level'], export_settings['gltf_png_filter'])
+
+        #
 
         if export_settings['gltf_format'] == 'ASCII':
 
             if export_settings['gltf_embed_images']:
                 # Embed image as Base64.
                 
-                png_data = create_png_data(blender_image)
+                if image_data is None:
+                    image_data = next(png_data_sequence)
 
                 # Required
 
-                image['uri'] = 'data:image/png;base64,' + base64.b64encode(png_data).decode('ascii')
+                image['uri'] = create_data_uri(export_settings, mime_type, image_data)
 
             else:
                 # Store image external.
 
                 uri = get_uri(blender_image.filepath)
-
-                context.scene.render.image_settings.file_format = 'PNG'
-                context.scene.render.image_settings.color_depth = '8'        
                 
-                blender_image.save_render(export_settings['gltf_filedirectory'] + uri, context.scene)
+                if mime_type == 'image/jpeg':
+                    uri = os.path.splitext(uri)[0] + '.jpg'
+                
+                filepath = export_settings['gltf_filedirectory'] + uri
+
+                if image_data is not None:
+                    source_filepath = bpy.path.abspath(blender_image.filepath, library=blender_image.library)
+                    
+                    # Exported next to the source file.
+                    if blender_image.packed_file is None and os.path.exists(source_filepath) and os.path.exists(filepath) and os.path.samefile(source_filepath, filepath):
+                        pass
+                    else:
+                        with open(filepath, 'wb') as file:
+                            file.write(image_data)
+                else:
+                    context.scene.render.image_settings.file_format = 'PNG'
+                    context.scene.render.image_settings.color_depth = '8'        
+                    
+                    blender_image.save_render(filepath, context.scene)
 
                 # Required
 
@@ -2053,13 +2164,14 @@ def generate_images(operator,
         else:            
             # Store image as glb.
             
-            png_data = create_png_data(blender_image)
+            if image_data is None:
+                image_data = next(png_data_sequence)
             
-            bufferView = create_bufferView(operator, context, export_settings, glTF, png_data, 0, 0)
+            bufferView = create_bufferView(operator, context, export_settings, glTF, image_data, 0, 0)
 
             # Required
 
-            image['mimeType'] = 'image/png'
+            image['mimeType'] = mime_type
             
             image['bufferView'] = bufferView
 
@@ -2073,6 +2185,12 @@ def generate_images(operator,
     #
     #
 
+    if image_cache is not None:
+        image_cache.evict()
+
+    #
+    #
+
     if len (images) > 0:
         glTF['images'] = images
 
@@ -2717,7 +2835,7 @@ def generate_scenes(operator,
             
         for blender_object in blender_scene.objects:
             if blender_object.parent is None:
-                node_index = get_node_index(glTF, blender_object.name)
+                node_index = get_node_index(export_settings, glTF, blender_object.name)
                 
                 if node_index < 0:
                     continue
@@ -2730,7 +2848,7 @@ def generate_scenes(operator,
         #
 
         if export_settings['gltf_lights_cmn']:
-            light = get_light_index_cmn(glTF, 'Ambient_' + blender_scene.name)
+            light = get_light_index_cmn(export_settings, glTF, 'Ambient_' + blender_scene.name)
             if light >= 0:
                 khr_lights_cmn = {'light' : light}
                 extensions = {'KHR_lights_cmn' : khr_lights_cmn}
@@ -2768,7 +2886,7 @@ def generate_scene(operator,
     Generates the top level scene entry.
     """
 
-    index = get_scene_index(glTF, bpy.context.screen.scene.name)
+    index = get_scene_index(export_settings, glTF, bpy.context.screen.scene.name)
     
     #
     #
@@ -2885,7 +3003,7 @@ def generate_glTF(operator,
             uri = export_settings['gltf_binaryfilename']
             
             if export_settings['gltf_embed_buffers']:
-                uri = 'data:application/octet-stream;base64,' + base64.b64encode(export_settings['gltf_binary']).decode('ascii')
+                uri = create_data_uri(export_settings, 'application/octet-stream', export_settings['gltf_binary'])
                 
             buffer['uri'] = uri
         
@@ -29,6 +29,32 @@ from .gltf2_debug import *
 # Functions
 #
 
+def get_index_registry(export_settings, elements, key = 'name'):
+    """
+    Return a dictionary from the key values of the glTF elements to their first index in the glTF array.
+    The glTF arrays only grow during export, so only new elements are added to the registry on each call.
+    Elements without the key are registered with the key value None.
+    """
+
+    index_registry = export_settings['gltf_index_registry']
+
+    registry_key = (id(elements), key)
+
+    entry = index_registry.get(registry_key)
+
+    if entry is None or entry[1] is not elements or entry[0] > len(elements):
+        entry = [0, elements, {}]
+        index_registry[registry_key] = entry
+
+    indices = entry[2]
+
+    for index in range(entry[0], len(elements)):
+        indices.setdefault(elements[index].get(key), index)
+
+    entry[0] = len(elements)
+
+    return indices
+
 
 def get_used_materials():
     """
@@ -239,7 +265,7 @@ def get_texcoord_index(glTF, name, shader_node_group):
     return 0
 
 
-def get_material_index(glTF, name):
+def get_material_index(export_settings, glTF, name):
     """
     Return the material index in the glTF array.
     """
@@ -250,17 +276,10 @@ def get_material_index(glTF, name):
     if glTF.get('materials') is None:
         return -1
 
-    index = 0
-    for material in glTF['materials']:
-        if material['name'] == name:
-            return index
-        
-        index += 1
-
-    return -1
+    return get_index_registry(export_settings, glTF['materials']).get(name, -1)
 
 
-def get_mesh_index(glTF, name):
+def get_mesh_index(export_settings, glTF, name):
     """
     Return the mesh index in the glTF array.
     """
@@ -268,37 +287,10 @@ def get_mesh_index(glTF, name):
     if glTF.get('meshes') is None:
         return -1
 
-    index = 0
-    for mesh in glTF['meshes']:
-        if mesh['name'] == name:
-            return index
-        
-        index += 1
-
-    return -1
-
-
-def get_skin_index(glTF, name, index_offset):
-    """
-    Return the skin index in the glTF array.
-    """
-
-    if glTF.get('skins') is None:
-        return -1
-    
-    skeleton = get_node_index(glTF, name)
-
-    index = 0
-    for skin in glTF['skins']:
-        if skin['skeleton'] == skeleton:
-            return index + index_offset
-        
-        index += 1
-
-    return -1
+    return get_index_registry(export_settings, glTF['meshes']).get(name, -1)
 
 
-def get_camera_index(glTF, name):
+def get_camera_index(export_settings, glTF, name):
     """
     Return the camera index in the glTF array.
     """
@@ -306,17 +298,10 @@ def get_camera_index(glTF, name):
     if glTF.get('cameras') is None:
         return -1
 
-    index = 0
-    for camera in glTF['cameras']:
-        if camera['name'] == name:
-            return index
-        
-        index += 1
-
-    return -1
+    return get_index_registry(export_settings, glTF['cameras']).get(name, -1)
 
 
-def get_light_index_cmn(glTF, name):
+def get_light_index_cmn(export_settings, glTF, name):
     """
     Return the light index in the glTF array.
     """
@@ -336,17 +321,10 @@ def get_light_index_cmn(glTF, name):
 
     lights = khr_lights_cmn['lights']
 
-    index = 0
-    for light in lights:
-        if light['name'] == name:
-            return index
-        
-        index += 1
-
-    return -1
+    return get_index_registry(export_settings, lights).get(name, -1)
 
 
-def get_light_index_pbr(glTF, name):
+def get_light_index_pbr(export_settings, glTF, name):
     """
     Return the light index in the glTF array.
     """
@@ -366,17 +344,10 @@ def get_light_index_pbr(glTF, name):
 
     lights = khr_lights_pbr['lights']
 
-    index = 0
-    for light in lights:
-        if light['name'] == name:
-            return index
-        
-        index += 1
-
-    return -1
+    return get_index_registry(export_settings, lights).get(name, -1)
 
 
-def get_node_index(glTF, name):
+def get_node_index(export_settings, glTF, name):
     """
     Return the node index in the glTF array.
     """
@@ -384,17 +355,10 @@ def get_node_index(glTF, name):
     if glTF.get('nodes') is None:
         return -1
 
-    index = 0
-    for node in glTF['nodes']:
-        if node['name'] == name:
-            return index
-        
-        index += 1
+    return get_index_registry(export_settings, glTF['nodes']).get(name, -1)
 
-    return -1
 
-
-def get_scene_index(glTF, name):
+def get_scene_index(export_settings, glTF, name):
     """
     Return the scene index in the glTF array.
     """
@@ -402,14 +366,88 @@ def get_scene_index(glTF, name):
     if glTF.get('scenes') is None:
         return -1
 
-    index = 0
-    for scene in glTF['scenes']:
-        if scene['name'] == name:
-            return index
+    return get_index_registry(export_settings, glTF['scenes']).get(name, -1)
+
+
+def get_node_default(export_settings, glTF, name, path):
+    """
+    Return the static value of a node property, which is targeted by an animation channel.
+    """
+
+    index = get_node_index(export_settings, glTF, name)
+
+    if index < 0:
+        return None
+
+    node = glTF['nodes'][index]
+
+    if path == 'translation':
+        return node.get('translation', [0.0, 0.0, 0.0])
+
+    if path == 'rotation':
+        return node.get('rotation', [0.0, 0.0, 0.0, 1.0])
+
+    if path == 'scale':
+        return node.get('scale', [1.0, 1.0, 1.0])
+
+    if path == 'weights':
+        if node.get('weights') is not None:
+            return node['weights']
+
+        if node.get('mesh') is None:
+            return None
+
+        return glTF['meshes'][node['mesh']].get('weights')
+
+    return None
+
+
+def get_image_source_data(blender_image):
+    """
+    Return the file data of an image, which is loaded from a file or packed, or None if not available.
+    """
+
+    if blender_image.source != 'FILE':
+        return None
+
+    if blender_image.packed_file is not None:
+        return getattr(blender_image.packed_file, 'data', None)
+
+    try:
+        with open(bpy.path.abspath(blender_image.filepath, library=blender_image.library), 'rb') as file:
+            return file.read()
+    except OSError:
+        return None
+
+
+def get_image_source_mime_type(blender_image):
+    """
+    Return the MIME type, if the image is an unmodified PNG or JPEG file, which can be stored without encoding.
+    Otherwise, return None.
+    """
+
+    if blender_image.source != 'FILE' or blender_image.is_dirty:
+        return None
+
+    if blender_image.packed_file is not None:
+        header = getattr(blender_image.packed_file, 'data', None)
         
-        index += 1
+        if header is None:
+            return None
+    else:
+        try:
+            with open(bpy.path.abspath(blender_image.filepath, library=blender_image.library), 'rb') as file:
+                header = file.read(8)
+        except OSError:
+            return None
 
-    return -1
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+
+    return None
 
 
 def get_uri(filepath):
@@ -532,7 +570,7 @@ def get_vec4(default_value, init_value = [0.0, 0.0, 0.0, 1.0]):
     return return_value
 
 
-def get_index(list, name):
+def get_index(export_settings, list, name):
     """
     Return index of a glTF element by a given name.
     """
@@ -540,15 +578,14 @@ def get_index(list, name):
     if list is None or name is None:
         return -1
     
-    index = 0
-    for element in list:
-        if element.get('name') is None:
-            return -1
+    indices = get_index_registry(export_settings, list)
     
-        if element['name'] == name:
-            return index
-        
-        index += 1
+    index = indices.get(name, -1)
     
-    return -1
+    # Elements after the first one without a name are not found.
+    unnamed_index = indices.get(None)
+    if unnamed_index is not None and index > unnamed_index:
+        return -1
+    
+    return index
 
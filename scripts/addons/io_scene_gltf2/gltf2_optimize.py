@@ -0,0 +1,292 @@
+# Copyright (c) 2017 The Khronos Group Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import collections
+import itertools
+
+from .gltf2_debug import *
+from .gltf2_extract import *
+
+#
+# Globals
+#
+
+GLTF_VERTEX_CACHE_SIZE = 32
+
+# Scoring parameters as proposed by Tom Forsyth, 'Linear-Speed Vertex Cache Optimisation'.
+GLTF_CACHE_DECAY_POWER = 1.5
+GLTF_LAST_TRIANGLE_SCORE = 0.75
+GLTF_VALENCE_BOOST_SCALE = 2.0
+GLTF_VALENCE_BOOST_POWER = 0.5
+
+#
+# Functions
+#
+
+def optimize_cache_add(cache, cached, triangle, cache_size):
+    """
+    Moves the vertices of a triangle to the front of a LRU vertex cache, keeping their order.
+    The cache is a deque with the most recently used vertex first and the set of its vertices.
+    Returns the number of cache misses and the vertices, which were removed from the cache.
+    """
+
+    misses = 0
+
+    # Degenerated triangles can reference a vertex twice.
+    for vertex_index in reversed(list(dict.fromkeys(triangle))):
+        if vertex_index in cached:
+            cache.remove(vertex_index)
+        else:
+            misses += 1
+
+            cached.add(vertex_index)
+
+        cache.appendleft(vertex_index)
+
+    evicted = []
+
+    while len(cache) > cache_size:
+        vertex_index = cache.pop()
+
+        cached.discard(vertex_index)
+
+        evicted.append(vertex_index)
+
+    return misses, evicted
+
+
+def optimize_acmr(indices, cache_size = GLTF_VERTEX_CACHE_SIZE):
+    """
+    Returns the average cache miss ratio (transformed vertices per triangle) of the given triangle indices,
+    simulating the same LRU post-transform vertex cache as the optimization.
+    """
+
+    triangle_count = len(indices) // 3
+
+    if triangle_count == 0:
+        return 0.0
+
+    cache = collections.deque()
+    cached = set()
+    misses = 0
+
+    for triangle_index in range(0, triangle_count):
+        triangle_misses, evicted = optimize_cache_add(cache, cached, indices[triangle_index * 3:triangle_index * 3 + 3], cache_size)
+
+        misses += triangle_misses
+
+    return misses / triangle_count
+
+
+def optimize_vertex_score(cache_position, remaining_valence, cache_size):
+    """
+    Returns the score of a vertex depending on its position in the cache and its number of not yet added triangles.
+    """
+
+    if remaining_valence == 0:
+        return -1.0
+
+    score = 0.0
+
+    if cache_position >= 0:
+        if cache_position < 3:
+            # The last triangle gets a fixed score, so it is not favored too much.
+            score = GLTF_LAST_TRIANGLE_SCORE
+        else:
+            scaler = 1.0 / (cache_size - 3)
+            score = (1.0 - (cache_position - 3) * scaler) ** GLTF_CACHE_DECAY_POWER
+
+    # Boost vertices with few remaining triangles, so they are finished and leave the cache.
+    score += GLTF_VALENCE_BOOST_SCALE * (remaining_valence ** -GLTF_VALENCE_BOOST_POWER)
+
+    return score
+
+
+def optimize_vertex_cache(indices, vertex_count, cache_size = GLTF_VERTEX_CACHE_SIZE):
+    """
+    Reorders triangles for post-transform vertex cache locality and returns the new indices.
+    Implements the greedy algorithm by Tom Forsyth using a LRU cache model.
+    Only the vertices in the cache are scored again after each triangle and the next triangle is searched
+    among their remaining triangles, so the run time is linear in the number of triangles.
+    """
+
+    triangle_count = len(indices) // 3
+
+    if triangle_count == 0:
+        return list(indices)
+
+    indices = list(indices[0:triangle_count * 3])
+
+    #
+    # Vertex to triangle adjacency. The remaining triangles of a vertex are at the start of its range.
+    #
+
+    remaining_valence = [0] * vertex_count
+
+    for vertex_index in indices:
+        remaining_valence[vertex_index] += 1
+
+    adjacency_offsets = [0] * (vertex_count + 1)
+
+    for vertex_index in range(0, vertex_count):
+        adjacency_offsets[vertex_index + 1] = adjacency_offsets[vertex_index] + remaining_valence[vertex_index]
+
+    adjacency = [0] * len(indices)
+
+    fill = adjacency_offsets[0:vertex_count]
+
+    for corner_index, vertex_index in enumerate(indices):
+        adjacency[fill[vertex_index]] = corner_index // 3
+        fill[vertex_index] += 1
+
+    #
+    # Scores by cache position and by remaining valence are looked up in tables.
+    #
+
+    position_scores = [optimize_vertex_score(position, 1, cache_size) - optimize_vertex_score(-1, 1, cache_size) for position in range(0, cache_size)]
+
+    valence_scores = [optimize_vertex_score(-1, valence, cache_size) for valence in range(0, max(remaining_valence) + 1)]
+
+    vertex_scores = [valence_scores[valence] for valence in remaining_valence]
+
+    triangle_scores = [vertex_scores[indices[corner_index]] + vertex_scores[indices[corner_index + 1]] + vertex_scores[indices[corner_index + 2]] for corner_index in range(0, triangle_count * 3, 3)]
+
+    triangle_added = [False] * triangle_count
+
+    #
+
+    result = []
+
+    cache = collections.deque()
+    cached = set()
+
+    best_triangle = max(range(0, triangle_count), key=triangle_scores.__getitem__)
+
+    next_unadded_triangle = 0
+
+    while best_triangle >= 0:
+        triangle = indices[best_triangle * 3:best_triangle * 3 + 3]
+
+        result.extend(triangle)
+
+        triangle_added[best_triangle] = True
+
+        #
+        # Remove triangle from the remaining triangles of its vertices.
+        #
+
+        for vertex_index in triangle:
+            start = adjacency_offsets[vertex_index]
+            last = start + remaining_valence[vertex_index] - 1
+
+            position = adjacency.index(best_triangle, start, last + 1)
+
+            adjacency[position] = adjacency[last]
+            adjacency[last] = best_triangle
+
+            remaining_valence[vertex_index] -= 1
+
+        #
+        # Move the vertices to the front of the cache. Only vertices, which are or were in the cache, change their score.
+        #
+
+        misses, evicted = optimize_cache_add(cache, cached, triangle, cache_size)
+
+        candidates = []
+
+        for position, vertex_index in enumerate(itertools.chain(cache, evicted)):
+            valence = remaining_valence[vertex_index]
+
+            if valence == 0:
+                new_score = -1.0
+            elif position < cache_size:
+                new_score = valence_scores[valence] + position_scores[position]
+            else:
+                new_score = valence_scores[valence]
+
+            score_delta = new_score - vertex_scores[vertex_index]
+
+            vertex_scores[vertex_index] = new_score
+
+            if valence == 0:
+                continue
+
+            start = adjacency_offsets[vertex_index]
+
+            triangles = adjacency[start:start + valence]
+
+            if score_delta != 0.0:
+                for triangle_index in triangles:
+                    triangle_scores[triangle_index] += score_delta
+
+            if position < cache_size:
+                candidates.extend(triangles)
+
+        #
+        # Best next triangle is adjacent to the cache. Otherwise, take the next one not added yet.
+        #
+
+        best_triangle = -1
+
+        if len(candidates) > 0:
+            best_triangle = max(candidates, key=triangle_scores.__getitem__)
+        else:
+            while next_unadded_triangle < triangle_count and triangle_added[next_unadded_triangle]:
+                next_unadded_triangle += 1
+
+            if next_unadded_triangle < triangle_count:
+                best_triangle = next_unadded_triangle
+
+    return result
+
+
+def optimize_primitive(primitive):
+    """
+    Reorders the triangles of a primitive for vertex cache locality and afterwards the vertices for fetch locality.
+    All attribute streams are reordered accordingly. Returns the new primitive.
+    """
+
+    use_tangents = primitive['attributes'].get('TANGENT') is not None
+
+    vertex_count = len(primitive['attributes']['POSITION']) // 3
+
+    indices = optimize_vertex_cache(primitive['indices'], vertex_count)
+
+    # Packing orders the vertices by first use.
+    return extract_primitive_pack(primitive, indices, use_tangents)
+
+
+def optimize_primitives(primitives, name):
+    """
+    Optimizes all given primitives for vertex cache and fetch locality. The average cache miss ratio is reported.
+    """
+
+    result_primitives = []
+
+    for primitive in primitives:
+        acmr_before = optimize_acmr(primitive['indices'])
+
+        optimized_primitive = optimize_primitive(primitive)
+
+        acmr_after = optimize_acmr(optimized_primitive['indices'])
+
+        print_console('INFO', 'Optimized vertex cache of ' + name + '. ACMR before: ' + '{:.3f}'.format(acmr_before) + ' after: ' + '{:.3f}'.format(acmr_after))
+
+        result_primitives.append(optimized_primitive)
+
+    return result_primitives
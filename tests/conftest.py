@@ -0,0 +1,41 @@
+# Copyright (c) 2017 The Khronos Group Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import os
+import sys
+import types
+
+#
+# Globals
+#
+
+# Scripts, which are executed by Blender and not by pytest.
+collect_ignore_glob = ['unit_test.py', 'vt_*.py']
+
+ADDON_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts', 'addons', 'io_scene_gltf2')
+
+#
+# Functions
+#
+
+# The modules of the add-on are imported without executing its __init__.py, which registers the exporter in Blender.
+# Tests of modules depending on bpy or mathutils are skipped, if these are not available.
+if 'io_scene_gltf2' not in sys.modules:
+    package = types.ModuleType('io_scene_gltf2')
+    package.__path__ = [os.path.normpath(ADDON_DIRECTORY)]
+    sys.modules['io_scene_gltf2'] = package
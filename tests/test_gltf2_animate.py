@@ -0,0 +1,668 @@
+# Copyright (c) 2017 The Khronos Group Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import math
+import random
+import struct
+import types
+
+import pytest
+
+pytest.importorskip('bpy')
+pytest.importorskip('mathutils')
+
+from io_scene_gltf2 import gltf2_animate
+
+#
+# Classes
+#
+
+class KeyframePoints(list):
+    def foreach_get(self, attribute, buffer):
+        index = 0
+        for blender_keyframe in self:
+            value = getattr(blender_keyframe, attribute)
+
+            # Enums are read as their values.
+            if attribute == 'interpolation':
+                value = [gltf2_animate.GLTF_FCURVE_INTERPOLATIONS.get(value, 3)]
+
+            for component in value:
+                buffer[index] = component
+                index += 1
+
+
+class FCurve:
+    """
+    Fcurve with constant extrapolation, which counts the calls of evaluate().
+    evaluate() is a port of the keyframe evaluation of Blender 2.78 in single precision.
+    Handles are placed at a third of the neighbouring segments with the given slopes.
+    """
+
+    def __init__(self, points, interpolations, modifiers = None, extrapolation = 'CONSTANT', slopes = None, handle_scale = 1.0):
+        if slopes is None:
+            slopes = [0.0] * len(points)
+
+        keyframe_points = []
+
+        for index, ((frame, value), interpolation) in enumerate(zip(points, interpolations)):
+            left = (frame - points[max(index - 1, 0)][0]) / 3.0 * handle_scale
+            right = (points[min(index + 1, len(points) - 1)][0] - frame) / 3.0 * handle_scale
+
+            keyframe_points.append(types.SimpleNamespace(co=(float32(frame), float32(value)),
+                                                         handle_left=(float32(frame - left), float32(value - left * slopes[index])),
+                                                         handle_right=(float32(frame + right), float32(value + right * slopes[index])),
+                                                         interpolation=interpolation))
+
+        self.keyframe_points = KeyframePoints(keyframe_points)
+        self.modifiers = modifiers or []
+        self.extrapolation = extrapolation
+        self.evaluated = 0
+
+    def range(self):
+        return (self.keyframe_points[0].co[0], self.keyframe_points[-1].co[0])
+
+    def evaluate(self, frame):
+        self.evaluated += 1
+
+        return evaluate_keyframes(self.keyframe_points, float32(frame))
+
+
+class Matrix:
+    """
+    Transformation, which decomposes into the key frame it was read at.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    def __mul__(self, other):
+        return other
+
+    def decompose(self):
+        return [self.frame, 0.0, 0.0], [1.0, 0.0, 0.0, 0.0], [1.0, 1.0, 1.0]
+
+#
+# Functions
+#
+
+def float32(value):
+    return struct.unpack('f', struct.pack('f', value))[0]
+
+
+def blender_rotation(rotation):
+    """
+    Brings a rotation in glTF Quaternion notation back to Blender coordinate system with 'w' at first position.
+    """
+    return [rotation[3], rotation[0], -rotation[2], rotation[1]]
+
+
+def rotate_vector(rotation, vector):
+    w, x, y, z = rotation
+
+    matrix = [[1.0 - 2.0 * (y * y + z * z), 2.0 * (x * y - w * z), 2.0 * (x * z + w * y)],
+              [2.0 * (x * y + w * z), 1.0 - 2.0 * (x * x + z * z), 2.0 * (y * z - w * x)],
+              [2.0 * (x * z - w * y), 2.0 * (y * z + w * x), 1.0 - 2.0 * (x * x + y * y)]]
+
+    return [sum(row[index] * vector[index] for index in range(3)) for row in matrix]
+
+
+def rotate_vector_axis(axis, angle, vector):
+    cosine = math.cos(angle)
+    sine = math.sin(angle)
+
+    first, second = [(1, 2), (2, 0), (0, 1)]['XYZ'.index(axis)]
+
+    result = list(vector)
+    result[first] = cosine * vector[first] - sine * vector[second]
+    result[second] = sine * vector[first] + cosine * vector[second]
+
+    return result
+
+
+def cube_root(value):
+    if value == 0.0:
+        return 0.0
+
+    if value < 0.0:
+        return -math.exp(math.log(-value) / 3.0)
+
+    return math.exp(math.log(value) / 3.0)
+
+
+def find_zero(x, q0, q1, q2, q3):
+    """
+    Port of findzero() of Blender. Returns the valid roots of the x coordinate of a Bezier segment.
+    """
+    c0 = float32(q0 - x)
+    c1 = float32(3.0 * float32(q1 - q0))
+    c2 = float32(3.0 * float32(float32(q0 - float32(2.0 * q1)) + q2))
+    c3 = float32(float32(q3 - q0) + float32(3.0 * float32(q1 - q2)))
+
+    candidates = []
+
+    if c3 != 0.0:
+        a = c2 / c3 / 3.0
+        b = c1 / c3
+        c = c0 / c3
+
+        p = b / 3.0 - a * a
+        q = (2.0 * a * a * a - a * b + c) / 2.0
+        d = q * q + p * p * p
+
+        if d > 0.0:
+            t = math.sqrt(d)
+            candidates = [cube_root(-q + t) + cube_root(-q - t) - a]
+        elif d == 0.0:
+            t = cube_root(-q)
+            candidates = [2.0 * t - a, -t - a]
+        else:
+            phi = math.acos(-q / math.sqrt(-(p * p * p)))
+            t = math.sqrt(-p)
+            p = math.cos(phi / 3.0)
+            q = math.sqrt(3.0 - 3.0 * p * p)
+            candidates = [2.0 * t * p - a, -t * (p + q) - a, -t * (p - q) - a]
+    elif c2 != 0.0:
+        p = c1 * c1 - 4.0 * c2 * c0
+
+        if p > 0.0:
+            p = math.sqrt(p)
+            candidates = [(-c1 - p) / (2.0 * c2), (-c1 + p) / (2.0 * c2)]
+        elif p == 0.0:
+            candidates = [-c1 / (2.0 * c2)]
+    elif c1 != 0.0:
+        candidates = [-c0 / c1]
+    elif c0 == 0.0:
+        candidates = [0.0]
+
+    return [float32(root) for root in candidates if float32(-1.0e-10) <= float32(root) <= float32(1.000001)]
+
+
+def evaluate_keyframes(keyframe_points, frame):
+    """
+    Port of the keyframe evaluation of Blender 2.78 with constant extrapolation.
+    """
+    first = keyframe_points[0]
+    last = keyframe_points[-1]
+
+    if first.co[0] >= frame:
+        return first.co[1]
+
+    if last.co[0] <= frame:
+        return last.co[1]
+
+    # Binary search, which snaps to keyframes within a threshold.
+    exact = False
+    start = 0
+    end = len(keyframe_points)
+
+    while start <= end:
+        middle = start + (end - start) // 2
+        middle_frame = keyframe_points[middle].co[0]
+
+        if abs(frame - middle_frame) <= gltf2_animate.GLTF_FCURVE_KEYFRAME_THRESHOLD:
+            exact = True
+            start = middle
+            break
+
+        if frame > middle_frame:
+            start = middle + 1
+        elif frame < middle_frame:
+            end = middle - 1
+
+    if exact:
+        previous = keyframe_points[start]
+        current = keyframe_points[min(start + 1, len(keyframe_points) - 1)]
+    else:
+        current = keyframe_points[start]
+        previous = keyframe_points[max(start - 1, 0)]
+
+    if abs(current.co[0] - frame) < 1.0e-8:
+        return current.co[1]
+
+    if not (previous.co[0] <= frame <= current.co[0]):
+        return 0.0
+
+    if previous.interpolation == 'CONSTANT':
+        return previous.co[1]
+
+    if previous.interpolation == 'LINEAR':
+        begin = previous.co[1]
+        change = float32(current.co[1] - begin)
+        duration = float32(current.co[0] - previous.co[0])
+        time = float32(frame - previous.co[0])
+
+        return float32(float32(float32(change * time) / duration) + begin)
+
+    # Bezier segment.
+    v1 = list(previous.co)
+    v2 = list(previous.handle_right)
+    v3 = list(current.handle_left)
+    v4 = list(current.co)
+
+    epsilon = 1.1920929e-07
+
+    if abs(v1[1] - v4[1]) < epsilon and abs(v2[1] - v3[1]) < epsilon and abs(v3[1] - v4[1]) < epsilon:
+        return v1[1]
+
+    h1 = [float32(v1[0] - v2[0]), float32(v1[1] - v2[1])]
+    h2 = [float32(v4[0] - v3[0]), float32(v4[1] - v3[1])]
+
+    length = float32(v4[0] - v1[0])
+    length1 = abs(h1[0])
+    length2 = abs(h2[0])
+
+    if length1 + length2 != 0.0 and float32(length1 + length2) > length:
+        factor = float32(length / float32(length1 + length2))
+
+        v2 = [float32(v1[0] - float32(factor * h1[0])), float32(v1[1] - float32(factor * h1[1]))]
+        v3 = [float32(v4[0] - float32(factor * h2[0])), float32(v4[1] - float32(factor * h2[1]))]
+
+    roots = find_zero(frame, v1[0], v2[0], v3[0], v4[0])
+
+    if len(roots) == 0:
+        return 0.0
+
+    t = roots[0]
+
+    c0 = v1[1]
+    c1 = float32(3.0 * float32(v2[1] - v1[1]))
+    c2 = float32(3.0 * float32(float32(v1[1] - float32(2.0 * v2[1])) + v3[1]))
+    c3 = float32(float32(v4[1] - v1[1]) + float32(3.0 * float32(v2[1] - v3[1])))
+
+    t2 = float32(t * t)
+
+    return float32(float32(float32(c0 + float32(t * c1)) + float32(t2 * c2)) + float32(float32(t2 * t) * c3))
+
+
+def interpolate(keys, values, components, key):
+    """
+    Linear interpolation of a sampler output at the given key.
+    """
+
+    for index in range(1, len(keys)):
+        if key <= keys[index]:
+            factor = (key - keys[index - 1]) / (keys[index] - keys[index - 1])
+
+            return [values[(index - 1) * components + component] + (values[index * components + component] - values[(index - 1) * components + component]) * factor for component in range(components)]
+
+    return values[-components:]
+
+
+def test_reduce_keys_linear():
+    keys = [index / 24.0 for index in range(10)]
+    values = []
+    for index in range(10):
+        values.extend([index * 0.5, 1.0, -index * 0.25])
+
+    reduced_keys, reduced_values = gltf2_animate.animate_reduce_keys(keys, values, 3, False, 0.001)
+
+    assert reduced_keys == [keys[0], keys[-1]]
+    assert reduced_values == values[:3] + values[-3:]
+
+
+@pytest.mark.parametrize('tolerance', [0.0, 0.001, 0.01, 0.1])
+def test_reduce_keys_error(tolerance):
+    keys = [index / 24.0 for index in range(60)]
+    values = []
+    for key in keys:
+        values.extend([math.sin(key * 3.0), math.cos(key * 7.0) * 0.5])
+
+    reduced_keys, reduced_values = gltf2_animate.animate_reduce_keys(keys, values, 2, False, tolerance)
+
+    assert reduced_keys[0] == keys[0] and reduced_keys[-1] == keys[-1]
+    assert len(reduced_values) == 2 * len(reduced_keys)
+
+    # Every removed key is restored within tolerance.
+    for index, key in enumerate(keys):
+        interpolated = interpolate(reduced_keys, reduced_values, 2, key)
+
+        assert max(abs(interpolated[component] - values[index * 2 + component]) for component in range(2)) <= tolerance + 1e-6
+
+    if tolerance >= 0.01:
+        assert len(reduced_keys) < len(keys)
+
+
+@pytest.mark.parametrize('tolerance', [0.001, 0.01, 0.1])
+def test_reduce_keys_rotation_error(tolerance):
+    keys = [index / 24.0 for index in range(48)]
+
+    # Rotations around a single axis are interpolated by their angle, which is given in radians.
+    angles = [math.sin(key * 4.0) for key in keys]
+
+    values = []
+    for angle in angles:
+        values.extend([0.0, 0.0, math.sin(angle / 2.0), math.cos(angle / 2.0)])
+
+    reduced_keys, reduced_values = gltf2_animate.animate_reduce_keys(keys, values, 4, True, tolerance)
+
+    assert 2 <= len(reduced_keys) < len(keys)
+
+    reduced_angles = [2.0 * math.atan2(reduced_values[index * 4 + 2], reduced_values[index * 4 + 3]) for index in range(len(reduced_keys))]
+
+    for index, key in enumerate(keys):
+        interpolated = interpolate(reduced_keys, reduced_angles, 1, key)[0]
+
+        assert abs(interpolated - angles[index]) <= tolerance + 1e-5
+
+
+def test_reduce_keys_span():
+    keys = [float(index) for index in range(1000)]
+    values = [key * 0.5 for key in keys]
+
+    reduced_keys, reduced_values = gltf2_animate.animate_reduce_keys(keys, values, 1, False, 0.001)
+
+    # Long samplers are split into spans first, whose borders are kept.
+    assert reduced_keys == keys[0::gltf2_animate.GLTF_REDUCE_MAX_SPAN - 1] + [keys[-1]]
+    assert reduced_values == [key * 0.5 for key in reduced_keys]
+
+
+@pytest.mark.parametrize('is_rotation', [False, True])
+def test_span_errors(is_rotation):
+    numpy = pytest.importorskip('numpy')
+
+    generator = random.Random(3)
+
+    components = 3
+    if is_rotation:
+        components = 4
+
+    keys = sorted(generator.uniform(0.0, 10.0) for index in range(40))
+    values = []
+
+    for index in range(40):
+        value = [generator.uniform(-1.0, 1.0) for component in range(components)]
+
+        if is_rotation:
+            length = math.sqrt(sum(component * component for component in value))
+            value = [component / length for component in value]
+
+        values.extend(value)
+
+    # Nearly equal rotations are interpolated linearly.
+    if is_rotation:
+        values[39 * 4:40 * 4] = [component + 1.0e-3 for component in values[0:4]]
+
+    key_array = numpy.asarray(keys)
+    value_array = numpy.asarray(values).reshape(-1, components)
+
+    # Errors of a whole span match the ones of single keys within single precision.
+    for first, last in [(0, 39), (5, 20), (12, 14)]:
+        errors = gltf2_animate.animate_span_errors(key_array, value_array, is_rotation, first, last)
+
+        expected = [gltf2_animate.animate_key_error(keys, values, components, is_rotation, first, last, index) for index in range(first + 1, last)]
+
+        assert errors.tolist() == pytest.approx(expected, abs=1.0e-5)
+
+
+def test_evaluate_fcurve():
+    pytest.importorskip('numpy')
+
+    frames = [1.0, 4.0, 6.5, 9.0, 12.0]
+
+    blender_fcurve = FCurve(list(zip(frames, [0.5, -2.0, 3.0, 1.25, 0.0])), ['CONSTANT', 'LINEAR', 'BEZIER', 'CONSTANT', 'BEZIER'], slopes=[0.0, 1.0, -0.5, 0.0, 0.0])
+
+    keys = [index / 4.0 for index in range(0, 60)] + [3.995, 4.005, 9.0 - 0.001, 6.5 + 1e-7, 5.3, 7.77]
+
+    values = gltf2_animate.animate_evaluate_fcurve(blender_fcurve, keys)
+
+    evaluated = blender_fcurve.evaluated
+
+    expected = [blender_fcurve.evaluate(key) for key in keys]
+
+    for key, value, expected_value in zip(keys, values, expected):
+        if 6.5 < key < 9.0:
+            assert value == pytest.approx(expected_value, rel=1.0e-5, abs=1.0e-6)
+        else:
+            # Constant and linear segments are identical to Blender.
+            assert value == expected_value
+
+    # Only keys close to, but not on a keyframe are evaluated by Blender. Keys are compared in single precision.
+    assert evaluated == sum(1 for key in keys if 1.0 < key < 12.0 and float32(key) not in frames and min(abs(key - frame) for frame in frames) <= 0.01)
+
+
+@pytest.mark.parametrize('handle_scale', [1.0, 2.5])
+def test_evaluate_fcurve_bezier(handle_scale):
+    pytest.importorskip('numpy')
+
+    generator = random.Random(7)
+
+    # Long handles overlap and are shortened like in Blender.
+    points = [(float(frame * 3 + generator.randint(0, 2)), generator.uniform(-5.0, 5.0)) for frame in range(0, 20)]
+    slopes = [generator.uniform(-3.0, 3.0) for point in points]
+
+    blender_fcurve = FCurve(points, ['BEZIER'] * len(points), slopes=slopes, handle_scale=handle_scale)
+
+    keys = gltf2_animate.animate_frame_grid(points[0][0] - 1.0, points[-1][0] + 1.0, 7)
+
+    values = gltf2_animate.animate_evaluate_fcurve(blender_fcurve, keys)
+
+    assert blender_fcurve.evaluated == 0
+
+    # Blender solves the cubic with another math library, so the values match within single precision.
+    assert values == pytest.approx([evaluate_keyframes(blender_fcurve.keyframe_points, float32(key)) for key in keys], rel=1.0e-5, abs=1.0e-5)
+
+
+def test_evaluate_fcurve_other():
+    pytest.importorskip('numpy')
+
+    blender_fcurve = FCurve([(1.0, 0.5), (4.0, 2.0), (8.0, 1.0)], ['SINE', 'LINEAR', 'LINEAR'])
+
+    keys = [index / 2.0 for index in range(0, 20)]
+
+    gltf2_animate.animate_evaluate_fcurve(blender_fcurve, keys)
+
+    # Other interpolations are evaluated by Blender.
+    assert blender_fcurve.evaluated == sum(1 for key in keys if 1.0 < key < 4.0)
+
+
+def test_evaluate_fcurve_fallback():
+    keys = [index / 2.0 for index in range(0, 20)]
+
+    for blender_fcurve in [FCurve([(1.0, 0.5), (4.0, 2.0)], ['CONSTANT', 'CONSTANT'], modifiers=[None]),
+                           FCurve([(1.0, 0.5), (4.0, 2.0)], ['CONSTANT', 'CONSTANT'], extrapolation='LINEAR')]:
+        values = gltf2_animate.animate_evaluate_fcurve(blender_fcurve, keys)
+
+        assert blender_fcurve.evaluated == len(keys)
+        assert values == [blender_fcurve.evaluate(key) for key in keys]
+
+
+def test_convert_rotation_quaternion_keys():
+    channels = [[1.0, 0.0], [0.0, 0.6], [0.0, 0.0], [0.0, 0.8]]
+
+    rotations = gltf2_animate.animate_convert_rotation_quaternion_keys(channels)
+
+    # Swizzled and with 'w' at last position.
+    assert rotations == [[0.0, 0.0, -0.0, 1.0], [pytest.approx(0.6), pytest.approx(0.8), -0.0, 0.0]]
+
+
+def test_convert_rotation_euler_keys():
+    euler = [0.3, -1.2, 2.5]
+
+    rotations = gltf2_animate.animate_convert_rotation_euler_keys([[value] for value in euler], 'XYZ')
+
+    # eul_to_quat() of Blender.
+    ti, tj, th = [angle * 0.5 for angle in euler]
+    ci, cj, ch = math.cos(ti), math.cos(tj), math.cos(th)
+    si, sj, sh = math.sin(ti), math.sin(tj), math.sin(th)
+    cc, cs, sc, ss = ci * ch, ci * sh, si * ch, si * sh
+
+    expected = [cj * cc + sj * ss, cj * sc - sj * cs, cj * ss + sj * cc, cj * cs - sj * sc]
+
+    assert blender_rotation(rotations[0]) == pytest.approx(expected, abs=1e-6)
+
+
+@pytest.mark.parametrize('rotation_mode', ['XYZ', 'XZY', 'YXZ', 'YZX', 'ZXY', 'ZYX'])
+def test_convert_rotation_euler_keys_order(rotation_mode):
+    eulers = [[0.3, -1.2, 2.5], [1.0, 0.5, -0.25], [0.0, 0.0, 0.0]]
+    vector = [0.2, -0.7, 1.1]
+
+    rotations = gltf2_animate.animate_convert_rotation_euler_keys([list(channel) for channel in zip(*eulers)], rotation_mode)
+
+    for euler, rotation in zip(eulers, rotations):
+        # The first axis of the rotation mode is applied first.
+        expected = vector
+        for axis in rotation_mode:
+            expected = rotate_vector_axis(axis, euler['XYZ'.index(axis)], expected)
+
+        assert rotate_vector(blender_rotation(rotation), vector) == pytest.approx(expected, abs=1e-5)
+
+
+def test_convert_rotation_axis_angle_keys():
+    channels = [[math.pi, 1.0, 0.5], [0.0, 0.0, 0.0], [0.0, 0.0, 3.0], [2.0, 0.0, 4.0]]
+
+    rotations = [blender_rotation(rotation) for rotation in gltf2_animate.animate_convert_rotation_axis_angle_keys(channels)]
+
+    # Axis is normalized.
+    assert rotations[0] == pytest.approx([0.0, 0.0, 0.0, 1.0], abs=1e-6)
+    # Zero axis gives the identity.
+    assert rotations[1] == pytest.approx([1.0, 0.0, 0.0, 0.0])
+    assert rotations[2] == pytest.approx([math.cos(0.25), 0.0, 0.6 * math.sin(0.25), 0.8 * math.sin(0.25)], abs=1e-6)
+
+
+def test_is_constant():
+    translation = [1.0, 2.0, 3.0]
+
+    assert gltf2_animate.animate_is_constant(translation * 4, 3, False, translation, False)
+    assert gltf2_animate.animate_is_constant([1.0, 2.0, 3.0 + 1e-7] * 2, 3, False, translation, False)
+
+    assert not gltf2_animate.animate_is_constant(translation + [1.0, 2.0, 3.01], 3, False, translation, False)
+    assert not gltf2_animate.animate_is_constant(translation * 2, 3, False, None, False)
+    assert not gltf2_animate.animate_is_constant([], 3, False, translation, False)
+    assert not gltf2_animate.animate_is_constant(translation[0:2], 3, False, translation, False)
+
+
+def test_is_constant_cubic():
+    scale = [1.0, 1.0, 1.0]
+    zero = [0.0, 0.0, 0.0]
+
+    assert gltf2_animate.animate_is_constant((zero + scale + zero) * 3, 3, True, scale, False)
+
+    # Tangents have to be zero.
+    assert not gltf2_animate.animate_is_constant(zero + scale + [0.0, 0.5, 0.0], 3, True, scale, False)
+
+
+def test_is_constant_rotation():
+    rotation = [0.0, 0.0, 0.6, 0.8]
+    negated = [-component for component in rotation]
+
+    assert gltf2_animate.animate_is_constant(rotation + negated, 4, False, rotation, True)
+    assert not gltf2_animate.animate_is_constant(rotation + negated, 4, False, rotation, False)
+    assert not gltf2_animate.animate_is_constant(rotation + [0.0, 0.0, 0.8, 0.6], 4, False, rotation, True)
+
+
+def test_joint_cache():
+    joint_cache = gltf2_animate.JointCache(['Root', 'Tip'])
+
+    joint_cache.set(1.0, 'Tip', [1.0, 2.0, 3.0], [1.0, 0.0, 0.0, 0.0], [1.0, 1.0, 1.0])
+    joint_cache.set(2.5, 'Root', [0.1, 0.2, 0.3], [0.0, 1.0, 0.0, 0.0], [2.0, 2.0, 2.0])
+    joint_cache.set(1.0, 'Root', [4.0, 5.0, 6.0], [0.0, 0.0, 1.0, 0.0], [3.0, 3.0, 3.0])
+
+    location, rotation, scale = joint_cache.get(1.0, 'Tip')
+
+    assert list(location) == [1.0, 2.0, 3.0]
+    assert list(rotation) == [1.0, 0.0, 0.0, 0.0]
+    assert list(scale) == [1.0, 1.0, 1.0]
+
+    # Values are stored in single precision.
+    location, rotation, scale = joint_cache.get(2.5, 'Root')
+
+    assert list(location) == [float32(0.1), float32(0.2), float32(0.3)]
+
+    assert joint_cache.get(2.5, 'Tip') is None
+    assert joint_cache.get(3.0, 'Root') is None
+
+    state = joint_cache.__getstate__()
+
+    copied_cache = gltf2_animate.JointCache([])
+    copied_cache.__setstate__(state)
+
+    assert list(copied_cache.get(1.0, 'Root')[2]) == [3.0, 3.0, 3.0]
+    assert copied_cache.get(2.5, 'Tip') is None
+
+
+def test_frame_grid():
+    assert gltf2_animate.animate_frame_grid(1.5, 3.0, 2) == [1.5, 2.0, 2.5, 3.0]
+    assert gltf2_animate.animate_frame_grid(1.0, 1.9, 1) == [1.0]
+    assert gltf2_animate.animate_frame_grid(2.0, 1.0, 1) == []
+
+    # Keys are calculated from the step, so many samples do not accumulate an error.
+    keys = gltf2_animate.animate_frame_grid(0.0, 100.0, 10)
+
+    assert len(keys) == 1001
+    assert keys[-1] == 100.0
+
+
+def test_gather_keys(monkeypatch):
+    monkeypatch.setattr(gltf2_animate.bpy, 'context', types.SimpleNamespace(scene=types.SimpleNamespace(frame_start=2, frame_end=5)))
+
+    export_settings = {'gltf_frame_range' : False, 'gltf_frame_samples' : 2}
+
+    fcurve_list = [FCurve([(1.0, 0.0), (3.0, 0.0), (5.0, 0.0)], ['LINEAR'] * 3),
+                   None,
+                   FCurve([(2.0, 0.0), (3.0, 0.0), (6.0, 0.0)], ['LINEAR'] * 3)]
+
+    assert gltf2_animate.animate_gather_keys(export_settings, fcurve_list, 'LINEAR') == [1.0, 2.0, 3.0, 5.0, 6.0]
+
+    export_settings['gltf_frame_range'] = True
+
+    assert gltf2_animate.animate_gather_keys(export_settings, fcurve_list, 'LINEAR') == [2.0, 3.0, 5.0]
+
+    # Sampled keys, plus a key right before the end of a constant segment.
+    export_settings['gltf_frame_range'] = False
+
+    fcurve_list = [FCurve([(1.0, 0.0), (2.0, 1.0), (3.0, 0.0)], ['CONSTANT', 'BEZIER', 'BEZIER'])]
+
+    assert gltf2_animate.animate_gather_keys(export_settings, fcurve_list, 'CONVERSION_NEEDED') == [1.0, 1.5, 2.0 - 0.001, 2.0, 2.5, 3.0]
+
+
+def test_sample_joints(monkeypatch):
+    frames = []
+    reads = []
+
+    class Bone:
+        def __init__(self, armature_name, name):
+            self.armature_name = armature_name
+            self.name = name
+
+        @property
+        def matrix_basis(self):
+            reads.append((frames[-1], self.armature_name))
+
+            return Matrix(frames[-1])
+
+    def create_armature(name):
+        return types.SimpleNamespace(name=name, pose=types.SimpleNamespace(bones=[Bone(name, 'Root'), Bone(name, 'Tip')]))
+
+    monkeypatch.setattr(gltf2_animate, 'animate_set_frame', frames.append)
+    monkeypatch.setattr(gltf2_animate, 'animate_joint_correction', lambda blender_bone: Matrix(None))
+
+    export_settings = {'gltf_joint_cache' : {}, 'gltf_bake_skins' : False}
+
+    first = create_armature('First')
+    second = create_armature('Second')
+
+    gltf2_animate.animate_sample_joints(export_settings, [first, second], {'First' : [1.0, 2.0, 3.0], 'Second' : [2.0, 10.0]})
+
+    # Every frame is set once and only armatures using the frame are read.
+    assert frames == [1.0, 2.0, 3.0, 10.0]
+    assert sorted(set(reads)) == [(1.0, 'First'), (2.0, 'First'), (2.0, 'Second'), (3.0, 'First'), (10.0, 'Second')]
+    assert len(reads) == 2 * 5
+
+    assert list(export_settings['gltf_joint_cache']['Second'].get(10.0, 'Tip')[0]) == [10.0, 0.0, 0.0]
+    assert export_settings['gltf_joint_cache']['Second'].get(1.0, 'Tip') is None
@@ -0,0 +1,111 @@
+# Copyright (c) 2017 The Khronos Group Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import array
+import io
+
+from io_scene_gltf2 import gltf2_buffer
+
+#
+# Functions
+#
+
+def fill_buffer(buffer_builder):
+    """
+    Appends segments of different types and alignments. Returns the expected offsets and bytes.
+    """
+
+    offsets = []
+
+    offsets.append(buffer_builder.append(b'abc', 4))
+    offsets.append(buffer_builder.append(array.array('f', [1.0, 2.0]), 4))
+    offsets.append(buffer_builder.append(bytearray(b'xy'), 1))
+    offsets.append(buffer_builder.append(b'', 4))
+    offsets.append(buffer_builder.append(memoryview(array.array('H', [7, 8, 9])), 4))
+
+    expected = b'abc\0' + array.array('f', [1.0, 2.0]).tobytes() + b'xy\0\0' + array.array('H', [7, 8, 9]).tobytes()
+
+    return offsets, expected
+
+
+def test_buffer_builder():
+    buffer_builder = gltf2_buffer.BufferBuilder()
+
+    offsets, expected = fill_buffer(buffer_builder)
+
+    assert offsets == [0, 4, 12, 16, 16]
+    assert len(buffer_builder) == len(expected)
+    assert buffer_builder.to_bytes() == expected
+
+    file = io.BytesIO()
+    buffer_builder.write_to(file)
+
+    assert file.getvalue() == expected
+
+
+def test_buffer_builder_chunks():
+    buffer_builder = gltf2_buffer.BufferBuilder()
+
+    offsets, expected = fill_buffer(buffer_builder)
+
+    for size in [1, 3, 5, 64]:
+        chunks = [bytes(chunk) for chunk in buffer_builder.iter_chunks(size)]
+
+        assert b''.join(chunks) == expected
+        assert max(len(chunk) for chunk in chunks) <= size
+
+
+def test_buffer_builder_references():
+    data = bytearray(b'abcd')
+
+    buffer_builder = gltf2_buffer.BufferBuilder()
+    buffer_builder.append(data, 4)
+
+    # Segments are referenced and not copied.
+    data[0:1] = b'z'
+
+    assert buffer_builder.to_bytes() == b'zbcd'
+
+    buffer_builder.close()
+
+    assert len(buffer_builder.segments) == 0
+
+
+def test_buffer_builder_stream(tmp_path):
+    buffer_builder = gltf2_buffer.BufferBuilder(True, str(tmp_path))
+
+    offsets, expected = fill_buffer(buffer_builder)
+
+    assert offsets == [0, 4, 12, 16, 16]
+    assert buffer_builder.to_bytes() == expected
+    assert b''.join(bytes(chunk) for chunk in buffer_builder.iter_chunks(5)) == expected
+
+    file = io.BytesIO()
+    buffer_builder.write_to(file)
+
+    assert file.getvalue() == expected
+
+    # Reading does not move the position, where the next segment is written.
+    buffer_builder.append(b'end', 4)
+
+    assert buffer_builder.to_bytes() == expected + b'\0\0end'
+
+    buffer_builder.close()
+    buffer_builder.close()
+
+    assert buffer_builder.stream_file is None
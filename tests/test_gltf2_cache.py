@@ -0,0 +1,85 @@
+# Copyright (c) 2017 The Khronos Group Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import array
+import os
+
+from io_scene_gltf2 import gltf2_cache
+
+#
+# Functions
+#
+
+def test_key(tmp_path):
+    cache = gltf2_cache.ImageCache(str(tmp_path), 1024)
+
+    pixels = array.array('f', [0.0, 0.5, 1.0, 1.0])
+    other_pixels = array.array('f', [0.0, 0.5, 1.0, 0.5])
+
+    key = cache.key('Image', 1, 1, pixels, 9, 'NONE')
+
+    assert key == cache.key('Image', 1, 1, array.array('f', pixels), 9, 'NONE')
+    assert key != cache.key('Image', 1, 1, other_pixels, 9, 'NONE')
+    assert key != cache.key('Image', 1, 1, pixels, 1, 'NONE')
+    assert key != cache.key('Image', 1, 1, pixels, 9, 'PAETH')
+    assert key != cache.key('Other', 1, 1, pixels, 9, 'NONE')
+
+
+def test_get_put(tmp_path):
+    cache = gltf2_cache.ImageCache(str(tmp_path), 1024)
+
+    assert cache.get('missing') is None
+
+    cache.put('entry', b'data')
+
+    assert cache.get('entry') == b'data'
+    assert os.listdir(str(tmp_path)) == ['entry' + gltf2_cache.GLTF_CACHE_EXTENSION]
+
+
+def test_get_without_utime(tmp_path, monkeypatch):
+    cache = gltf2_cache.ImageCache(str(tmp_path), 1024)
+
+    cache.put('entry', b'data')
+
+    def utime(path):
+        raise PermissionError(path)
+
+    monkeypatch.setattr(gltf2_cache.os, 'utime', utime)
+
+    # The data is returned, even if the entry cannot be marked as used.
+    assert cache.get('entry') == b'data'
+
+
+def test_evict(tmp_path):
+    cache = gltf2_cache.ImageCache(str(tmp_path), 25)
+
+    for index, key in enumerate(['c', 'a', 'd', 'b']):
+        cache.put(key, bytes(10))
+
+        os.utime(cache.path(key), (1000 + index, 1000 + index))
+
+    # Using an entry keeps it in the cache.
+    assert cache.get('c') == bytes(10)
+
+    cache.evict()
+
+    assert sorted(os.listdir(str(tmp_path))) == ['b.png', 'c.png']
+
+    cache.evict()
+
+    assert sorted(os.listdir(str(tmp_path))) == ['b.png', 'c.png']
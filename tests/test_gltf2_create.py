@@ -0,0 +1,274 @@
+# Copyright (c) 2017 The Khronos Group Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import array
+import random
+import struct
+import zlib
+
+import pytest
+
+from io_scene_gltf2 import gltf2_buffer
+from io_scene_gltf2 import gltf2_cache
+from io_scene_gltf2 import gltf2_create
+
+#
+# Globals
+#
+
+#
+# Classes
+#
+
+class Pixels(list):
+    def foreach_get(self, buffer):
+        for index, value in enumerate(self):
+            buffer[index] = value
+
+
+class Image:
+    def __init__(self, name, width, height, seed):
+        generator = random.Random(seed)
+
+        self.name = name
+        self.size = (width, height)
+        self.pixels = Pixels(generator.choice([0.0, 0.25, 0.5, 1.0]) for index in range(width * height * 4))
+
+
+class CountingImageCache(gltf2_cache.ImageCache):
+    def __init__(self, directory, max_size):
+        gltf2_cache.ImageCache.__init__(self, directory, max_size)
+
+        self.stored = 0
+
+    def put(self, key, data):
+        self.stored += 1
+
+        gltf2_cache.ImageCache.put(self, key, data)
+
+#
+# Functions
+#
+
+def decode_png(png_data):
+    """
+    Reference decoder of 8 bit RGBA PNG files. Returns the width, the height and the bytes of the rows from top to bottom.
+    """
+
+    assert png_data[:8] == b'\x89PNG\r\n\x1a\n'
+
+    offset = 8
+    chunks = {}
+
+    while offset < len(png_data):
+        length, = struct.unpack('!I', png_data[offset:offset + 4])
+        tag = png_data[offset + 4:offset + 8]
+        data = png_data[offset + 8:offset + 8 + length]
+
+        assert struct.unpack('!I', png_data[offset + 8 + length:offset + 12 + length])[0] == zlib.crc32(tag + data)
+
+        chunks[tag] = data
+        offset += 12 + length
+
+    width, height, depth, color_type, compression, png_filter, interlace = struct.unpack('!2I5B', chunks[b'IHDR'])
+
+    assert (depth, color_type, interlace) == (8, 6, 0)
+
+    raw_data = zlib.decompress(chunks[b'IDAT'])
+    stride = width * 4
+
+    rows = []
+    previous = bytearray(stride)
+
+    for y in range(height):
+        filter_type = raw_data[y * (stride + 1)]
+        row = bytearray(raw_data[y * (stride + 1) + 1:(y + 1) * (stride + 1)])
+
+        for x in range(stride):
+            a = row[x - 4] if x >= 4 else 0
+            b = previous[x]
+            c = previous[x - 4] if x >= 4 else 0
+
+            if filter_type == 0:
+                predictor = 0
+            elif filter_type == 1:
+                predictor = a
+            elif filter_type == 2:
+                predictor = b
+            elif filter_type == 3:
+                predictor = (a + b) // 2
+            elif filter_type == 4:
+                p = a + b - c
+                pa = abs(p - a)
+                pb = abs(p - b)
+                pc = abs(p - c)
+                predictor = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+            else:
+                raise AssertionError('Invalid filter type ' + str(filter_type))
+
+            row[x] = (row[x] + predictor) & 0xFF
+
+        rows.append(bytes(row))
+        previous = row
+
+    return width, height, b''.join(rows)
+
+
+def create_export_settings():
+    return {'gltf_binary' : gltf2_buffer.BufferBuilder(), 'gltf_accessor_cache' : {}, 'gltf_bufferView_cache' : {}}
+
+
+def create_images(count):
+    return [Image('Image' + str(index), 3 + index, 2 + index % 3, index) for index in range(count)]
+
+
+def test_png_data_sequence_parallel():
+    images = create_images(9)
+
+    serial = list(gltf2_create.create_png_data_sequence(images, False))
+
+    assert serial == [gltf2_create.create_png_data(image) for image in images]
+    assert list(gltf2_create.create_png_data_sequence(images, True)) == serial
+
+
+def test_png_data_sequence_cache(tmp_path):
+    images = create_images(5)
+
+    cache = CountingImageCache(str(tmp_path), 1024 * 1024)
+
+    first = list(gltf2_create.create_png_data_sequence(images, True, cache=cache))
+
+    assert first == [gltf2_create.create_png_data(image) for image in images]
+    assert cache.stored == len(images)
+
+    # All images are found in the cache and not encoded again.
+    second = list(gltf2_create.create_png_data_sequence(images, True, cache=cache))
+
+    assert second == first
+    assert cache.stored == len(images)
+
+
+@pytest.mark.parametrize('png_filter', ['NONE', 'SUB', 'UP', 'AVERAGE', 'PAETH', 'ADAPTIVE'])
+def test_png_encode_filters(png_filter, monkeypatch):
+    if png_filter != 'NONE':
+        pytest.importorskip('numpy')
+
+    # Small blocks, so the rows above are taken from the previous block.
+    monkeypatch.setattr(gltf2_create, 'GLTF_PNG_FILTER_ROWS', 3)
+
+    generator = random.Random(png_filter)
+
+    width = 7
+    height = 10
+
+    # Gradients and noise, so adaptive filtering selects different filters per row.
+    pixels = []
+    for y in range(height):
+        for x in range(width):
+            for channel in range(4):
+                if y % 3 == 0:
+                    pixels.append(generator.randrange(256) / 255.0)
+                else:
+                    pixels.append(((x * 17 + y * 5 + channel * 40) % 256) / 255.0)
+
+    png_data = gltf2_create.create_png_encode(width, height, pixels, 6, png_filter)
+
+    decoded_width, decoded_height, rows = decode_png(png_data)
+
+    expected = b''.join(bytes(int(round(value * 255.0)) for value in pixels[y * width * 4:(y + 1) * width * 4]) for y in reversed(range(height)))
+
+    assert (decoded_width, decoded_height) == (width, height)
+    assert rows == expected
+
+
+@pytest.mark.parametrize('componentType, type, data', [
+    ('FLOAT', 'VEC3', [0.5, -1.0, 2.0, 3.25, 4.0, -6.5, -0.125, 8.0, 1.0]),
+    ('FLOAT', 'VEC2', array.array('f', [0.1, 0.2, -0.3, 0.4, 0.5, -0.6])),
+    ('FLOAT', 'VEC2', array.array('d', [0.1, 0.2, -0.3, 0.4, 0.5, -0.6])),
+    ('FLOAT', 'SCALAR', [0.1, 1.0 / 3.0, -0.7]),
+    ('UNSIGNED_SHORT', 'SCALAR', [3, 0, 65535, 7]),
+    ('UNSIGNED_INT', 'SCALAR', array.array('I', [70000, 1, 5])),
+    ('UNSIGNED_BYTE', 'VEC4', [255, 0, 1, 2, 3, 4, 250, 6])])
+def test_accessor(componentType, type, data):
+    export_settings = create_export_settings()
+    glTF = {}
+
+    type_count = {'SCALAR' : 1, 'VEC2' : 2, 'VEC3' : 3, 'VEC4' : 4}[type]
+    count = len(data) // type_count
+
+    accessor_index = gltf2_create.create_accessor(None, None, export_settings, glTF, data, componentType, count, type, 'ARRAY_BUFFER')
+
+    accessor = glTF['accessors'][accessor_index]
+
+    # Reference of per element bounds and packing.
+    struct_format = '<' + str(len(data)) + {'FLOAT' : 'f', 'UNSIGNED_SHORT' : 'H', 'UNSIGNED_INT' : 'I', 'UNSIGNED_BYTE' : 'B'}[componentType]
+
+    # Bounds are the ones of the stored values.
+    columns = [list(struct.unpack(struct_format, struct.pack(struct_format, *data)))[component_index::type_count] for component_index in range(0, type_count)]
+
+    assert accessor['min'] == [min(column) for column in columns]
+    assert accessor['max'] == [max(column) for column in columns]
+    assert accessor['count'] == count
+
+    bufferView = glTF['bufferViews'][accessor['bufferView']]
+
+    data_buffer = export_settings['gltf_binary'].to_bytes()
+
+    assert data_buffer[bufferView['byteOffset']:bufferView['byteOffset'] + bufferView['byteLength']] == struct.pack(struct_format, *data)
+
+
+def test_accessor_oversized():
+    # Only count elements are stored, as with a per element conversion.
+    for data in ([1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0], array.array('f', [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0])):
+        export_settings = create_export_settings()
+        glTF = {}
+
+        accessor_index = gltf2_create.create_accessor(None, None, export_settings, glTF, data, 'FLOAT', 2, 'VEC3', 'ARRAY_BUFFER')
+
+        accessor = glTF['accessors'][accessor_index]
+
+        assert accessor['max'] == [4.0, 5.0, 6.0]
+        assert glTF['bufferViews'][accessor['bufferView']]['byteLength'] == 2 * 3 * 4
+        assert export_settings['gltf_binary'].to_bytes() == struct.pack('<6f', 1.0, 2.0, 3.0, 4.0, 5.0, 6.0)
+
+
+def test_accessor_deduplication():
+    export_settings = create_export_settings()
+    glTF = {}
+
+    positions = [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+
+    first = gltf2_create.create_accessor(None, None, export_settings, glTF, positions, 'FLOAT', 2, 'VEC3', 'ARRAY_BUFFER')
+    second = gltf2_create.create_accessor(None, None, export_settings, glTF, array.array('f', positions), 'FLOAT', 2, 'VEC3', 'ARRAY_BUFFER')
+
+    assert first == second
+    assert len(glTF['accessors']) == 1
+    assert len(glTF['bufferViews']) == 1
+
+    # Same content with another type shares the bufferView, but not the accessor.
+    third = gltf2_create.create_accessor(None, None, export_settings, glTF, positions, 'FLOAT', 3, 'VEC2', 'ARRAY_BUFFER')
+
+    assert third != first
+    assert glTF['accessors'][third]['bufferView'] == glTF['accessors'][first]['bufferView']
+
+    # Another target needs another bufferView.
+    fourth = gltf2_create.create_accessor(None, None, export_settings, glTF, positions, 'FLOAT', 2, 'VEC3', '')
+
+    assert glTF['accessors'][fourth]['bufferView'] != glTF['accessors'][first]['bufferView']
+
+    assert len(export_settings['gltf_binary']) == 2 * 6 * 4
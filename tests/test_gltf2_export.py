@@ -0,0 +1,77 @@
+# Copyright (c) 2017 The Khronos Group Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import base64
+import io
+import json
+
+import pytest
+
+pytest.importorskip('bpy')
+pytest.importorskip('mathutils')
+
+from io_scene_gltf2 import gltf2_buffer
+from io_scene_gltf2 import gltf2_create
+from io_scene_gltf2 import gltf2_export
+
+#
+# Functions
+#
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 4, 5, 6])
+@pytest.mark.parametrize('length', [0, 1, 2, 3, 4, 5, 6, 7, 11, 12, 13])
+def test_save_base64(chunk_size, length, monkeypatch):
+    monkeypatch.setattr(gltf2_export, 'GLTF_BASE64_CHUNK_SIZE', chunk_size)
+
+    data = bytes((index * 37 + 11) & 0xFF for index in range(0, length))
+
+    expected = base64.b64encode(data).decode('ascii')
+
+    for source in [data, bytearray(data), memoryview(data)]:
+        file = io.StringIO()
+        gltf2_export.save_base64(file, source)
+
+        assert file.getvalue() == expected
+
+    # Segments of a buffer builder end at other offsets than the chunks.
+    buffer_builder = gltf2_buffer.BufferBuilder()
+    for offset in range(0, length, 2):
+        buffer_builder.append(data[offset:offset + 2], 1)
+
+    file = io.StringIO()
+    gltf2_export.save_base64(file, buffer_builder)
+
+    assert file.getvalue() == expected
+
+
+def test_save_json():
+    export_settings = {'gltf_data_uris' : [], 'gltf_data_uri_nonce' : 'nonce'}
+
+    images = []
+    for index in range(0, 12):
+        images.append({'uri' : gltf2_create.create_data_uri(export_settings, 'image/png', bytes([index]) * index)})
+
+    glTF_encoded = json.dumps({'images' : images, 'asset' : {'version' : '2.0'}}, sort_keys=True)
+
+    file = io.StringIO()
+    gltf2_export.save_json(file, glTF_encoded, export_settings)
+
+    glTF = json.loads(file.getvalue())
+
+    assert glTF['asset'] == {'version' : '2.0'}
+    assert [image['uri'] for image in glTF['images']] == ['data:image/png;base64,' + base64.b64encode(bytes([index]) * index).decode('ascii') for index in range(0, 12)]
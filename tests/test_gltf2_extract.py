@@ -0,0 +1,264 @@
+# Copyright (c) 2017 The Khronos Group Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import math
+import types
+
+import pytest
+
+pytest.importorskip('mathutils')
+
+from io_scene_gltf2 import gltf2_buffer
+from io_scene_gltf2 import gltf2_create
+from io_scene_gltf2 import gltf2_extract
+
+#
+# Classes
+#
+
+class Collection(list):
+    """
+    Stand-in for a Blender collection, which supports foreach_get.
+    """
+
+    active = None
+
+    def foreach_get(self, attribute, buffer):
+        index = 0
+
+        for element in self:
+            value = getattr(element, attribute)
+
+            if not isinstance(value, (list, tuple)):
+                value = [value]
+
+            for component in value:
+                buffer[index] = component
+                index += 1
+
+#
+# Functions
+#
+
+def create_mesh(uvs=None, polygon_normals=((0.0, 0.0, 1.0), (0.0, 0.0, 1.0)), use_smooth=True):
+    """
+    Returns a quad made of two triangles, which share the vertices 0 and 2.
+    """
+
+    locations = [(0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (1.0, 1.0, 0.0), (0.0, 1.0, 0.0)]
+    loop_vertex_indices = [0, 1, 2, 0, 2, 3]
+
+    vertices = Collection(types.SimpleNamespace(co=location, normal=(0.0, 0.0, 1.0)) for location in locations)
+    loops = Collection(types.SimpleNamespace(vertex_index=vertex_index) for vertex_index in loop_vertex_indices)
+    polygons = Collection(types.SimpleNamespace(normal=polygon_normals[polygon_index], use_smooth=use_smooth, material_index=0, loop_start=polygon_index * 3, loop_total=3) for polygon_index in range(0, 2))
+
+    uv_layers = Collection()
+
+    if uvs is not None:
+        uv_layers.append(types.SimpleNamespace(data=Collection(types.SimpleNamespace(uv=uv) for uv in uvs)))
+        uv_layers.active = uv_layers[0]
+
+    return types.SimpleNamespace(vertices=vertices, loops=loops, polygons=polygons, uv_layers=uv_layers, vertex_colors=Collection(), materials=[], shape_keys=None)
+
+
+def create_export_settings():
+    return {
+        'gltf_skins' : False,
+        'gltf_morph' : False,
+        'gltf_use_no_color' : [],
+        'gltf_indices' : 'UNSIGNED_SHORT'
+    }
+
+
+def extract_primitive(blender_mesh):
+    primitives = gltf2_extract.extract_primitives({}, blender_mesh, [], create_export_settings())
+
+    assert len(primitives) == 1
+
+    return primitives[0]
+
+
+def test_primitives_weld():
+    primitive = extract_primitive(create_mesh())
+
+    assert primitive['indices'] == [0, 1, 2, 0, 2, 3]
+    assert primitive['attributes']['POSITION'] == [0.0, 0.0, -0.0, 1.0, 0.0, -0.0, 1.0, 0.0, -1.0, 0.0, 0.0, -1.0]
+    assert primitive['attributes']['NORMAL'] == [0.0, 1.0, -0.0] * 4
+
+
+def test_primitives_weld_face_normals():
+    # Flat polygons with the same normal still share their vertices.
+    primitive = extract_primitive(create_mesh(use_smooth=False))
+
+    assert primitive['indices'] == [0, 1, 2, 0, 2, 3]
+
+    # Different face normals split the shared vertices.
+    primitive = extract_primitive(create_mesh(polygon_normals=((0.0, 0.0, 1.0), (0.0, 1.0, 0.0)), use_smooth=False))
+
+    assert primitive['indices'] == [0, 1, 2, 3, 4, 5]
+    assert primitive['attributes']['NORMAL'] == [0.0, 1.0, -0.0] * 3 + [0.0, 0.0, -1.0] * 3
+
+
+def test_primitives_weld_texcoords():
+    # The second triangle uses other texture coordinates for vertex 0, but the same ones for vertex 2.
+    uvs = [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.5, 0.0), (1.0, 1.0), (0.0, 1.0)]
+
+    primitive = extract_primitive(create_mesh(uvs))
+
+    assert primitive['indices'] == [0, 1, 2, 3, 2, 4]
+    assert primitive['attributes']['TEXCOORD_0'] == [0.0, 1.0, 1.0, 1.0, 1.0, 0.0, 0.5, 1.0, 0.0, 0.0]
+
+
+def test_buffer():
+    blender_mesh = create_mesh()
+
+    assert list(gltf2_extract.extract_buffer(blender_mesh.vertices, 'co', 3)) == [0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 0.0]
+    assert list(gltf2_extract.extract_buffer(blender_mesh.loops, 'vertex_index', 1, 'INT')) == [0, 1, 2, 0, 2, 3]
+    assert list(gltf2_extract.extract_buffer(blender_mesh.polygons, 'use_smooth', 1, 'BOOL')) == [True, True]
+
+    assert len(gltf2_extract.extract_buffer(Collection(), 'co', 3)) == 0
+
+
+def test_swizzle_buffer():
+    assert list(gltf2_extract.extract_swizzle_buffer([1.0, 2.0, 3.0, 4.0, 5.0, 6.0])) == [1.0, 3.0, -2.0, 4.0, 6.0, -5.0]
+
+
+def test_texcoord_buffer():
+    buffer = gltf2_extract.extract_buffer(Collection(types.SimpleNamespace(uv=uv) for uv in [(0.25, 0.0), (1.0, 0.75)]), 'uv', 2)
+
+    assert gltf2_extract.extract_texcoord_buffer(buffer) == [0.25, 1.0, 1.0, 0.25]
+
+
+def create_primitive(vertex_count, indices):
+    """
+    Returns a primitive, where each vertex stores its index in all components.
+    """
+
+    return {
+        'material' : 'Material',
+        'indices' : indices,
+        'attributes' : {
+            'POSITION' : [float(vertex_index) for vertex_index in range(0, vertex_count) for component in range(0, 3)],
+            'NORMAL' : [float(-vertex_index) for vertex_index in range(0, vertex_count) for component in range(0, 3)],
+            'TEXCOORD_0' : [float(vertex_index) for vertex_index in range(0, vertex_count) for component in range(0, 2)]
+        }
+    }
+
+
+def get_triangles(primitive):
+    """
+    Returns the triangles of a primitive as positions, so they can be compared independent of the vertex order.
+    """
+
+    positions = [float(value) for value in primitive['attributes']['POSITION'][0::3]]
+    indices = primitive['indices']
+
+    return [tuple(positions[index] for index in indices[corner_index:corner_index + 3]) for corner_index in range(0, len(indices), 3)]
+
+
+def test_primitive_pack():
+    primitive = gltf2_extract.extract_primitive_pack(create_primitive(10, []), [5, 3, 5, 7, 3, 9], False)
+
+    assert primitive['material'] == 'Material'
+    assert list(primitive['indices']) == [0, 1, 0, 2, 1, 3]
+
+    # Vertices are ordered by their first use.
+    assert list(primitive['attributes']['POSITION']) == [5.0] * 3 + [3.0] * 3 + [7.0] * 3 + [9.0] * 3
+    assert list(primitive['attributes']['NORMAL']) == [-5.0] * 3 + [-3.0] * 3 + [-7.0] * 3 + [-9.0] * 3
+    assert list(primitive['attributes']['TEXCOORD_0']) == [5.0] * 2 + [3.0] * 2 + [7.0] * 2 + [9.0] * 2
+
+
+def create_accessors(primitive):
+    """
+    Stores the indices and all attributes of a primitive. Returns the accessors and the binary data.
+    """
+
+    export_settings = {'gltf_binary' : gltf2_buffer.BufferBuilder(), 'gltf_accessor_cache' : {}, 'gltf_bufferView_cache' : {}}
+    glTF = {}
+
+    gltf2_create.create_accessor(None, None, export_settings, glTF, primitive['indices'], 'UNSIGNED_SHORT', len(primitive['indices']), 'SCALAR', 'ELEMENT_ARRAY_BUFFER')
+
+    for attribute_id, componentType, type, components in [('POSITION', 'FLOAT', 'VEC3', 3), ('NORMAL', 'FLOAT', 'VEC3', 3), ('TEXCOORD_0', 'FLOAT', 'VEC2', 2), ('JOINTS_0', 'UNSIGNED_SHORT', 'VEC4', 4), ('WEIGHTS_0', 'FLOAT', 'VEC4', 4)]:
+        data = primitive['attributes'][attribute_id]
+
+        gltf2_create.create_accessor(None, None, export_settings, glTF, data, componentType, len(data) // components, type, 'ARRAY_BUFFER')
+
+    return glTF['accessors'], export_settings['gltf_binary'].to_bytes()
+
+
+def test_primitive_pack_accessors(monkeypatch):
+    pytest.importorskip('numpy')
+
+    source_primitive = create_primitive(10, [])
+
+    source_attributes = source_primitive['attributes']
+
+    source_attributes['POSITION'] = [vertex_index * 0.1 for vertex_index in range(0, 30)]
+    source_attributes['JOINTS_0'] = [vertex_index % 7 for vertex_index in range(0, 40)]
+    source_attributes['WEIGHTS_0'] = [1.0 / (vertex_index + 3) for vertex_index in range(0, 40)]
+
+    indices = [5, 3, 5, 7, 3, 9, 0, 9, 5]
+
+    primitive = gltf2_extract.extract_primitive_pack(source_primitive, indices, False)
+
+    assert not isinstance(primitive['attributes']['POSITION'], list)
+
+    monkeypatch.setattr(gltf2_extract, 'numpy', None)
+
+    fallback_primitive = gltf2_extract.extract_primitive_pack(source_primitive, indices, False)
+
+    assert isinstance(fallback_primitive['attributes']['POSITION'], list)
+
+    # NumPy arrays and lists are stored with the same accessors and bytes.
+    assert primitive['indices'] == fallback_primitive['indices']
+    assert create_accessors(primitive) == create_accessors(fallback_primitive)
+
+
+def test_primitive_take():
+    primitive = gltf2_extract.extract_primitive_take(create_primitive(4, []), [2, 0], [0, 1, 1], False)
+
+    assert primitive['indices'] == [0, 1, 1]
+    assert list(primitive['attributes']['POSITION']) == [2.0] * 3 + [0.0] * 3
+    assert list(primitive['attributes']['TEXCOORD_0']) == [2.0] * 2 + [0.0] * 2
+
+
+@pytest.mark.parametrize('range_indices', [3, 4, 8, 256])
+def test_primitive_split(range_indices):
+    # Triangle strip, where consecutive triangles share two vertices.
+    vertex_count = 40
+    indices = []
+
+    for vertex_index in range(0, vertex_count - 2):
+        indices.extend([vertex_index, vertex_index + 1, vertex_index + 2])
+
+    source_primitive = create_primitive(vertex_count, indices)
+
+    primitives = gltf2_extract.extract_primitive_split(source_primitive, range_indices, False)
+
+    triangles = []
+
+    for primitive in primitives:
+        assert primitive['material'] == 'Material'
+        assert len(primitive['attributes']['POSITION']) // 3 <= range_indices
+        assert max(primitive['indices']) < range_indices
+
+        triangles.extend(get_triangles(primitive))
+
+    # Triangles are kept in order and each primitive is filled, before the next one is started.
+    assert triangles == get_triangles(source_primitive)
+    assert len(primitives) == math.ceil((vertex_count - 2) / (range_indices - 2))
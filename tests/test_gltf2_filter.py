@@ -0,0 +1,136 @@
+# Copyright (c) 2017 The Khronos Group Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import types
+
+import pytest
+
+pytest.importorskip('bpy')
+
+from io_scene_gltf2 import gltf2_filter
+
+#
+# Classes
+#
+
+class Object:
+    """
+    Stand-in for a Blender object without data, materials and modifiers.
+    """
+
+    def __init__(self, name, type='EMPTY', parent=None, select=True, bone_names=(), armature=None):
+        self.name = name
+        self.type = type
+        self.parent = parent
+        self.select = select
+        self.users = 1
+        self.data = None
+        self.material_slots = []
+        self.children = []
+        self.pose = types.SimpleNamespace(bones=[types.SimpleNamespace(name=bone_name) for bone_name in bone_names])
+        self.armature = armature
+
+        if parent is not None:
+            parent.children.append(self)
+
+    def find_armature(self):
+        return self.armature
+
+#
+# Functions
+#
+
+def filter_apply(monkeypatch, blender_objects, selected=False, skins=True, blender_cameras=(), blender_lamps=()):
+    monkeypatch.setattr(gltf2_filter.bpy, 'data', types.SimpleNamespace(objects=blender_objects, meshes=[], curves=[], materials=[], cameras=list(blender_cameras), lamps=list(blender_lamps)))
+
+    export_settings = {
+        'gltf_selected' : selected,
+        'gltf_apply' : False,
+        'gltf_skins' : skins,
+        'gltf_displacement' : False
+    }
+
+    gltf2_filter.filter_apply(export_settings)
+
+    return export_settings
+
+
+def test_filter_objects(monkeypatch):
+    root = Object('Root', select=False)
+    child = Object('Child', parent=root)
+    grandchild = Object('Grandchild', parent=child)
+    other = Object('Other', select=False)
+    unused = Object('Unused')
+    unused.users = 0
+
+    blender_objects = [child, grandchild, other, root, unused]
+
+    export_settings = filter_apply(monkeypatch, blender_objects)
+
+    assert export_settings['filtered_objects'] == [child, grandchild, other, root]
+
+    # Unselected parents of selected objects are added once, after all selected objects.
+    export_settings = filter_apply(monkeypatch, blender_objects, selected=True)
+
+    assert export_settings['filtered_objects'] == [child, grandchild, root]
+
+
+def test_filter_skinned_children(monkeypatch):
+    armature = Object('Armature', 'ARMATURE', bone_names=['Root', 'Tip'])
+    child = Object('Child', 'MESH', parent=armature, armature=armature)
+    helper = Object('Helper', parent=armature)
+    skinned = Object('Skinned', 'MESH', armature=armature)
+    other_armature = Object('Other', 'ARMATURE', bone_names=['Bone'])
+    empty_armature = Object('Empty', 'ARMATURE')
+    unskinned = Object('Unskinned', 'MESH', armature=empty_armature)
+
+    export_settings = filter_apply(monkeypatch, [armature, child, empty_armature, helper, other_armature, skinned, unskinned])
+
+    assert export_settings['group_index'] == {'Root' : 0, 'Tip' : 1, 'Bone' : 2}
+
+    # Children of an armature come first, followed by the other objects deformed by it.
+    assert export_settings['skinned_children'] == {armature : [child, helper, skinned], other_armature : []}
+
+    export_settings = filter_apply(monkeypatch, [armature, child, skinned], skins=False)
+
+    assert export_settings['group_index'] == {}
+    assert export_settings['skinned_children'] == {}
+
+
+def test_filter_cameras_lamps(monkeypatch):
+    camera = Object('Camera', 'CAMERA')
+    lamp = Object('Lamp', 'POINT')
+    area_lamp = Object('Area', 'AREA')
+    unselected_lamp = Object('Unselected', 'SUN', select=False)
+
+    blender_lamps = [lamp, area_lamp, unselected_lamp]
+
+    # The object stands in for the lamp data, so it is found among the filtered objects.
+    for blender_lamp in blender_lamps:
+        blender_lamp.use_nodes = False
+
+    export_settings = filter_apply(monkeypatch, [], blender_cameras=[camera], blender_lamps=blender_lamps)
+
+    assert export_settings['filtered_cameras'] == [camera]
+    assert export_settings['filtered_lights_cmn'] == [lamp, unselected_lamp]
+
+    # Only the ones, which are explicitly filtered, are kept for a selected only export.
+    export_settings = filter_apply(monkeypatch, [camera, lamp, area_lamp, unselected_lamp], selected=True, blender_cameras=[camera], blender_lamps=blender_lamps)
+
+    assert export_settings['filtered_cameras'] == [camera]
+    assert export_settings['filtered_lights_cmn'] == [lamp]
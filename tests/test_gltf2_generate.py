@@ -0,0 +1,151 @@
+# Copyright (c) 2017 The Khronos Group Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import types
+
+import pytest
+
+pytest.importorskip('bpy')
+pytest.importorskip('mathutils')
+
+from io_scene_gltf2 import gltf2_animate
+from io_scene_gltf2 import gltf2_buffer
+from io_scene_gltf2 import gltf2_create
+from io_scene_gltf2 import gltf2_generate
+
+#
+# Classes
+#
+
+class FCurve:
+    def __init__(self, data_path, array_index, frames, interpolation):
+        self.data_path = data_path
+        self.array_index = array_index
+        self.keyframe_points = [types.SimpleNamespace(co=(frame, 0.0), interpolation=interpolation) for frame in frames]
+
+    def range(self):
+        return (self.keyframe_points[0].co[0], self.keyframe_points[-1].co[0])
+
+#
+# Functions
+#
+
+def create_armature(action, name='Armature'):
+    bones = [types.SimpleNamespace(name='Root'), types.SimpleNamespace(name='Tip')]
+
+    return types.SimpleNamespace(name=name, pose=types.SimpleNamespace(bones=bones), animation_data=types.SimpleNamespace(action=action))
+
+
+def test_animations_fcurves():
+    fcurves = [FCurve('pose.bones["Root"].location', 1, [1.0, 2.0], 'LINEAR'),
+               FCurve('pose.bones["Tip"].scale', 0, [1.0, 2.0], 'LINEAR'),
+               FCurve('rotation_euler', 2, [1.0, 2.0], 'LINEAR')]
+
+    action = types.SimpleNamespace(name='Action', fcurves=fcurves)
+
+    data, prefix, postfix = gltf2_generate.generate_animations_fcurves(action, 'Root', False)
+
+    assert data['location'] == [None, fcurves[0], None]
+    assert data['scale'] == [None, None, None]
+    assert data['rotation_euler'] == [None, None, fcurves[2]]
+    assert (prefix, postfix) == ('Root_', '_Root')
+
+    data, prefix, postfix = gltf2_generate.generate_animations_fcurves(action, None, False)
+
+    assert data['location'] == [None, None, None]
+    assert data['rotation_euler'] == [None, None, fcurves[2]]
+    assert (prefix, postfix) == ('', '')
+
+
+@pytest.mark.parametrize('samples', [1, 3])
+def test_animations_joint_keys(samples):
+    export_settings = {'gltf_force_sampling' : False, 'gltf_frame_range' : False, 'gltf_frame_samples' : samples}
+
+    # Offset and fractional starts, mixed with cubic splines, which are sampled for joints.
+    fcurves = [FCurve('pose.bones["Root"].location', 0, [1.5, 4.0, 7.25], 'LINEAR'),
+               FCurve('pose.bones["Root"].rotation_quaternion', 0, [2.3, 5.7], 'BEZIER'),
+               FCurve('pose.bones["Tip"].scale', 2, [0.75, 3.0], 'CONSTANT'),
+               FCurve('pose.bones["Tip"].location', 1, [3.1, 6.6], 'BEZIER')]
+
+    action = types.SimpleNamespace(name='Action', fcurves=fcurves)
+
+    other_action = types.SimpleNamespace(name='Other', fcurves=[FCurve('pose.bones["Tip"].location', 0, [10.0, 12.0], 'LINEAR')])
+
+    armature_keys = gltf2_generate.generate_animations_joint_keys(export_settings, [create_armature(action), create_armature(other_action, 'Other')])
+
+    # Keys are gathered per armature, so each armature is only sampled at its own keys.
+    assert armature_keys['Other'] == [10.0, 12.0]
+
+    keys = armature_keys['Armature']
+
+    assert keys == sorted(set(keys))
+    assert 10.0 not in keys
+
+    # Every key of a joint sampler has been sampled in advance.
+    for bone_name in ['Root', 'Tip']:
+        data, prefix, postfix = gltf2_generate.generate_animations_fcurves(action, bone_name, False)
+
+        for data_path in ['location', 'rotation_quaternion', 'scale']:
+            fcurve_list = data[data_path]
+
+            if fcurve_list.count(None) == len(fcurve_list):
+                continue
+
+            interpolation = gltf2_animate.animate_get_interpolation(export_settings, fcurve_list)
+            if interpolation == 'CUBICSPLINE':
+                interpolation = 'CONVERSION_NEEDED'
+
+            sampler_keys = gltf2_animate.animate_gather_keys(export_settings, fcurve_list, interpolation)
+
+            assert len(sampler_keys) > 0
+            assert set(sampler_keys) <= set(keys)
+
+    assert 2.3 in keys and 3.1 + 1.0 / samples in keys
+
+
+def test_animations_input(monkeypatch):
+    export_settings = {'gltf_binary' : gltf2_buffer.BufferBuilder(), 'gltf_accessor_cache' : {}, 'gltf_bufferView_cache' : {}, 'gltf_time_grids' : {}}
+    glTF = {}
+
+    created_keys = []
+
+    def create_accessor(operator, context, export_settings, glTF, data, componentType, count, type, target):
+        created_keys.append(list(data))
+
+        return gltf2_create.create_accessor(operator, context, export_settings, glTF, data, componentType, count, type, target)
+
+    monkeypatch.setattr(gltf2_generate, 'create_accessor', create_accessor)
+
+    action = types.SimpleNamespace(name='Action')
+    other_action = types.SimpleNamespace(name='Other')
+
+    first = gltf2_generate.generate_animations_input(None, None, export_settings, glTF, action, [0.0, 0.5, 1.0])
+    second = gltf2_generate.generate_animations_input(None, None, export_settings, glTF, action, [0.0, 0.5, 1.0])
+
+    # Samplers on the same time grid share the input accessor, which is only created once.
+    assert first == second
+    assert created_keys == [[0.0, 0.5, 1.0]]
+
+    third = gltf2_generate.generate_animations_input(None, None, export_settings, glTF, action, [0.0, 1.0])
+
+    assert third != first
+    assert glTF['accessors'][third]['count'] == 2
+
+    gltf2_generate.generate_animations_input(None, None, export_settings, glTF, other_action, [0.0, 0.5, 1.0])
+
+    assert len(created_keys) == 3
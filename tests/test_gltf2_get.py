@@ -0,0 +1,110 @@
+# Copyright (c) 2017 The Khronos Group Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import types
+
+import pytest
+
+pytest.importorskip('bpy')
+
+from io_scene_gltf2 import gltf2_get
+
+#
+# Functions
+#
+
+def test_index_registry_grows():
+    export_settings = {'gltf_index_registry' : {}}
+
+    glTF = {'nodes' : [{'name' : 'A'}, {'name' : 'B'}, {'name' : 'A'}]}
+
+    assert gltf2_get.get_node_index(export_settings, glTF, 'A') == 0
+    assert gltf2_get.get_node_index(export_settings, glTF, 'B') == 1
+    assert gltf2_get.get_node_index(export_settings, glTF, 'C') == -1
+
+    glTF['nodes'].append({'name' : 'C'})
+
+    assert gltf2_get.get_node_index(export_settings, glTF, 'C') == 3
+
+
+def test_index_registry_per_export():
+    glTF = {'meshes' : [{'name' : 'A'}]}
+
+    first_settings = {'gltf_index_registry' : {}}
+    second_settings = {'gltf_index_registry' : {}}
+
+    assert gltf2_get.get_mesh_index(first_settings, glTF, 'A') == 0
+
+    # A new glTF array with the same contents is indexed again.
+    glTF = {'meshes' : [{'name' : 'B'}, {'name' : 'A'}]}
+
+    assert gltf2_get.get_mesh_index(first_settings, glTF, 'A') == 1
+    assert gltf2_get.get_mesh_index(second_settings, glTF, 'B') == 0
+    assert len(second_settings['gltf_index_registry']) == 1
+
+
+def test_get_index_unnamed():
+    export_settings = {'gltf_index_registry' : {}}
+
+    samplers = [{'name' : 'A'}, {}, {'name' : 'B'}]
+
+    # Elements after the first one without a name are not found, as with a linear search.
+    assert gltf2_get.get_index(export_settings, samplers, 'A') == 0
+    assert gltf2_get.get_index(export_settings, samplers, 'B') == -1
+    assert gltf2_get.get_index(export_settings, None, 'A') == -1
+
+
+def create_image(filepath=None, data=None, is_dirty=False, source='FILE'):
+    packed_file = None
+    if data is not None:
+        packed_file = types.SimpleNamespace(data=data)
+
+    return types.SimpleNamespace(source=source, is_dirty=is_dirty, filepath=filepath, library=None, packed_file=packed_file)
+
+
+def test_image_source(tmp_path):
+    png_path = tmp_path / 'image.png'
+    png_path.write_bytes(b'\x89PNG\r\n\x1a\n' + b'\0' * 16)
+
+    jpeg_path = tmp_path / 'image.jpg'
+    jpeg_path.write_bytes(b'\xff\xd8\xff\xe0' + b'\0' * 16)
+
+    tga_path = tmp_path / 'image.tga'
+    tga_path.write_bytes(b'\0' * 24)
+
+    assert gltf2_get.get_image_source_mime_type(create_image(str(png_path))) == 'image/png'
+    assert gltf2_get.get_image_source_mime_type(create_image(str(jpeg_path))) == 'image/jpeg'
+    assert gltf2_get.get_image_source_mime_type(create_image(str(tga_path))) is None
+    assert gltf2_get.get_image_source_mime_type(create_image(str(tmp_path / 'missing.png'))) is None
+
+    assert gltf2_get.get_image_source_data(create_image(str(png_path))) == png_path.read_bytes()
+
+    # Modified or generated images have to be encoded.
+    assert gltf2_get.get_image_source_mime_type(create_image(str(png_path), is_dirty=True)) is None
+    assert gltf2_get.get_image_source_mime_type(create_image(str(png_path), source='GENERATED')) is None
+    assert gltf2_get.get_image_source_data(create_image(str(png_path), source='GENERATED')) is None
+
+
+def test_image_source_packed():
+    data = b'\xff\xd8\xff\xdb' + b'\0' * 16
+
+    # Packed data is used, even if the file does not exist anymore.
+    blender_image = create_image('//missing.png', data)
+
+    assert gltf2_get.get_image_source_mime_type(blender_image) == 'image/jpeg'
+    assert gltf2_get.get_image_source_data(blender_image) == data
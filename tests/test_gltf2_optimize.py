@@ -0,0 +1,86 @@
+# Copyright (c) 2017 The Khronos Group Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#
+# Imports
+#
+
+import random
+
+import pytest
+
+pytest.importorskip('mathutils')
+
+from io_scene_gltf2 import gltf2_optimize
+
+#
+# Functions
+#
+
+def create_grid(size, seed):
+    """
+    Returns the shuffled triangle indices and the vertex count of a grid.
+    """
+
+    triangles = []
+
+    for y in range(0, size):
+        for x in range(0, size):
+            a = y * (size + 1) + x
+            b = a + 1
+            c = a + size + 1
+            d = c + 1
+
+            triangles.append((a, c, b))
+            triangles.append((b, c, d))
+
+    random.Random(seed).shuffle(triangles)
+
+    return [index for triangle in triangles for index in triangle], (size + 1) * (size + 1)
+
+
+def get_triangles(indices):
+    return sorted(tuple(indices[corner_index:corner_index + 3]) for corner_index in range(0, len(indices), 3))
+
+
+def test_acmr_lru():
+    assert gltf2_optimize.optimize_acmr([]) == 0.0
+    assert gltf2_optimize.optimize_acmr([0, 1, 2]) == 3.0
+
+    # A FIFO cache would have evicted vertex 0, although it was used by the second triangle.
+    assert gltf2_optimize.optimize_acmr([0, 1, 2, 0, 3, 4, 0, 1, 5], 4) == 2.0
+
+
+def test_vertex_cache():
+    indices, vertex_count = create_grid(24, 1)
+
+    optimized_indices = gltf2_optimize.optimize_vertex_cache(indices, vertex_count)
+
+    # Triangles are only reordered, keeping their winding.
+    assert get_triangles(optimized_indices) == get_triangles(indices)
+
+    acmr_before = gltf2_optimize.optimize_acmr(indices)
+    acmr_after = gltf2_optimize.optimize_acmr(optimized_indices)
+
+    assert acmr_after < 0.8 < acmr_before
+
+
+def test_vertex_cache_degenerated():
+    indices = [0, 1, 1, 1, 2, 3, 3, 3, 3, 0, 1, 2, 4, 5, 6]
+
+    optimized_indices = gltf2_optimize.optimize_vertex_cache(indices, 8, 4)
+
+    assert get_triangles(optimized_indices) == get_triangles(indices)
+
+    assert gltf2_optimize.optimize_vertex_cache([], 0) == []